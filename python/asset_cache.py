@@ -0,0 +1,388 @@
+# asset_cache.py
+#
+# Local cache of downloaded model files, keyed by the SHA-256 of their content.
+#   - blobs live in <ASSET_CACHE_DIR>/objects/<hash[:2]>/<hash><ext>, and
+#     index.json maps each download URL to its blob. Aliases of the same model
+#     (e.g. "bottle" and "water bottle") resolve to one URL and download once.
+#     Different URLs serving the same bytes share one blob
+#   - downloads go to a .part file that is renamed into place only after it
+#     has passed an integrity check (complete GLB header, valid glTF JSON), so a
+#     failed or interrupted download never looks like a cached model
+#   - servers that accept byte ranges are downloaded in ASSET_DOWNLOAD_CHUNK_SIZE
+#     ranges by ASSET_DOWNLOAD_WORKERS threads. Finished ranges are recorded next
+#     to the .part file, so an interrupted download resumes where it stopped
+#   - concurrent requests for the same URL share one download
+#   - models are placed in Unity's ImportedModels folder as hard links to the
+#     blob (copies where linking is not possible), again via temp file + rename
+#
+# Warm the cache from config.MOCK_SKETCHFAB_DATABASE (from the python/ folder):
+#   python asset_cache.py prefetch
+#   python asset_cache.py verify
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+import recorder
+
+GLB_MAGIC = b"glTF"
+
+
+def model_extension(url: str) -> str:
+    """The model file extension of a download URL ('.glb' when it has none)."""
+    suffix = Path(urlparse(url).path).suffix.lower()
+    return suffix if suffix in (".glb", ".gltf") else ".glb"
+
+
+def check_model_file(path: Path, extension: str = None) -> str:
+    """
+    Checks that a file is a complete model. Returns None if it is, or the reason it is not.
+
+    :param path: The file to check.
+    :param extension: '.glb' or '.gltf'; defaults to the file's own suffix.
+    """
+    extension = (extension or path.suffix).lower()
+    try:
+        size = path.stat().st_size
+        if size == 0:
+            return "file is empty"
+        with open(path, "rb") as f:
+            header = f.read(12)
+            if extension == ".gltf":
+                f.seek(0)
+                json.loads(f.read().decode("utf-8"))
+                return None
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return f"unreadable: {e}"
+
+    if len(header) < 12 or header[:4] != GLB_MAGIC:
+        return "missing GLB header"
+    _, version, length = struct.unpack("<4sII", header)
+    if version != 2:
+        return f"unsupported GLB version {version}"
+    if length != size:
+        return f"truncated: header says {length} bytes, file has {size}"
+    return None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AssetCache:
+    """
+    Content-addressed store of downloaded models.
+
+    :param root: Cache directory; defaults to config.ASSET_CACHE_DIR.
+    :param workers: Parallel range requests per download; defaults to config.ASSET_DOWNLOAD_WORKERS.
+    :param chunk_size: Bytes per range request; defaults to config.ASSET_DOWNLOAD_CHUNK_SIZE.
+    """
+    def __init__(self, root: str = None, workers: int = None, chunk_size: int = None):
+        self.root = Path(root or config.ASSET_CACHE_DIR)
+        self.workers = workers or config.ASSET_DOWNLOAD_WORKERS
+        self.chunk_size = chunk_size or config.ASSET_DOWNLOAD_CHUNK_SIZE
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        (self.root / "partial").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight = {}  # url -> Future of the running download
+        self._session = requests.Session()
+        # Downloads are matched by full URL when recorded or replayed (see recorder.py).
+        adapter = recorder.RecordingAdapter("download", HTTPAdapter(pool_maxsize=max(10, self.workers)), match_host=True)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._index = self._load_index()
+        self.stats = {"hits": 0, "downloads": 0, "resumed": 0, "bytes_downloaded": 0}
+
+    # --- Index ---
+    @property
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """Writes index.json atomically; called with self._lock held."""
+        self._write_json_atomic(self._index_path, self._index)
+
+    @staticmethod
+    def _write_json_atomic(path: Path, data):
+        fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp, path)
+
+    def blob_path(self, sha256: str, extension: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}{extension}"
+
+    def lookup(self, url: str):
+        """Returns the index entry of a cached URL whose blob is still intact, or None."""
+        with self._lock:
+            entry = self._index.get(url)
+        if entry is None:
+            return None
+        path = self.blob_path(entry["sha256"], entry["extension"])
+        try:
+            if path.stat().st_size == entry["size"]:
+                return entry
+        except OSError:
+            pass
+        return None
+
+    # --- Fetching ---
+    def fetch(self, url: str) -> dict:
+        """
+        Returns the cached blob for `url`, downloading it first if needed.
+        Concurrent calls for the same URL wait for one shared download.
+
+        :return: {"success", "path", "sha256", "size", "cached"} or {"success": False, "error"}.
+        """
+        entry = self.lookup(url)
+        if entry is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return {"success": True, "path": str(self.blob_path(entry["sha256"], entry["extension"])),
+                    "sha256": entry["sha256"], "size": entry["size"], "cached": True}
+
+        with self._lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = self._inflight[url] = Future()
+        if not owner:
+            return future.result()
+        try:
+            result = self._download(url)
+        except Exception as e:
+            result = {"success": False, "error": f"Download failed: {e}"}
+        finally:
+            with self._lock:
+                del self._inflight[url]
+        future.set_result(result)
+        return result
+
+    def _download(self, url: str) -> dict:
+        extension = model_extension(url)
+        partial = self.root / "partial" / hashlib.sha256(url.encode("utf-8")).hexdigest()
+        part_path = partial.with_suffix(".part")
+        size, ranges = self._probe(url)
+        if size is not None and size > config.ASSET_MAX_SIZE:
+            return {"success": False, "error": f"{url} is {size} bytes, over the {config.ASSET_MAX_SIZE}-byte limit."}
+
+        start = time.perf_counter()
+        if ranges and size:
+            fetched = self._download_ranges(url, part_path, partial.with_suffix(".json"), size)
+        else:
+            fetched = self._download_stream(url, part_path)
+
+        problem = check_model_file(part_path, extension)
+        if problem is not None:
+            # Not resumable into anything useful; start over next time.
+            part_path.unlink(missing_ok=True)
+            partial.with_suffix(".json").unlink(missing_ok=True)
+            return {"success": False, "error": f"Downloaded file from {url} is not a valid model ({problem})."}
+        if size is not None and part_path.stat().st_size != size:
+            part_path.unlink(missing_ok=True)
+            return {"success": False, "error": f"Downloaded {part_path.stat().st_size} of {size} bytes from {url}."}
+
+        sha256 = file_sha256(part_path)
+        blob = self.blob_path(sha256, extension)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            # Another URL already brought in the same bytes.
+            part_path.unlink()
+        else:
+            os.replace(part_path, blob)
+        partial.with_suffix(".json").unlink(missing_ok=True)
+
+        entry = {"sha256": sha256, "size": blob.stat().st_size, "extension": extension, "fetched_at": time.time()}
+        with self._lock:
+            self._index[url] = entry
+            self._save_index()
+            self.stats["downloads"] += 1
+            self.stats["bytes_downloaded"] += fetched
+        print(f"ASSET CACHE: Downloaded {url} ({entry['size']} bytes, {fetched} transferred) in {time.perf_counter() - start:.2f}s.")
+        return {"success": True, "path": str(blob), "sha256": sha256, "size": entry["size"], "cached": False}
+
+    def _probe(self, url: str):
+        """Returns (size or None, whether byte ranges are accepted)."""
+        try:
+            response = self._session.head(url, allow_redirects=True, timeout=config.ASSET_DOWNLOAD_TIMEOUT)
+        except requests.RequestException:
+            return None, False
+        if response.status_code != 200:
+            return None, False
+        length = response.headers.get("Content-Length")
+        size = int(length) if length and length.isdigit() else None
+        return size, response.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+    def _download_stream(self, url: str, part_path: Path) -> int:
+        """Plain GET into the .part file (no resume without range support)."""
+        fetched = 0
+        with self._session.get(url, stream=True, timeout=config.ASSET_DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            with open(part_path, "wb") as f:
+                for block in response.iter_content(1 << 16):
+                    f.write(block)
+                    fetched += len(block)
+                    if fetched > config.ASSET_MAX_SIZE:
+                        raise ValueError(f"download exceeds the {config.ASSET_MAX_SIZE}-byte limit")
+        return fetched
+
+    def _download_ranges(self, url: str, part_path: Path, state_path: Path, size: int) -> int:
+        """Fetches missing chunks in parallel into a preallocated .part file. Returns the bytes transferred."""
+        chunks = [(offset, min(offset + self.chunk_size, size) - 1) for offset in range(0, size, self.chunk_size)]
+        done = set()
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("size") == size and state.get("chunk_size") == self.chunk_size and part_path.exists():
+                done = set(state.get("done", []))
+        except (OSError, ValueError):
+            pass
+        if done:
+            with self._lock:
+                self.stats["resumed"] += 1
+            print(f"ASSET CACHE: Resuming {url}: {len(done)} of {len(chunks)} chunks already downloaded.")
+        else:
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+
+        state_lock = threading.Lock()
+
+        def fetch_chunk(index: int) -> int:
+            first, last = chunks[index]
+            for attempt in range(1, config.ASSET_DOWNLOAD_RETRIES + 1):
+                try:
+                    response = self._session.get(url, headers={"Range": f"bytes={first}-{last}"},
+                                                 timeout=config.ASSET_DOWNLOAD_TIMEOUT)
+                    if response.status_code != 206 or len(response.content) != last - first + 1:
+                        raise ValueError(f"range {first}-{last} answered with HTTP {response.status_code}, "
+                                         f"{len(response.content)} bytes")
+                    break
+                except (requests.RequestException, ValueError):
+                    if attempt == config.ASSET_DOWNLOAD_RETRIES:
+                        raise
+                    time.sleep(config.ASSET_DOWNLOAD_BACKOFF * attempt)
+            with open(part_path, "r+b") as f:
+                f.seek(first)
+                f.write(response.content)
+            with state_lock:
+                done.add(index)
+                self._write_json_atomic(state_path, {"url": url, "size": size, "chunk_size": self.chunk_size, "done": sorted(done)})
+            return len(response.content)
+
+        missing = [index for index in range(len(chunks)) if index not in done]
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(missing))), thread_name_prefix="asset-download") as pool:
+            # Raises the first chunk failure after the other chunks have finished,
+            # so everything fetched so far is recorded for the next attempt.
+            futures = [pool.submit(fetch_chunk, index) for index in missing]
+            return sum(future.result() for future in futures)
+
+    # --- Unity project ---
+    def materialize(self, url: str, destination: Path) -> dict:
+        """
+        Places the model behind `url` at `destination`, downloading it if needed.
+        An existing file is kept only if it has the same content.
+        """
+        result = self.fetch(url)
+        if not result["success"]:
+            return result
+        destination = Path(destination)
+        blob = Path(result["path"])
+        if destination.exists() and destination.stat().st_size == result["size"] and file_sha256(destination) == result["sha256"]:
+            return {**result, "file_path": str(destination), "linked": False}
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temp = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.link(blob, temp)
+        except OSError:
+            shutil.copyfile(blob, temp)
+        os.replace(temp, destination)
+        return {**result, "file_path": str(destination), "linked": True}
+
+    def prefetch(self, urls, parallel: int = 4) -> list:
+        """Fetches several URLs (duplicates once), `parallel` files at a time."""
+        unique = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="asset-prefetch") as pool:
+            return list(zip(unique, pool.map(self.fetch, unique)))
+
+    def verify(self) -> list:
+        """Re-hashes every indexed blob. Returns (url, problem) pairs for blobs that are missing or corrupt."""
+        problems = []
+        with self._lock:
+            entries = dict(self._index)
+        for url, entry in entries.items():
+            path = self.blob_path(entry["sha256"], entry["extension"])
+            if not path.exists():
+                problems.append((url, "blob missing"))
+            elif file_sha256(path) != entry["sha256"]:
+                problems.append((url, "content does not match its hash"))
+            else:
+                problem = check_model_file(path, entry["extension"])
+                if problem:
+                    problems.append((url, problem))
+        return problems
+
+
+# --- Shared cache ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache() -> AssetCache:
+    """Returns the process-wide AssetCache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AssetCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the local model asset cache.")
+    parser.add_argument("command", choices=["prefetch", "verify"])
+    parser.add_argument("--url", action="append", help="URL to prefetch (repeatable); defaults to every model in MOCK_SKETCHFAB_DATABASE.")
+    parser.add_argument("--root", help="Cache directory (default: config.ASSET_CACHE_DIR).")
+    args = parser.parse_args()
+
+    cache = AssetCache(args.root)
+    if args.command == "prefetch":
+        urls = args.url or [model["download_url"] for model in config.MOCK_SKETCHFAB_DATABASE.values()]
+        start = time.perf_counter()
+        results = cache.prefetch(urls)
+        for url, result in results:
+            state = ("cached" if result["cached"] else "downloaded") if result["success"] else f"FAILED: {result['error']}"
+            print(f"  {url}\n    {state}")
+        failed = sum(1 for _, result in results if not result["success"])
+        print(f"Prefetched {len(results) - failed} of {len(results)} unique models into {cache.root} in {time.perf_counter() - start:.2f}s.")
+        raise SystemExit(1 if failed else 0)
+    problems = cache.verify()
+    for url, problem in problems:
+        print(f"  {url}: {problem}")
+    print(f"{len(problems)} problem(s) in {cache.root}.")
+    raise SystemExit(1 if problems else 0)
@@ -0,0 +1,444 @@
+# asset_catalog.py
+#
+# Ranked model search over a local catalog, replacing the linear substring scan
+# of MOCK_SKETCHFAB_DATABASE in search_web_for_3d_model.
+#   - catalogs are loaded from JSON (a list of entries, or an alias -> entry
+#     mapping like MOCK_SKETCHFAB_DATABASE), JSON Lines or SQLite (a 'models'
+#     table); CATALOG_LOADERS maps file suffixes to loaders
+#   - an inverted index maps each token of an entry's name, aliases and tags to
+#     the entries containing it. Postings carry BM25-style weights (field weight,
+#     length-normalised), and queries sum idf-weighted postings into top-k scores
+#   - query tokens missing from the vocabulary are matched to vocabulary tokens
+#     sharing enough trigrams (typos, plurals), and config.ASSET_CATALOG_SYNONYMS
+#     expands a token to related words at a lower weight
+#   - for file catalogs the index is built once into <catalog>.index/ as .npy
+#     arrays and a JSON Lines copy of the entries. Later runs memory-map those
+#     files, so opening a 1M-entry catalog reads only the vocabulary; entries are
+#     decoded when they appear in results. The index is rebuilt when the
+#     catalog file changes. The trigram index is built on the first fuzzy lookup.
+#   - without NumPy, get_asset_catalog() returns a SubstringCatalog instead: the
+#     original scan for entries whose name or alias appears in the query. Model
+#     search keeps working on such hosts, just without ranking or fuzzy matching.
+#
+# Build or refresh a catalog's index (from the python/ folder):
+#   python asset_catalog.py build path/to/catalog.json
+#   python asset_catalog.py search path/to/catalog.json "wooden chair"
+
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # only the indexed AssetCatalog needs NumPy; see SubstringCatalog
+    np = None
+
+import config
+
+INDEX_VERSION = 1
+# Matching tokens in the name count double compared with tags
+FIELD_WEIGHTS = {"name": 2.0, "aliases": 1.5, "tags": 1.0}
+STOPWORDS = {"a", "an", "the", "of", "and", "with", "for", "in", "on", "3d", "model"}
+FUZZY_WEIGHT = 0.9  # multiplied by the trigram similarity of the matched token
+FUZZY_CANDIDATES = 3  # vocabulary tokens a misspelled query token may match
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased alphanumeric tokens without stopwords, with a naive plural 's' removed."""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", str(text).lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# --- Sources ---
+def _normalize(entry: dict, aliases=()) -> dict:
+    tags = entry.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag for tag in re.split(r"[,;]", tags) if tag.strip()]
+    return {
+        "uid": entry.get("uid") or "",
+        "name": entry.get("name") or "",
+        "download_url": entry.get("download_url") or "",
+        "tags": [str(tag).strip() for tag in tags],
+        "aliases": list(dict.fromkeys(list(entry.get("aliases") or []) + list(aliases))),
+    }
+
+
+def entries_from_mapping(mapping: dict) -> list:
+    """Entries of an alias -> entry mapping; aliases of the same download URL are merged into one entry."""
+    merged = {}
+    for alias, entry in mapping.items():
+        key = entry.get("download_url") or entry.get("uid") or alias
+        if key in merged:
+            merged[key]["aliases"].append(alias)
+        else:
+            merged[key] = _normalize(entry, [alias])
+    return list(merged.values())
+
+
+def _load_json(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return entries_from_mapping(data)
+    return (_normalize(entry) for entry in data)
+
+
+def _load_jsonl(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield _normalize(json.loads(line))
+
+
+def _load_sqlite(path: Path):
+    """Rows of a 'models' table with uid, name, download_url and optional tags/aliases columns."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        connection.row_factory = sqlite3.Row
+        for row in connection.execute("SELECT * FROM models"):
+            entry = dict(row)
+            for field in ("tags", "aliases"):
+                value = entry.get(field)
+                if isinstance(value, str) and value.startswith("["):
+                    entry[field] = json.loads(value)
+            if isinstance(entry.get("aliases"), str):
+                entry["aliases"] = [alias.strip() for alias in entry["aliases"].split(",") if alias.strip()]
+            yield _normalize(entry)
+    finally:
+        connection.close()
+
+
+CATALOG_LOADERS = {
+    ".json": _load_json,
+    ".jsonl": _load_jsonl,
+    ".db": _load_sqlite,
+    ".sqlite": _load_sqlite,
+    ".sqlite3": _load_sqlite,
+}
+
+
+# --- Index ---
+class _IndexBuilder:
+    """Collects postings as compact arrays; finish() groups them by token."""
+    def __init__(self):
+        self.token_ids = {}
+        self._tokens = array("I")
+        self._entries = array("I")
+        self._weights = array("f")
+        self._lengths = array("I")
+        self.count = 0
+
+    def add(self, entry: dict):
+        weights = {}
+        length = 0
+        for field, field_weight in FIELD_WEIGHTS.items():
+            values = [entry["name"]] if field == "name" else entry.get(field) or []
+            for value in values:
+                for token in tokenize(value):
+                    weights[token] = max(weights.get(token, 0.0), field_weight)
+                    length += 1
+        for token, weight in weights.items():
+            self._tokens.append(self.token_ids.setdefault(token, len(self.token_ids)))
+            self._entries.append(self.count)
+            self._weights.append(weight)
+        self._lengths.append(max(1, length))
+        self.count += 1
+
+    def finish(self):
+        """Returns (vocabulary in token-id order, starts, entry ids, weights)."""
+        tokens = np.frombuffer(self._tokens, dtype=np.uint32)
+        entries = np.frombuffer(self._entries, dtype=np.uint32)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+        # BM25-style length normalisation (b = 0.5): long entries gain less per matching token
+        norm = 0.5 + 0.5 * lengths / (lengths.mean() if len(lengths) else 1.0)
+        weights = np.frombuffer(self._weights, dtype=np.float32) / norm[entries]
+        order = np.argsort(tokens, kind="stable")
+        counts = np.bincount(tokens, minlength=len(self.token_ids))
+        starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.uint64)
+        vocabulary = sorted(self.token_ids, key=self.token_ids.get)
+        return vocabulary, starts, entries[order].copy(), weights[order].astype(np.float32)
+
+
+class AssetCatalog:
+    """
+    A searchable set of model entries ({uid, name, download_url, tags, aliases}).
+    Use from_entries() for in-memory catalogs and open() for catalog files.
+    """
+    def __init__(self, vocabulary: list, starts, ids, weights, count: int, entry_loader):
+        self._vocabulary = vocabulary
+        self._token_ids = {token: index for index, token in enumerate(vocabulary)}
+        self._starts = starts
+        self._ids = ids
+        self._weights = weights
+        self.count = count
+        self._entry = entry_loader
+        self._trigram_index = None
+        self._trigram_lock = threading.Lock()
+        self._synonyms = {}
+        for group in config.ASSET_CATALOG_SYNONYMS:
+            words = [token for word in group for token in tokenize(word)]
+            for word in words:
+                self._synonyms.setdefault(word, set()).update(w for w in words if w != word)
+
+    @classmethod
+    def from_entries(cls, entries) -> "AssetCatalog":
+        entries = list(entries)
+        builder = _IndexBuilder()
+        for entry in entries:
+            builder.add(entry)
+        vocabulary, starts, ids, weights = builder.finish()
+        return cls(vocabulary, starts, ids, weights, len(entries), entries.__getitem__)
+
+    @classmethod
+    def open(cls, path, index_dir=None) -> "AssetCatalog":
+        """Opens a catalog file, building its index first if it is missing or out of date."""
+        path = Path(path)
+        index_dir = Path(index_dir) if index_dir else path.with_name(path.name + ".index")
+        if not _index_is_current(path, index_dir):
+            build_index(path, index_dir)
+
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        offsets = np.load(index_dir / "entry_offsets.npy", mmap_mode="r")
+        entries_file = open(index_dir / "entries.jsonl", "rb")
+        entries_map = mmap.mmap(entries_file.fileno(), 0, access=mmap.ACCESS_READ) if meta["count"] else b""
+
+        def load_entry(index: int) -> dict:
+            return json.loads(entries_map[int(offsets[index]):int(offsets[index + 1])])
+
+        catalog = cls(
+            meta["vocabulary"],
+            np.load(index_dir / "starts.npy", mmap_mode="r"),
+            np.load(index_dir / "ids.npy", mmap_mode="r"),
+            np.load(index_dir / "weights.npy", mmap_mode="r"),
+            meta["count"],
+            load_entry,
+        )
+        catalog._files = (entries_file, entries_map)  # kept open for the catalog's lifetime
+        return catalog
+
+    def entry(self, index: int) -> dict:
+        return self._entry(index)
+
+    # --- Query expansion ---
+    def _fuzzy(self, token: str) -> list:
+        """Vocabulary tokens sharing enough trigrams with `token`, as (token id, similarity)."""
+        if self._trigram_index is None:
+            with self._trigram_lock:
+                if self._trigram_index is None:
+                    index = {}
+                    for token_id, word in enumerate(self._vocabulary):
+                        for gram in trigrams(word):
+                            index.setdefault(gram, []).append(token_id)
+                    self._trigram_index = index
+        grams = trigrams(token)
+        shared = {}
+        for gram in grams:
+            for token_id in self._trigram_index.get(gram, ()):
+                shared[token_id] = shared.get(token_id, 0) + 1
+        matches = []
+        for token_id, common in shared.items():
+            # Dice coefficient of the two trigram sets
+            similarity = 2.0 * common / (len(grams) + len(trigrams(self._vocabulary[token_id])))
+            if similarity >= config.ASSET_CATALOG_FUZZY_THRESHOLD:
+                matches.append((token_id, similarity))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:FUZZY_CANDIDATES]
+
+    def _expand(self, query: str) -> dict:
+        """Maps token ids to the weight they contribute for `query`."""
+        terms = {}
+
+        def add(token_id, weight):
+            terms[token_id] = max(terms.get(token_id, 0.0), weight)
+
+        for token in dict.fromkeys(tokenize(query)):
+            token_id = self._token_ids.get(token)
+            if token_id is not None:
+                add(token_id, 1.0)
+            else:
+                for fuzzy_id, similarity in self._fuzzy(token):
+                    add(fuzzy_id, FUZZY_WEIGHT * similarity)
+            for synonym in self._synonyms.get(token, ()):
+                synonym_id = self._token_ids.get(synonym)
+                if synonym_id is not None:
+                    add(synonym_id, config.ASSET_CATALOG_SYNONYM_WEIGHT)
+        return terms
+
+    # --- Search ---
+    def search(self, query: str, k: int = None) -> list:
+        """
+        Returns the `k` best-matching entries, best first, each with its 'score'.
+
+        :param query: Free-text description, e.g. "red sports car".
+        :param k: Number of results; defaults to config.ASSET_SEARCH_TOP_K.
+        """
+        k = k or config.ASSET_SEARCH_TOP_K
+        terms = self._expand(query)
+        if not terms or not self.count:
+            return []
+        id_parts, weight_parts = [], []
+        for token_id, term_weight in terms.items():
+            start, end = int(self._starts[token_id]), int(self._starts[token_id + 1])
+            df = end - start
+            idf = math.log(1.0 + (self.count - df + 0.5) / (df + 0.5))
+            id_parts.append(self._ids[start:end])
+            weight_parts.append(self._weights[start:end] * np.float32(idf * term_weight))
+        ids, weights = np.concatenate(id_parts), np.concatenate(weight_parts)
+        if len(ids) * 8 > self.count:
+            # Common words: accumulating over the whole catalog beats sorting the postings
+            scores = np.bincount(ids, weights=weights, minlength=self.count)
+            best = np.argpartition(-scores, min(k, self.count) - 1)[:k]
+            best = best[scores[best] > 0]
+            best_scores = scores[best]
+        else:
+            matched, inverse = np.unique(ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights)
+            top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+            best, best_scores = matched[top], scores[top]
+        order = np.lexsort((best, -best_scores))
+        return [{**self.entry(int(best[i])), "score": round(float(best_scores[i]), 4)} for i in order]
+
+
+class SubstringCatalog:
+    """
+    Pure-Python fallback for hosts without NumPy: the entries whose name or one of
+    whose aliases appears in the query, in catalog order, deduplicated by download URL.
+    """
+    def __init__(self, entries):
+        self._entries = list(entries)
+        self.count = len(self._entries)
+        self._keys = [[key.lower() for key in [entry["name"], *entry["aliases"]] if key]
+                      for entry in self._entries]
+
+    def entry(self, index: int) -> dict:
+        return self._entries[index]
+
+    def search(self, query: str, k: int = None) -> list:
+        k = k or config.ASSET_SEARCH_TOP_K
+        query = str(query).lower()
+        results = []
+        for entry, keys in zip(self._entries, self._keys):
+            matched = [key for key in keys if key in query]
+            if matched:
+                # The share of the query the longest match covers, so more specific matches rank first.
+                score = round(max(len(key) for key in matched) / max(1, len(query)), 4)
+                results.append({**entry, "score": score})
+        results.sort(key=lambda result: -result["score"])
+        return results[:k]
+
+
+def _source_stamp(path: Path) -> dict:
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _index_is_current(path: Path, index_dir: Path) -> bool:
+    try:
+        with open(index_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get("version") == INDEX_VERSION and meta.get("source") == _source_stamp(path)
+
+
+def build_index(path, index_dir=None) -> Path:
+    """Builds the on-disk index of a catalog file into a temp directory, then swaps it into place."""
+    path = Path(path)
+    loader = CATALOG_LOADERS.get(path.suffix.lower())
+    if loader is None:
+        raise ValueError(f"Unsupported catalog format '{path.suffix}'. Supported: {', '.join(CATALOG_LOADERS)}")
+    index_dir = Path(index_dir) if index_dir else path.with_name(path.name + ".index")
+    building = index_dir.with_name(index_dir.name + f".building-{os.getpid()}")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    stamp = _source_stamp(path)
+    builder = _IndexBuilder()
+    offsets = array("Q", [0])
+    with open(building / "entries.jsonl", "wb") as entries_file:
+        for entry in loader(path):
+            line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+            entries_file.write(line)
+            offsets.append(offsets[-1] + len(line))
+            builder.add(entry)
+    vocabulary, starts, ids, weights = builder.finish()
+    np.save(building / "entry_offsets.npy", np.frombuffer(offsets, dtype=np.uint64))
+    np.save(building / "starts.npy", starts)
+    np.save(building / "ids.npy", ids)
+    np.save(building / "weights.npy", weights)
+    with open(building / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "source": stamp, "count": builder.count, "vocabulary": vocabulary}, f)
+
+    # Swap directories; a reader of the old index keeps its open files
+    retired = index_dir.with_name(index_dir.name + f".old-{os.getpid()}")
+    if index_dir.exists():
+        os.replace(index_dir, retired)
+    os.replace(building, index_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+    print(f"ASSET CATALOG: Indexed {builder.count} models ({len(vocabulary)} tokens) from {path}.")
+    return index_dir
+
+
+# --- Shared catalog ---
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_asset_catalog():
+    """
+    Returns the catalog at config.ASSET_CATALOG_PATH, or one built from MOCK_SKETCHFAB_DATABASE.
+    Without NumPy that is a SubstringCatalog of the same entries.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None and np is None:
+                if config.ASSET_CATALOG_PATH:
+                    path = Path(config.ASSET_CATALOG_PATH)
+                    print(f"ASSET CATALOG: NumPy is not installed; searching {path} without an index.")
+                    entries = CATALOG_LOADERS[path.suffix.lower()](path)
+                else:
+                    entries = entries_from_mapping(config.MOCK_SKETCHFAB_DATABASE)
+                _catalog = SubstringCatalog(entries)
+            elif _catalog is None:
+                if config.ASSET_CATALOG_PATH:
+                    _catalog = AssetCatalog.open(config.ASSET_CATALOG_PATH)
+                else:
+                    _catalog = AssetCatalog.from_entries(entries_from_mapping(config.MOCK_SKETCHFAB_DATABASE))
+    return _catalog
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query a model catalog index.")
+    parser.add_argument("command", choices=["build", "search"])
+    parser.add_argument("catalog", help="Catalog file (.json, .jsonl, .db/.sqlite).")
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("-k", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.catalog)
+    else:
+        for result in AssetCatalog.open(args.catalog).search(args.query, args.k):
+            print(f"{result['score']:>8.3f}  {result['name']}  {result['download_url']}")
@@ -0,0 +1,208 @@
+# bench_agent_replay.py
+#
+# Benchmarks the agent end to end on canonical prompts, offline and
+# deterministically, by replaying recorded sessions (see recorder.py).
+#   record: runs every prompt once against the configured OpenAI, Unity and
+#           model hosts (or, with --standins, against scripted local stand-ins)
+#           and writes one cassette per prompt to --cassettes (by default
+#           ~/.cache/vlm_scene_architect/cassettes, outside the source tree)
+#   replay: runs every prompt against its cassette, --repeat times, with the
+#           recorded latency scaled by --latency (0 = instant)
+# Each run is a separate process with empty asset, vision and plan caches, so a
+# replay makes the same requests its recording did. Reported per prompt:
+# agent turns, tool calls, wall time, prompt/completion tokens, the
+# verification outcome and requests the cassette could not answer.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_agent_replay.py record               # live GPT-4o, Unity and downloads
+#   python benchmarks/bench_agent_replay.py record --standins    # scripted stand-ins, no network
+#   python benchmarks/bench_agent_replay.py replay --repeat 5
+#   python benchmarks/bench_agent_replay.py replay --latency 1 --only fox_tree
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The two examples from the agent's system prompt, plus what they should produce.
+PROMPTS = {
+    "fox_tree": "Create a scene with a fox next to a tree.",
+    "robot_target": "Create a blue robot, a yellow target and a red obstacle between them, "
+                    "then simulate the robot driving to the target.",
+}
+DEFAULT_CASSETTES = os.path.join(os.path.expanduser("~"), ".cache", "vlm_scene_architect", "cassettes")
+
+
+# --- Scripted stand-in sessions ---
+def _call(index: int, name: str, **arguments) -> dict:
+    return {"id": f"call_{index}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def _last_tool_result(body: dict, name_field: str):
+    for message in reversed(body["messages"]):
+        if message.get("role") == "tool" and name_field in (message.get("content") or ""):
+            return json.loads(message["content"])
+    return {}
+
+
+def scripted_turns(name: str, files_url: str) -> list:
+    """What a well-behaved model does for each prompt: callables (request body) -> assistant message."""
+    brown = {"r": 0.55, "g": 0.3, "b": 0.1}
+    if name == "fox_tree":
+        return [
+            lambda body: {"content": "I'll find a fox model first.", "tool_calls": [_call(1, "search_web_for_3d_model", query="fox")]},
+            lambda body: {"content": "Importing it.", "tool_calls": [_call(2, "download_and_import_model", model_name="low_poly_fox",
+                                                                           download_url=f"{files_url}/low_poly_fox.glb")]},
+            lambda body: {"content": "Placing the fox and a tree trunk.", "tool_calls": [
+                _call(3, "spawn_object", object_name=_last_tool_result(body, "model_filename").get("model_filename", "low_poly_fox.glb"),
+                      position={"x": 0, "y": 0, "z": 0}),
+                _call(4, "spawn_object", object_name="cylinder", position={"x": 2, "y": 0, "z": 0},
+                      scale={"x": 1, "y": 5, "z": 1}, color=brown)]},
+            lambda body: {"content": "Checking the result.", "tool_calls": [
+                _call(5, "capture_and_analyze_scene", analysis_prompt="Describe all objects, their colors and positions.")]},
+            lambda body: {"content": "The fox is standing next to a tree."},
+        ]
+    return [
+        lambda body: {"content": "Building the scene.", "tool_calls": [
+            _call(1, "clear_scene"),
+            _call(2, "spawn_object", object_name="cube", position={"x": 0, "y": 0, "z": 0}, color={"r": 0, "g": 0, "b": 1}),
+            _call(3, "spawn_object", object_name="sphere", position={"x": 5, "y": 0, "z": 0},
+                  scale={"x": 1.5, "y": 1.5, "z": 1.5}, color={"r": 1, "g": 1, "b": 0}),
+            _call(4, "spawn_object", object_name="cylinder", position={"x": 2.5, "y": 0, "z": 0},
+                  scale={"x": 1, "y": 3, "z": 1}, color={"r": 1, "g": 0, "b": 0})]},
+        lambda body: {"content": "Running the simulation.", "tool_calls": [
+            _call(5, "run_simulation_and_get_results", robot_name="Primitive_cube", target_name="Primitive_sphere", duration=5.0)]},
+        lambda body: {"content": "The blue robot reached the yellow target."},
+    ]
+
+
+def scripted_responder(name: str, files_url: str):
+    turns = scripted_turns(name, files_url)
+
+    def respond(body: dict) -> dict:
+        if not body.get("tools"):
+            # Vision: answer the verifier's numbered questions, describe anything else.
+            question = json.dumps(body["messages"][-1]["content"])
+            count = sum(1 for number in range(1, 10) if f"\\n{number}. " in question)
+            if count:
+                return {"content": "\n".join(f"{number}. yes" for number in range(1, count + 1))}
+            return {"content": "A low-poly fox stands next to a tall brown tree trunk on a flat ground."}
+        turn = sum(1 for message in body["messages"] if message.get("role") == "assistant")
+        return turns[min(turn, len(turns) - 1)](body)
+
+    return respond
+
+
+# --- One run (child process) ---
+def run_once(args):
+    """Runs one prompt in this process and prints a RESULT line with its metrics."""
+    work = Path(tempfile.mkdtemp(prefix="agent-bench-"))
+    os.environ.update({
+        "ASSET_CACHE_DIR": str(work / "asset-cache"),
+        "PLAN_CACHE_PATH": str(work / "plan_cache.json"),
+        "UNITY_ASSETS_PATH": str(work / "Assets"),
+        "RECORDER_MODE": args.mode,
+        "RECORDER_CASSETTE": args.cassette,
+        "RECORDER_LATENCY": str(args.latency),
+    })
+    if args.standins or args.mode == "replay":
+        os.environ.setdefault("OPENAI_API_KEY", "sk-standin")
+    (work / "Assets").mkdir()
+
+    import config
+    config.LOG_UNITY_API_CALLS = False
+    standins = []
+    if args.standins:
+        from standins import UnityStandIn, OpenAIStandIn, FileServerStandIn
+        from bench_glb_optimizer import make_textured_glb
+        files = FileServerStandIn({"/low_poly_fox.glb": make_textured_glb(60, 512)}).start()
+        unity = UnityStandIn(frame_time=0.02, job_time_scale=0.1).start()
+        openai = OpenAIStandIn(responder=scripted_responder(args.run, files.url), latency=0.05, stream_delay=0.005).start()
+        standins = [files, unity, openai]
+        config.UNITY_API_URL, config.UNITY_API_URLS, config.OPENAI_BASE_URL = unity.url, [unity.url], openai.url
+
+    import recorder
+    from agent import AutonomousAgent
+
+    agent = AutonomousAgent()
+    start = time.perf_counter()
+    lines = list(agent.run(PROMPTS[args.run]))
+    wall = time.perf_counter() - start
+    for standin in standins:
+        standin.stop()
+
+    summary = agent.trace.summary()
+    llm = summary["by_category"].get("llm", {})
+    verdicts = [line for line in lines if "VERIFICATION PASSED" in line or "VERIFICATION FAILED" in line
+                or line.startswith("ITERATION LIMIT")]
+    result = {
+        "turns": summary["by_name"].get("llm chat", {}).get("count", 0),
+        "tool_calls": summary["by_category"].get("tool", {}).get("count", 0),
+        "wall": wall,
+        "prompt_tokens": llm.get("prompt_tokens", 0),
+        "completion_tokens": llm.get("completion_tokens", 0),
+        "verified": "PASSED" in verdicts[-1] if verdicts else None,
+        "recorder": recorder.get_recorder().summary(),
+        "answer": next((line for line in reversed(lines) if line.startswith("AGENT:")), ""),
+    }
+    recorder.get_recorder().close()
+    print("RESULT " + json.dumps(result))
+
+
+def run_child(name: str, mode: str, cassette: Path, latency: float, standins: bool) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), mode, "--run", name, "--cassette", str(cassette),
+               "--latency", str(latency)] + (["--standins"] if standins else [])
+    completed = subprocess.run(command, capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    for line in completed.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"{name} ({mode}) failed:\n{completed.stdout[-2000:]}\n{completed.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay agent sessions for offline benchmarking.")
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("--cassettes", default=DEFAULT_CASSETTES, help="Folder holding one <prompt>.jsonl cassette per prompt.")
+    parser.add_argument("--only", help="Comma-separated prompt names (default: all of " + ", ".join(PROMPTS) + ").")
+    parser.add_argument("--standins", action="store_true", help="Record against scripted local stand-ins instead of live services.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Replay latency as a multiple of the recorded one.")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays per prompt.")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--cassette", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_once(args)
+        return
+
+    names = args.only.split(",") if args.only else list(PROMPTS)
+    folder = Path(args.cassettes)
+    repeat = 1 if args.mode == "record" else args.repeat
+    print(f"{args.mode} ({'stand-ins' if args.standins else 'live' if args.mode == 'record' else f'latency x{args.latency:g}'}), "
+          f"cassettes in {folder}")
+    print(f"{'prompt':<14} {'turns':>5} {'tools':>5} {'wall s':>8} {'min s':>7} {'prompt tok':>10} {'compl tok':>9} "
+          f"{'verified':>8} {'missed':>6}")
+    for name in names:
+        cassette = folder / f"{name}.jsonl"
+        if args.mode == "replay" and not cassette.exists():
+            print(f"{name:<14} no cassette; record it first (e.g. 'record --standins')")
+            continue
+        runs = [run_child(name, args.mode, cassette, args.latency, args.standins) for _ in range(repeat)]
+        first = runs[0]
+        missed = max(run["recorder"].get("missed", 0) for run in runs)
+        print(f"{name:<14} {first['turns']:>5} {first['tool_calls']:>5} {statistics.median(r['wall'] for r in runs):>8.3f} "
+              f"{min(r['wall'] for r in runs):>7.3f} {first['prompt_tokens']:>10} {first['completion_tokens']:>9} "
+              f"{str(first['verified']):>8} {missed:>6}")
+        if len({(r['turns'], r['tool_calls'], r['prompt_tokens'], r['answer']) for r in runs}) > 1:
+            print(f"{'':<14} runs differ: {[(r['turns'], r['tool_calls'], r['prompt_tokens']) for r in runs]}")
+
+
+if __name__ == "__main__":
+    main()
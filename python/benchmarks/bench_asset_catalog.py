@@ -0,0 +1,104 @@
+# bench_asset_catalog.py
+#
+# Query latency of the indexed model catalog (asset_catalog.py) on synthetic
+# catalogs, against the linear substring scan search_web_for_3d_model used to do.
+# For each size it reports the one-off index build, opening the memory-mapped
+# index, and p50/p95 latency for exact, multi-word, misspelled and synonym queries.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_asset_catalog.py --sizes 10000,100000,1000000
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_catalog import AssetCatalog, build_index
+
+ADJECTIVES = ["red", "blue", "green", "wooden", "metal", "rusty", "ancient", "modern", "low", "poly", "stylized",
+              "realistic", "broken", "shiny", "small", "giant", "cartoon", "medieval", "futuristic", "golden"]
+NOUNS = ["fox", "chair", "table", "lantern", "bottle", "car", "tree", "rock", "house", "robot", "sword", "shield",
+         "barrel", "crate", "lamp", "sofa", "mug", "boat", "bridge", "tower", "dragon", "horse", "bench", "fence",
+         "door", "window", "statue", "fountain", "truck", "plane"]
+QUERIES = {
+    "exact": ["fox", "lantern", "dragon", "bench"],
+    "multi-word": ["rusty metal barrel", "wooden medieval chair", "low poly red car", "giant golden statue"],
+    "misspelled": ["lanturn", "draggon", "barel", "fountian"],
+    "synonym": ["couch", "automobile", "stone", "droid"],
+}
+
+
+def write_catalog(path: str, count: int, seed: int = 11):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            noun = rng.choice(NOUNS)
+            words = rng.sample(ADJECTIVES, 2) + [noun]
+            f.write(json.dumps({
+                "uid": f"{i:08x}",
+                "name": " ".join(word.title() for word in words) + f" {i % 97}",
+                "download_url": f"https://models.example/{i:08x}.glb",
+                "tags": [noun, rng.choice(ADJECTIVES), f"pack{i % 500}"],
+            }) + "\n")
+
+
+def linear_scan(entries: list, query: str) -> list:
+    query = query.lower()
+    return [entry for entry in entries if query in entry["name"].lower() or any(query in tag for tag in entry["tags"])][:5]
+
+
+def percentiles(samples: list) -> tuple:
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed catalog search.")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated catalog sizes.")
+    parser.add_argument("--repeat", type=int, default=25, help="Runs of each query.")
+    parser.add_argument("--dir", default=None, help="Where to write the catalogs (default: a temp dir).")
+    args = parser.parse_args()
+
+    work = args.dir or tempfile.mkdtemp(prefix="catalog-bench-")
+    os.makedirs(work, exist_ok=True)
+    print(f"{'entries':>9} {'build s':>8} {'open ms':>8} {'query type':>11} {'p50 ms':>8} {'p95 ms':>8} {'scan ms':>9}")
+    for size in (int(n) for n in args.sizes.split(",")):
+        path = os.path.join(work, f"catalog_{size}.jsonl")
+        write_catalog(path, size)
+        start = time.perf_counter()
+        build_index(path)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        catalog = AssetCatalog.open(path)
+        opened = (time.perf_counter() - start) * 1e3
+
+        with open(path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        start = time.perf_counter()
+        for query in QUERIES["exact"]:
+            linear_scan(entries, query)
+        scan = (time.perf_counter() - start) / len(QUERIES["exact"]) * 1e3
+        del entries
+
+        for kind, queries in QUERIES.items():
+            catalog.search(queries[0])  # first fuzzy query builds the trigram index
+            samples = []
+            for _ in range(args.repeat):
+                for query in queries:
+                    start = time.perf_counter()
+                    if not catalog.search(query):
+                        raise RuntimeError(f"No results for '{query}'")
+                    samples.append((time.perf_counter() - start) * 1e3)
+            p50, p95 = percentiles(samples)
+            scan_column = f"{scan:>9.2f}" if kind == "exact" else f"{'':>9}"
+            print(f"{size:>9} {build:>8.2f} {opened:>8.1f} {kind:>11} {p50:>8.2f} {p95:>8.2f} {scan_column}")
+
+
+if __name__ == "__main__":
+    main()
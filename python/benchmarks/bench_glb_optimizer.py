@@ -0,0 +1,127 @@
+# bench_glb_optimizer.py
+#
+# Runs glb_optimizer.py on synthetic models (a dense, textured height-field mesh)
+# and reports file size, triangle count, texture pixels and optimization time
+# for a few texture limits and triangle budgets. Every output is re-parsed to
+# check that its accessors stay in range of its BIN chunk and index valid vertices.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_glb_optimizer.py --grid 400 --texture 4096
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glb_optimizer
+from glb_optimizer import COMPONENT_DTYPES, TYPE_SIZES, read_glb, write_glb
+
+
+def make_textured_glb(grid: int, texture_size: int, seed: int = 3) -> bytes:
+    """A grid x grid quad height field (2 * grid^2 triangles) with POSITION/NORMAL/TEXCOORD_0 and one PNG texture."""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    u, v = np.meshgrid(np.linspace(0, 1, grid + 1), np.linspace(0, 1, grid + 1))
+    height = 0.1 * np.sin(u * 12) * np.cos(v * 9)
+    positions = np.stack([u * 10, height, v * 10], axis=-1).reshape(-1, 3).astype(np.float32)
+    normals = np.tile(np.array([0, 1, 0], dtype=np.float32), (len(positions), 1))
+    uvs = np.stack([u, v], axis=-1).reshape(-1, 2).astype(np.float32)
+    corner = (np.arange(grid)[:, None] * (grid + 1) + np.arange(grid)[None, :]).reshape(-1)
+    quads = np.stack([corner, corner + grid + 1, corner + 1, corner + 1, corner + grid + 1, corner + grid + 2], axis=-1)
+    indices = quads.reshape(-1).astype(np.uint32)
+
+    pixels = rng.integers(0, 40, (texture_size, texture_size, 3), dtype=np.uint8)
+    pixels += np.linspace(0, 200, texture_size, dtype=np.uint8)[None, :, None]
+    png = io.BytesIO()
+    Image.fromarray(pixels).save(png, format="PNG")
+
+    blobs = [positions.tobytes(), normals.tobytes(), uvs.tobytes(), indices.tobytes(), png.getvalue()]
+    views, offset = [], 0
+    for blob in blobs:
+        views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(blob)})
+        offset += len(blob) + (-len(blob) % 4)
+    binary = b"".join(blob + b"\x00" * (-len(blob) % 4) for blob in blobs)
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2}, "indices": 3, "material": 0}]}],
+        "materials": [{"pbrMetallicRoughness": {"baseColorTexture": {"index": 0}}}],
+        "textures": [{"source": 0}],
+        "images": [{"bufferView": 4, "mimeType": "image/png"}],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3",
+             "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()},
+            {"bufferView": 1, "componentType": 5126, "count": len(normals), "type": "VEC3"},
+            {"bufferView": 2, "componentType": 5126, "count": len(uvs), "type": "VEC2"},
+            {"bufferView": 3, "componentType": 5125, "count": len(indices), "type": "SCALAR"},
+        ],
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(binary)}],
+    }
+    return write_glb(gltf, binary)
+
+
+def check_glb(data: bytes) -> str:
+    """Returns None if every accessor fits its bufferView and indices address existing vertices."""
+    gltf, binary = read_glb(data)
+    views = gltf.get("bufferViews", [])
+    for view in views:
+        if view.get("byteOffset", 0) + view["byteLength"] > len(binary):
+            return "bufferView past the end of BIN"
+    for accessor in gltf.get("accessors", []):
+        size = COMPONENT_DTYPES[accessor["componentType"]].itemsize * TYPE_SIZES.get(accessor["type"], 16)
+        if accessor.get("byteOffset", 0) + accessor["count"] * size > views[accessor["bufferView"]]["byteLength"]:
+            return "accessor past the end of its bufferView"
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            indices = gltf["accessors"][primitive["indices"]]
+            view = views[indices["bufferView"]]
+            values = np.frombuffer(binary, COMPONENT_DTYPES[indices["componentType"]], indices["count"], view.get("byteOffset", 0))
+            if len(values) and values.max() >= gltf["accessors"][primitive["attributes"]["POSITION"]]["count"]:
+                return "index out of range"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GLB texture/mesh optimization pass.")
+    parser.add_argument("--grid", type=int, default=400, help="Quads per side of the synthetic mesh.")
+    parser.add_argument("--texture", type=int, default=4096, help="Texture side in pixels.")
+    parser.add_argument("--budgets", default="none,50000,5000", help="Comma-separated triangle budgets ('none' skips decimation).")
+    parser.add_argument("--max-textures", default="1024,512", help="Comma-separated texture limits.")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="glb-bench-"))
+    source = work / "model.glb"
+    start = time.perf_counter()
+    source.write_bytes(make_textured_glb(args.grid, args.texture))
+    print(f"Synthetic model: {source.stat().st_size / 1e6:.1f} MB, {2 * args.grid ** 2} triangles, "
+          f"{args.texture}px texture (built in {time.perf_counter() - start:.1f}s)")
+
+    print(f"{'max tex':>8} {'budget':>8} {'MB':>7} {'triangles':>10} {'tex px':>10} {'seconds':>8} {'valid':>6}")
+    for max_texture in (int(n) for n in args.max_textures.split(",")):
+        for budget_text in args.budgets.split(","):
+            budget = None if budget_text == "none" else int(budget_text)
+            output = work / f"model_{max_texture}_{budget_text}.glb"
+            # triangle_budget=0 (falsy) turns decimation off without falling back to the config default.
+            result = glb_optimizer.optimize_glb(source, output, max_texture_size=max_texture,
+                                                triangle_budget=budget or 0, force=True)
+            if not result["success"]:
+                raise RuntimeError(result["error"])
+            stats = result["stats"]
+            problem = check_glb(output.read_bytes())
+            print(f"{max_texture:>8} {budget_text:>8} {stats['bytes_after'] / 1e6:>7.2f} {stats['triangles_after']:>10} "
+                  f"{stats['texture_pixels_after']:>10} {stats['seconds']:>8.2f} {problem or 'yes':>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench_scene_queries.py
+#
+# Compares answering get_object_position / list_all_objects with an HTTP call
+# to Unity per query against the local scene mirror (scene_state.py), using
+# the stand-in Unity server. --frame-time emulates the wait for Unity's next
+# Update() drain, which every queued request pays.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_scene_queries.py --objects 200 --queries 500 --frame-time 0.016
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from standins import UnityStandIn
+
+
+def run_queries(tools, names: list, queries: int) -> float:
+    start = time.perf_counter()
+    for i in range(queries):
+        if i % 10 == 9:
+            result = tools.list_all_objects()
+        else:
+            result = tools.get_object_position(names[i % len(names)])
+        if not result["success"]:
+            raise RuntimeError(f"Query failed: {result}")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scene queries against Unity versus the local mirror.")
+    parser.add_argument("--objects", type=int, default=200, help="Objects in the scene.")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per mode (every tenth lists all objects).")
+    parser.add_argument("--frame-time", type=float, default=0.016, help="Emulated Unity Update() latency in seconds.")
+    args = parser.parse_args()
+
+    config.LOG_UNITY_API_CALLS = False
+    with UnityStandIn(frame_time=args.frame_time) as server:
+        config.UNITY_API_URL = server.url
+        import tools
+        from scene_state import get_scene_mirror
+
+        tools.clear_scene()
+        shapes = ["cube", "sphere", "cylinder", "capsule"]
+        tools.spawn_objects([
+            {"object_name": shapes[i % len(shapes)], "position": {"x": float(i % 20), "y": 0.0, "z": float(i // 20)}}
+            for i in range(args.objects)
+        ])
+        # Substring queries, as the agent issues them ("cube" matches "Primitive_cube").
+        names = shapes + ["primitive_"]
+
+        # Printing one line per query would dominate the timings.
+        print(f"Stand-in Unity server: {server.url}  (frame time {args.frame_time * 1e3:.0f} ms, {args.objects} objects)")
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            config.SCENE_MIRROR_ENABLED = False
+            before = server.request_count
+            direct = run_queries(tools, names, args.queries)
+            direct_requests = server.request_count - before
+
+            config.SCENE_MIRROR_ENABLED = True
+            before = server.request_count
+            mirrored = run_queries(tools, names, args.queries)
+            mirrored_requests = server.request_count - before
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        print(f"{'mode':>8} {'total s':>9} {'per query us':>13} {'requests':>9}")
+        print(f"{'unity':>8} {direct:>9.3f} {direct / args.queries * 1e6:>13.1f} {direct_requests:>9}")
+        print(f"{'mirror':>8} {mirrored:>9.3f} {mirrored / args.queries * 1e6:>13.1f} {mirrored_requests:>9}")
+        print(f"Mirror stats: {get_scene_mirror().stats}")
+
+
+if __name__ == "__main__":
+    main()
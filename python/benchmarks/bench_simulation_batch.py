@@ -0,0 +1,96 @@
+# bench_simulation_batch.py
+#
+# Sweeps robot start positions and speeds towards one target and compares:
+#   - real time: what one run_simulation_and_get_results call per episode costs,
+#     since SimulationCoroutine runs each episode frame by frame in real time
+#   - run_simulation_batch through the stand-in Unity server (one request + job)
+#   - the NumPy reference in simulation.py, called directly
+# It also checks the reference against a plain per-episode Python loop of the same policy.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_simulation_batch.py --episodes 100,1000,10000
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import simulation
+from standins import UnityStandIn
+
+
+def make_episodes(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "start": {"x": rng.uniform(-40, 40), "y": 0.0, "z": rng.uniform(-40, 40)},
+            "target": {"x": 0.0, "y": 0.0, "z": 0.0},
+            "speed": rng.choice([2.0, 3.5, 5.0]),
+            "duration": 10.0,
+        }
+        for _ in range(count)
+    ]
+
+
+def scalar_episode(episode: dict, timestep: float) -> tuple:
+    """One episode, one step at a time, written as SimulationCoroutine reads."""
+    position = [episode["start"][axis] for axis in "xyz"]
+    target = [episode["target"][axis] for axis in "xyz"]
+    travelled = 0.0
+    for step in range(1, simulation.step_count(episode["duration"], timestep) + 1):
+        distance = math.dist(position, target)
+        moved = min(distance, episode["speed"] * timestep)
+        if distance > 0:
+            position = [p + (t - p) * moved / distance for p, t in zip(position, target)]
+        travelled += moved
+        if math.dist(position, target) < 1.0:
+            return True, step * timestep, travelled
+    return False, None, travelled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched robot/target simulation sweeps.")
+    parser.add_argument("--episodes", default="100,1000,10000", help="Comma-separated sweep sizes.")
+    parser.add_argument("--timestep", type=float, default=simulation.DEFAULT_TIMESTEP)
+    args = parser.parse_args()
+
+    config.LOG_UNITY_API_CALLS = False
+    with UnityStandIn() as server:
+        config.UNITY_API_URL = server.url
+        import tools
+
+        print(f"{'episodes':>9} {'real time s':>12} {'batch tool s':>13} {'reference s':>12} {'scalar s':>9} {'success':>8} {'agree':>6}")
+        for count in (int(n) for n in args.episodes.split(",")):
+            episodes = make_episodes(count)
+
+            start = time.perf_counter()
+            result = tools.run_simulation_batch(episodes, args.timestep)
+            batched = time.perf_counter() - start
+            if not result["success"]:
+                raise RuntimeError(f"Batch simulation failed: {result}")
+            # One real-time episode lasts until the robot arrives or the duration runs out.
+            real_time = sum(item["time_to_target"] or episode["duration"] for item, episode in zip(result["results"], episodes))
+
+            start = time.perf_counter()
+            reference = simulation.run_batch(episodes, args.timestep)
+            vectorized = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scalar = [scalar_episode(episode, args.timestep) for episode in episodes]
+            looped = time.perf_counter() - start
+            agree = all(
+                item["success"] == ok and math.isclose(item["path_length"], travelled, abs_tol=1e-3)
+                for item, (ok, _, travelled) in zip(reference["episodes"], scalar)
+            )
+
+            print(f"{count:>9} {real_time:>12.1f} {batched:>13.3f} {vectorized:>12.3f} {looped:>9.3f} "
+                  f"{result['success_rate']:>8.2f} {'yes' if agree else 'NO':>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench_spawn_batch.py
+#
+# Compares building a scene with one spawn_object call per object against a
+# single spawn_objects batch, using the stand-in Unity server. --frame-time
+# emulates the wait for Unity's next Update() drain on every request.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_spawn_batch.py --objects 20,50,200 --frame-time 0.016
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from standins import UnityStandIn
+
+
+def make_objects(count: int) -> list:
+    shapes = ["cube", "sphere", "cylinder", "capsule"]
+    return [
+        {
+            "object_name": shapes[i % len(shapes)],
+            "position": {"x": float(i % 10), "y": 0.0, "z": float(i // 10)},
+            "scale": {"x": 1.0, "y": 1.0, "z": 1.0},
+            "color": {"r": (i % 3) / 2.0, "g": 0.5, "b": 1.0 - (i % 3) / 2.0},
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched versus per-object spawning.")
+    parser.add_argument("--objects", default="20,50,200", help="Comma-separated scene sizes.")
+    parser.add_argument("--frame-time", type=float, default=0.016, help="Emulated Unity Update() latency in seconds.")
+    args = parser.parse_args()
+
+    config.LOG_UNITY_API_CALLS = False
+    with UnityStandIn(frame_time=args.frame_time) as server:
+        config.UNITY_API_URL = server.url
+        import tools
+
+        print(f"Stand-in Unity server: {server.url}  (frame time {args.frame_time * 1e3:.0f} ms)")
+        print(f"{'objects':>8} {'per-object s':>13} {'batch s':>9} {'speed-up':>9} {'requests':>9}")
+        for count in (int(n) for n in args.objects.split(",")):
+            objects = make_objects(count)
+
+            tools.clear_scene()
+            start = time.perf_counter()
+            for item in objects:
+                tools.spawn_object(**item)
+            single = time.perf_counter() - start
+
+            tools.clear_scene()
+            before = server.request_count
+            start = time.perf_counter()
+            result = tools.spawn_objects(objects)
+            batched = time.perf_counter() - start
+            if not result["success"]:
+                raise RuntimeError(f"Batch spawn failed: {result}")
+
+            print(f"{count:>8} {single:>13.3f} {batched:>9.3f} {single / batched:>8.1f}x {server.request_count - before:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# bench_startup.py
+#
+# Measures how long the agent server's modules take to import, from
+# `python -X importtime` reports of fresh interpreters, and which heavy or
+# optional dependencies each of them pulls in eagerly. main must be able to
+# accept connections without GUI automation, NumPy, Pillow or the OpenAI SDK;
+# tools and agent import them on a tool's first use.
+#   - per module: median and best cumulative import time over --repeat runs,
+#     plus wall time of the whole process (interpreter startup included)
+#   - the top-level packages that cost the most, by self time
+#   - --budget-ms and --strict exit non-zero on a slow or eager import,
+#     so the benchmark can guard against regressions
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --modules main,tools --repeat 10 --top 15
+#   python benchmarks/bench_startup.py --budget-ms 400 --strict
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported just to start the server or load the tools.
+HEAVY_MODULES = ("pyautogui", "numpy", "PIL", "openai", "httpx")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def import_report(module: str) -> dict:
+    """Imports `module` in a fresh interpreter; returns its importtime entries and the process wall time."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-startup-bench")
+    env.setdefault("PLAN_CACHE_PATH", "")
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=PYTHON_DIR, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    entries = []  # (name, self_us, cumulative_us)
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us)))
+    return {"entries": entries, "wall": wall}
+
+
+def summarize(module: str, reports: list, top: int) -> dict:
+    cumulative = []
+    for report in reports:
+        # Not by depth: importtime's nesting is shared by all threads, and importing
+        # main starts the Unity health-check thread, which imports modules of its own.
+        cumulative.append(max(c for name, _, c in report["entries"] if name == module) / 1e3)
+    # Self time per top-level package, from the median run.
+    median_run = sorted(reports, key=lambda r: sum(e[1] for e in r["entries"]))[len(reports) // 2]
+    by_package = defaultdict(int)
+    for name, self_us, _ in median_run["entries"]:
+        by_package[name.split(".")[0]] += self_us
+    imported = {name.split(".")[0] for name, _, _ in median_run["entries"]}
+    return {
+        "module": module,
+        "median_ms": statistics.median(cumulative),
+        "best_ms": min(cumulative),
+        "wall_ms": statistics.median(r["wall"] for r in reports) * 1e3,
+        "modules": len(median_run["entries"]),
+        "heavy": [name for name in HEAVY_MODULES if name in imported],
+        "top": sorted(by_package.items(), key=lambda item: -item[1])[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the agent server's modules.")
+    parser.add_argument("--modules", default="main,agent,tools", help="Comma-separated modules to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--top", type=int, default=8, help="Most expensive packages listed per module.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if a module's median import time exceeds this.")
+    parser.add_argument("--strict", action="store_true", help=f"Fail if a module imports any of {', '.join(HEAVY_MODULES)}.")
+    args = parser.parse_args()
+
+    baseline = statistics.median(import_report("sys")["wall"] for _ in range(args.repeat)) * 1e3
+    print(f"interpreter startup (python -c 'import sys'): {baseline:.1f} ms wall")
+    print(f"{'module':<10} {'median ms':>10} {'best ms':>9} {'wall ms':>9} {'modules':>8}  eager heavy imports")
+    summaries = []
+    for module in args.modules.split(","):
+        summary = summarize(module, [import_report(module) for _ in range(args.repeat)], args.top)
+        summaries.append(summary)
+        print(f"{module:<10} {summary['median_ms']:>10.1f} {summary['best_ms']:>9.1f} {summary['wall_ms']:>9.1f} "
+              f"{summary['modules']:>8}  {', '.join(summary['heavy']) or '-'}")
+
+    for summary in summaries:
+        packages = ", ".join(f"{name} {self_us / 1e3:.1f}" for name, self_us in summary["top"])
+        print(f"\n{summary['module']}: slowest packages by self time (ms): {packages}")
+
+    problems = []
+    for summary in summaries:
+        if args.budget_ms is not None and summary["median_ms"] > args.budget_ms:
+            problems.append(f"{summary['module']} takes {summary['median_ms']:.1f} ms to import (budget {args.budget_ms:.0f} ms)")
+        if args.strict and summary["heavy"]:
+            problems.append(f"{summary['module']} imports {', '.join(summary['heavy'])} eagerly")
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench_unity_client.py
+#
+# Compares the Unity transports in unity_client.UnityClient ("curl", "close",
+# "pooled") against a local stand-in of the Unity HTTP server.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_unity_client.py --requests 200
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from standins import UnityStandIn
+from unity_client import UnityClient
+
+
+def run_mode(url: str, mode: str, count: int) -> list:
+    client = UnityClient(base_url=url, mode=mode)
+    payload = {
+        "object_name": "cube",
+        "position": {"x": 0.0, "y": 0.0, "z": 0.0},
+        "scale": {"x": 1.0, "y": 1.0, "z": 1.0},
+    }
+    timings = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            result = client.request("spawn", payload)
+            timings.append(time.perf_counter() - start)
+            if not result["success"]:
+                raise RuntimeError(f"{mode}: {result['error']}")
+    finally:
+        client.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Unity client transports.")
+    parser.add_argument("--requests", type=int, default=200, help="Commands sent per mode.")
+    parser.add_argument("--frame-time", type=float, default=0.0, help="Emulated Unity Update() latency in seconds.")
+    parser.add_argument("--modes", default="curl,close,pooled")
+    args = parser.parse_args()
+
+    # Keep the per-request logging out of the measurements.
+    config.LOG_UNITY_API_CALLS = False
+
+    with UnityStandIn(frame_time=args.frame_time) as server:
+        print(f"Stand-in Unity server: {server.url}  ({args.requests} spawn commands per mode)")
+        print(f"{'mode':<8} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for mode in args.modes.split(","):
+            timings = run_mode(server.url, mode, args.requests)
+            ordered = sorted(timings)
+            p95 = ordered[int(0.95 * (len(ordered) - 1))]
+            print(f"{mode:<8} {sum(timings):>9.3f} {statistics.mean(timings) * 1e3:>9.3f} "
+                  f"{statistics.median(timings) * 1e3:>9.3f} {p95 * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench_vision_presets.py
+#
+# Compares the image presets in config.VISION_IMAGE_PRESETS: upload size,
+# preprocessing time and end-to-end vision latency (preprocess + base64 +
+# chat completion) against the stand-in OpenAI server, whose upload time is
+# emulated from --bandwidth. Use --live to time the real API instead.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/bench_vision_presets.py --width 1920 --height 1080
+#   python benchmarks/bench_vision_presets.py --image my_capture.png --live
+
+import argparse
+import base64
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from image_pipeline import prepare_image
+from standins import UnityStandIn
+from standins.openai_server import OpenAIStandIn
+
+
+def synthetic_frame(width: int, height: int) -> bytes:
+    """A stand-in render with a few objects and sensor-like noise, so PNG does not compress it unrealistically well."""
+    from PIL import Image
+
+    unity = UnityStandIn()
+    try:
+        unity.objects = [
+            {"name": "Primitive_cube", "position": {"x": -4, "y": 0, "z": 0}, "scale": {"x": 1, "y": 1, "z": 1}, "color": {"r": 0, "g": 0, "b": 1}},
+            {"name": "Primitive_sphere", "position": {"x": 3, "y": 0, "z": 0}, "scale": {"x": 1.5, "y": 1.5, "z": 1.5}, "color": {"r": 1, "g": 1, "b": 0}},
+            {"name": "Primitive_cylinder", "position": {"x": 0, "y": 0, "z": 2}, "scale": {"x": 1, "y": 3, "z": 1}, "color": {"r": 1, "g": 0, "b": 0}},
+        ]
+        frame = Image.open(io.BytesIO(unity.render_frame(width, height))).convert("RGB")
+    finally:
+        unity.stop()
+    noise = Image.effect_noise((width, height), 24).convert("RGB")
+    buffer = io.BytesIO()
+    Image.blend(frame, noise, 0.15).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def analyze(client, image_bytes: bytes, preset: str):
+    start = time.perf_counter()
+    upload = prepare_image(image_bytes, "image/png", preset)
+    prepared = time.perf_counter()
+    encoded = base64.b64encode(upload["image_bytes"]).decode("utf-8")
+    client.chat.completions.create(
+        model=config.OPENAI_MODEL,
+        messages=[{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "Describe all objects in this scene."},
+                {"type": "image_url", "image_url": {"url": f"data:{upload['mime_type']};base64,{encoded}", "detail": upload["detail"]}},
+            ],
+        }],
+        max_tokens=300,
+    )
+    done = time.perf_counter()
+    return upload["stats"], prepared - start, done - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vision upload presets.")
+    parser.add_argument("--image", help="PNG capture to use instead of a synthetic frame.")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--bandwidth", type=float, default=2e6, help="Emulated upload bytes per second for the stand-in.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Emulated model latency in seconds for the stand-in.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--live", action="store_true", help="Call the real OpenAI API (needs OPENAI_API_KEY).")
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = synthetic_frame(args.width, args.height)
+
+    standin = None
+    if args.live:
+        client = OpenAI(api_key=config.OPENAI_API_KEY)
+    else:
+        standin = OpenAIStandIn(latency=args.latency, upload_bandwidth=args.bandwidth).start()
+        client = OpenAI(api_key="standin", base_url=standin.url)
+
+    print(f"Source frame: {len(image_bytes)} bytes  ({'live API' if args.live else f'stand-in, {args.bandwidth / 1e6:.1f} MB/s upload'})")
+    print(f"{'preset':<10} {'upload bytes':>13} {'ratio':>7} {'size':>11} {'prep ms':>9} {'e2e ms':>9}")
+    try:
+        for preset in config.VISION_IMAGE_PRESETS:
+            runs = [analyze(client, image_bytes, preset) for _ in range(args.repeat)]
+            stats = runs[0][0]
+            size = "x".join(str(v) for v in stats.get("upload_size", stats.get("original_size", []))) or "-"
+            print(f"{preset:<10} {stats['upload_bytes']:>13} {stats['original_bytes'] / stats['upload_bytes']:>6.1f}x {size:>11} "
+                  f"{statistics.median(r[1] for r in runs) * 1e3:>9.1f} {statistics.median(r[2] for r in runs) * 1e3:>9.1f}")
+    finally:
+        if standin is not None:
+            standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# load_test_sessions.py
+#
+# Drives N concurrent agent sessions through the real /run_agent endpoint,
+# with stand-in OpenAI and Unity servers behind it, and reports latency,
+# queueing and throughput of the session pool plus per-instance Unity metrics.
+# One extra client disconnects after its first line to check that its session
+# is cancelled; --fail-after makes the first Unity instance stop answering
+# mid-run to exercise failover.
+#
+# Usage (from the python/ folder):
+#   python benchmarks/load_test_sessions.py --sessions 16 --unity-instances 4 --max-sessions 4 --latency 0.2
+#   python benchmarks/load_test_sessions.py --unity-instances 3 --fail-after 1.0
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-standin")
+os.environ.setdefault("PLAN_CACHE_PATH", "")  # keep cached plans out of the user's cache folder
+
+import requests
+from werkzeug.serving import make_server
+
+import config
+from standins import UnityStandIn, OpenAIStandIn
+
+
+def scripted_responder(body: dict) -> dict:
+    """Spawn a row of cubes, look at them once, then finish."""
+    messages = body.get("messages", [])
+    if any(isinstance(m.get("content"), list) for m in messages):
+        return {"content": "A row of grey cubes on a green floor."}
+    turns = sum(1 for m in messages if m.get("role") == "assistant")
+    session = messages[1]["content"] if len(messages) > 1 else ""
+    if turns == 0:
+        objects = [{"object_name": "cube", "position": {"x": float(i), "y": 0.0, "z": 0.0}} for i in range(5)]
+        return {"tool_calls": [{"id": "call_spawn", "type": "function",
+                                "function": {"name": "spawn_objects", "arguments": json.dumps({"objects": objects})}}]}
+    if turns == 1:
+        return {"tool_calls": [{"id": "call_look", "type": "function",
+                                "function": {"name": "capture_and_analyze_scene",
+                                             "arguments": json.dumps({"analysis_prompt": f"Describe the cubes ({session})"})}}]}
+    return {"content": "Five cubes are lined up."}
+
+
+def run_client(base_url: str, index: int, unity_url: str, results: list, disconnect_early: bool = False):
+    record = {"index": index, "status": None, "first_line": None, "total": None, "finished": False, "session": None}
+    start = time.perf_counter()
+    try:
+        with requests.post(f"{base_url}/run_agent", json={"prompt": f"line up five cubes #{index}", "unity_url": unity_url},
+                           stream=True, timeout=300) as response:
+            record["status"] = response.status_code
+            record["session"] = response.headers.get("X-Session-Id")
+            for line in response.iter_lines(decode_unicode=True):
+                if record["first_line"] is None:
+                    record["first_line"] = time.perf_counter() - start
+                    if disconnect_early:
+                        break
+                if line.startswith("AGENT:"):
+                    record["finished"] = True
+    except requests.RequestException as e:
+        record["error"] = str(e)
+    record["total"] = time.perf_counter() - start
+    results.append(record)
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the agent server's session pool.")
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent client sessions.")
+    parser.add_argument("--unity-instances", type=int, default=2, help="Stand-in Unity servers; sessions are spread over them.")
+    parser.add_argument("--max-sessions", type=int, default=4, help="AGENT_MAX_SESSIONS for the run.")
+    parser.add_argument("--queue-limit", type=int, default=None, help="SESSION_QUEUE_LIMIT for the run.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in OpenAI latency per completion, seconds.")
+    parser.add_argument("--frame-time", type=float, default=0.016, help="Emulated Unity Update() latency in seconds.")
+    parser.add_argument("--route", choices=("pool", "explicit"), default="pool",
+                        help="'pool' lets the server pick instances; 'explicit' sends a unity_url round-robin.")
+    parser.add_argument("--fail-after", type=float, default=None, help="Seconds after which the first Unity instance stops answering.")
+    args = parser.parse_args()
+
+    config.LOG_UNITY_API_CALLS = False
+    config.OPENAI_WARMUP_ON_STARTUP = False
+    unity_servers = [UnityStandIn(frame_time=args.frame_time).start() for _ in range(args.unity_instances)]
+    with OpenAIStandIn(latency=args.latency, responder=scripted_responder) as openai_server:
+        config.OPENAI_BASE_URL = openai_server.url
+        config.UNITY_API_URLS = [server.url for server in unity_servers]
+        config.UNITY_API_URL = config.UNITY_API_URLS[0]
+        config.UNITY_HEALTH_INTERVAL = 0.5
+
+        import main
+        from sessions import SessionManager
+        from unity_pool import get_unity_pool
+        main.session_manager = SessionManager(max_sessions=args.max_sessions, queue_limit=args.queue_limit)
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        http_server = make_server("127.0.0.1", 0, main.app, threaded=True)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{http_server.server_port}"
+
+        print(f"Agent server {base_url}: {args.sessions} sessions over {args.unity_instances} Unity stand-in(s), "
+              f"{args.max_sessions} running at once, OpenAI latency {args.latency * 1e3:.0f} ms")
+        results = []
+        clients = [
+            threading.Thread(target=run_client, args=(
+                base_url, i, config.UNITY_API_URLS[i % len(unity_servers)] if args.route == "explicit" else None, results))
+            for i in range(args.sessions)
+        ]
+        clients.append(threading.Thread(target=run_client, args=(base_url, -1, None, results, True)))
+        if args.fail_after is not None:
+            threading.Timer(args.fail_after, unity_servers[0].fail).start()
+
+        # Tool output is printed per call; keep the report readable.
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        start = time.perf_counter()
+        try:
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+            deadline = time.time() + 10
+            while main.session_manager.status()["running"] and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        status = main.session_manager.status()
+        sessions = {session["id"]: session for session in status["sessions"]}
+        completed = [r for r in results if r["index"] >= 0 and r["status"] == 200 and r["finished"]]
+        rejected = [r for r in results if r["status"] == 503]
+        totals = [r["total"] for r in completed]
+        waits = [sessions[r["session"]]["queued_seconds"] for r in completed if r["session"] in sessions]
+        runs = [sessions[r["session"]]["run_seconds"] for r in completed if r["session"] in sessions]
+
+        print(f"completed {len(completed)}/{args.sessions}, rejected {len(rejected)}, wall {elapsed:.2f} s, "
+              f"throughput {len(completed) / elapsed:.2f} sessions/s")
+        if totals:
+            print(f"{'':>12} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+            for label, values in (("end-to-end", totals), ("queued", waits), ("agent run", runs)):
+                if values:
+                    print(f"{label:>12} {statistics.median(values):>7.2f} {percentile(values, 0.95):>7.2f} {max(values):>7.2f}")
+        early = next(r for r in results if r["index"] == -1)
+        print(f"disconnected client's session: {sessions.get(early['session'], {}).get('state')}")
+        print(f"state counts: {status['counts']}")
+        print(f"OpenAI requests: {openai_server.request_count}, "
+              f"failovers: {sum(session['unity_failovers'] for session in status['sessions'])}")
+        print(f"{'unity instance':>24} {'healthy':>8} {'requests':>9} {'errors':>7} {'avg ms':>7} {'util':>6} {'failovers':>10}")
+        for instance in get_unity_pool().metrics()["instances"]:
+            print(f"{instance['url']:>24} {str(instance['healthy']):>8} {instance['requests']:>9} {instance['errors']:>7} "
+                  f"{instance['avg_latency_ms'] or 0:>7.2f} {instance['utilization']:>6.2f} {instance['failovers']:>10}")
+
+        http_server.shutdown()
+        main.session_manager.shutdown()
+    for server in unity_servers:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,19 +12,78 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Model configuration - GPT-4o required for vision analysis
 OPENAI_MODEL = "gpt-4o"  # REQUIRED: Must support tool calling and vision
 
+# Shared client and connection pool (see openai_client.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None uses the official API endpoint
+OPENAI_MAX_CONNECTIONS = 20
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 10
+OPENAI_KEEPALIVE_EXPIRY = 120  # seconds an idle connection is kept open
+OPENAI_TIMEOUT = 120  # seconds per request
+OPENAI_CONNECT_TIMEOUT = 10  # seconds
+OPENAI_MAX_RETRIES = 2
+OPENAI_WARMUP_ON_STARTUP = True  # open a connection before the first request arrives
+
 # --- Unity API Configuration ---
 # Unity HTTP server endpoint
 UNITY_API_URL = "http://127.0.0.1:8080"
+# Every Unity instance agent sessions may target (comma-separated in the environment)
+UNITY_API_URLS = [url.strip() for url in os.getenv("UNITY_API_URLS", UNITY_API_URL).split(",") if url.strip()]
+# Instance pool (see unity_pool.py): each agent session is pinned to the least-loaded idle instance
+UNITY_HEALTH_INTERVAL = 5.0  # seconds between background health checks
+UNITY_HEALTH_TIMEOUT = 2.0  # seconds before a health check counts as failed
+UNITY_FAILOVER = True  # move a session to another instance (replaying its scene) when its instance stops answering
+UNITY_FAILOVER_WAIT = 30.0  # seconds to wait for another instance to become idle before giving up
 
 # API timeout settings
 UNITY_API_TIMEOUT = 15  # seconds
 UNITY_RETRY_ATTEMPTS = 3
+UNITY_RETRY_BACKOFF = 0.25  # seconds, multiplied by the attempt number
+
+# Transport used by unity_client.UnityClient: "pooled" (keep-alive),
+# "close" (new connection per request) or "curl" (legacy subprocess path)
+UNITY_HTTP_MODE = os.getenv("UNITY_HTTP_MODE", "pooled")
+UNITY_POOL_MAXSIZE = 8  # keep-alive connections held open to Unity
+UNITY_KEEPALIVE_FAILURE_LIMIT = 3  # dropped keep-alives before falling back to "close"
+
+# Jobs: GLB loads and simulations run over several frames and return a job id.
+# Tools wait for the job through 'job_status' long polls and return its outcome.
+UNITY_JOB_TIMEOUT = 60.0  # seconds to wait for a GLB load, or for a simulation beyond its duration
+UNITY_JOB_POLL_WAIT = 10.0  # seconds Unity holds one job_status request open; keep below UNITY_API_TIMEOUT
+SIMULATION_TIMESTEP = 0.02  # seconds per run_simulation_batch step (Unity's default fixed timestep)
+
+# Maximum objects sent to Unity's spawn_batch endpoint in one request
+SPAWN_BATCH_MAX_SIZE = 200
+
+# Local mirror of the scene that answers position/listing queries without a round trip
+SCENE_MIRROR_ENABLED = True
+SCENE_MIRROR_CHECK_INTERVAL = 0.5  # seconds a verified mirror is trusted before re-checking scene_version
+SCENE_MIRROR_GRID_CELL = 2.0  # world units per cell of the mirror's spatial index
 
 # --- Vision Analysis Configuration ---
 # Screenshot settings
+# "inline": Unity returns the encoded frame in the capture_vision response (no disk I/O)
+# "file": Unity writes UNITY_SCREENSHOT_PATH (relative to the project folder) before responding
+VISION_CAPTURE_MODE = os.getenv("VISION_CAPTURE_MODE", "inline")
+VISION_CAPTURE_FORMAT = "png"  # "png" or "jpg"
 UNITY_SCREENSHOT_PATH = "scene_capture.png"
+
+# Preprocessing applied to captures before the VLM upload (see image_pipeline.py)
+VISION_IMAGE_PRESET = os.getenv("VISION_IMAGE_PRESET", "balanced")
+VISION_IMAGE_PRESETS = {
+    "original": {"format": "original", "detail": "auto"},
+    "high": {"max_dimension": 2048, "format": "png", "detail": "high"},
+    "balanced": {"max_dimension": 1024, "format": "jpeg", "quality": 85, "detail": "auto"},
+    "fast": {"max_dimension": 512, "format": "webp", "quality": 75, "crop_to_content": True, "detail": "low"},
+}
 VISION_MAX_RETRIES = 2
 
+# Cache of VLM analyses keyed by frame hash + normalized prompt (see vision_cache.py)
+VISION_CACHE_ENABLED = True
+VISION_CACHE_HASH = "perceptual"  # "perceptual" (dHash + coarse color signature) or "content" (SHA-256 of the bytes)
+VISION_CACHE_MAX_DISTANCE = 0  # max differing dHash bits still counted as the same frame (colors must match)
+VISION_CACHE_MAX_ENTRIES = 256
+VISION_CACHE_TTL = 900  # seconds; 0 keeps entries until evicted
+VISION_CACHE_PATH = os.getenv("VISION_CACHE_PATH")  # JSON file to persist the cache, or None
+
 # --- Web Tool Configuration ---
 # For downloading GLB models from repositories
 MOCK_SKETCHFAB_DATABASE = {
@@ -55,6 +114,39 @@ MOCK_SKETCHFAB_DATABASE = {
     }
 }
 
+# Model search (see asset_catalog.py). None searches MOCK_SKETCHFAB_DATABASE;
+# otherwise a .json, .jsonl or SQLite (.db/.sqlite) catalog, indexed on first use
+ASSET_CATALOG_PATH = os.getenv("ASSET_CATALOG_PATH")
+ASSET_SEARCH_TOP_K = 5  # ranked results returned per search
+ASSET_CATALOG_FUZZY_THRESHOLD = 0.5  # trigram similarity (0-1) for matching misspelled words
+ASSET_CATALOG_SYNONYM_WEIGHT = 0.8  # weight of a synonym match relative to the word itself
+ASSET_CATALOG_SYNONYMS = [
+    ["lamp", "lantern", "light"],
+    ["bottle", "flask", "flagon"],
+    ["car", "automobile", "vehicle"],
+    ["sofa", "couch", "settee"],
+    ["cup", "mug"],
+    ["rock", "stone", "boulder"],
+    ["tree", "pine", "oak"],
+    ["robot", "android", "droid"],
+]
+
+# Content-addressed cache of downloaded models (see asset_cache.py)
+ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "vlm_scene_architect", "assets"))
+ASSET_DOWNLOAD_WORKERS = 4  # parallel range requests per file
+ASSET_DOWNLOAD_CHUNK_SIZE = 1 << 20  # bytes per range request
+ASSET_DOWNLOAD_TIMEOUT = 30  # seconds per request
+ASSET_DOWNLOAD_RETRIES = 3  # attempts per range
+ASSET_DOWNLOAD_BACKOFF = 0.5  # seconds, multiplied by the attempt number
+ASSET_MAX_SIZE = 200 * 1024 * 1024  # bytes; larger downloads are refused
+
+# Optional GLB preprocessing before import (see glb_optimizer.py). When enabled,
+# download_and_import_model also writes <name>_optimized.glb and hands that to Unity
+GLB_OPTIMIZE = os.getenv("GLB_OPTIMIZE", "false").lower() == "true"
+GLB_MAX_TEXTURE_SIZE = 1024  # longest embedded texture side in pixels; None keeps textures as they are
+GLB_TRIANGLE_BUDGET = None  # triangles per model, e.g. 50000; None skips mesh decimation
+GLB_JPEG_QUALITY = 85  # quality for re-encoded JPEG textures (1-95)
+
 # --- Project Paths ---
 # Unity project Assets folder path
 # Update this to match YOUR Unity project location
@@ -69,18 +161,68 @@ FLASK_HOST = "127.0.0.1"
 FLASK_PORT_RANGE = range(5004, 5010)  # Try ports in this range
 FLASK_DEBUG = False
 
+# Agent sessions (see sessions.py)
+AGENT_MAX_SESSIONS = 4  # agent loops running at once
+SESSION_QUEUE_LIMIT = 16  # sessions allowed to wait for a slot before new ones are rejected
+SESSION_STREAM_BUFFER = 256  # log lines buffered per session before its agent pauses
+SESSION_HISTORY = 100  # finished sessions kept for /sessions
+
 # --- Agent Behavior Configuration ---
 # Forced iteration settings
 MAX_AGENT_ITERATIONS = 10  # Prevent infinite loops
-VERIFICATION_REQUIRED = True  # Always verify with vision
+VERIFICATION_REQUIRED = True  # Verify finished scenes against the request (see verifier.py)
 SELF_CRITICAL_MODE = True  # Enable self-correction
 
+# Scene verification (see verifier.py)
+VERIFIER_NEAR_DISTANCE = 3.0  # units between surfaces that still count as "next to"/"on"
+VERIFIER_COLOR_TOLERANCE = 0.05  # squared RGB distance a color may be from the nearest named one
+VERIFIER_VISION_FALLBACK = True  # ask the VLM what Unity's object list cannot answer
+# Nouns recognised as model requests, besides the mock database and catalog synonyms
+VERIFIER_MODEL_WORDS = ["fox", "tree", "car", "house", "chair", "table", "dog", "cat", "rock", "lamp", "bottle", "person"]
+
+# Declarative scene specs (see scene_spec.py)
+SCENE_SPEC_MAX_OBJECTS = 500  # objects one spec may expand to, counts included
+SCENE_SPEC_TOLERANCE = 1e-3  # position/scale/color difference still treated as "already in place"
+SCENE_SPEC_MODEL_WORKERS = 4  # models searched for and imported in parallel
+
+# Verified tool-call plans replayed for repeated prompts (see plan_cache.py)
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+PLAN_CACHE_MIN_SIMILARITY = 0.75  # word-sequence similarity of two normalized prompts still counted as a hit
+PLAN_CACHE_MAX_ENTRIES = 500
+PLAN_CACHE_TTL = 7 * 24 * 3600  # seconds; 0 keeps plans until evicted
+PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "vlm_scene_architect", "plan_cache.json")) or None  # "" keeps the cache in memory
+
+# Conversation compaction (see context_manager.py)
+CONTEXT_COMPACTION = True
+CONTEXT_TOKEN_BUDGET = 24000  # estimated prompt tokens per turn
+CONTEXT_KEEP_RECENT_TURNS = 2  # turns whose tool results are sent verbatim
+CONTEXT_SUMMARY_CHARS = 160  # length of elided result / old reply summaries
+
+# Stream completions: forward partial text and start tool calls as soon as
+# their arguments have been streamed
+AGENT_STREAMING = True
+
+# Run independent tool calls from one LLM turn concurrently (see scheduler.py)
+PARALLEL_TOOL_CALLS = True
+TOOL_MAX_PARALLELISM = 8  # worker threads shared by all agents
+
 # --- Logging Configuration ---
 ENABLE_DETAILED_LOGGING = True
 LOG_UNITY_API_CALLS = True
 LOG_VISION_ANALYSIS = True
 LOG_TOOL_EXECUTION = True
 
+# Per-run spans for LLM calls, tools and Unity requests (see tracing.py)
+TRACE_ENABLED = True
+TRACE_DIR = os.getenv("TRACE_DIR")  # write each run as JSONL + Chrome trace JSON here; None keeps traces in memory
+TRACE_MAX_SPANS = 20000  # spans kept per run
+
+# Record/replay of OpenAI, Unity and model download traffic (see recorder.py)
+RECORDER_MODE = os.getenv("RECORDER_MODE")  # "record", "replay" or None (off)
+RECORDER_CASSETTE = os.getenv("RECORDER_CASSETTE", "cassette.jsonl")
+RECORDER_LATENCY = float(os.getenv("RECORDER_LATENCY", "0"))  # replay speed: 0 = instant, 1 = as recorded, 2 = twice as slow
+RECORDER_INLINE_LIMIT = 64 * 1024  # larger bodies are stored in a <cassette>.blobs folder next to the cassette
+
 # --- Security Settings ---
 # In production, these should be environment variables
 ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
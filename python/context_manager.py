@@ -0,0 +1,233 @@
+# context_manager.py
+#
+# Keeps the agent's conversation within a bounded prompt size. The full
+# history is retained for the agent's own bookkeeping, but what is sent to
+# the model is a compacted view:
+#   - tool results older than the last CONTEXT_KEEP_RECENT_TURNS turns are
+#     reduced to a one-line summary, and only the newest vision analysis is
+#     kept verbatim
+#   - repeated verification-failure messages collapse to the latest one
+#   - an authoritative scene-state digest, rebuilt from the scene-changing
+#     tool calls, stands in for the raw results that were elided
+#   - if the estimate is still above CONTEXT_TOKEN_BUDGET, fewer recent turns
+#     are kept whole until it fits (the latest turn always is)
+
+import json
+
+import config
+import scene_spec
+
+# Tools whose results describe changes to the scene; they feed the digest.
+SCENE_TOOLS = {"spawn_object", "spawn_objects", "update_object", "delete_object", "clear_scene", "set_lighting",
+               "apply_scene_spec"}
+VERIFICATION_KIND = "verification"
+
+
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(config.OPENAI_MODEL)
+    except Exception:
+        return None
+
+
+_ENCODER = None
+_ENCODER_LOADED = False
+
+
+def estimate_tokens(messages: list) -> int:
+    """Estimates prompt tokens for a message list (tiktoken if installed, else ~4 chars per token)."""
+    global _ENCODER, _ENCODER_LOADED
+    if not _ENCODER_LOADED:
+        _ENCODER, _ENCODER_LOADED = _encoder(), True
+
+    total = 0
+    for message in messages:
+        text = message.get("content") or ""
+        if not isinstance(text, str):
+            text = json.dumps(text)
+        for tool_call in message.get("tool_calls") or []:
+            text += tool_call["function"]["name"] + tool_call["function"]["arguments"]
+        total += 4 + (len(_ENCODER.encode(text)) if _ENCODER else len(text) // 4)
+    return total
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class ConversationContext:
+    """
+    The message history of one agent run.
+
+    :param system_prompt: The agent's system prompt; always sent first.
+    :param user_prompt: The original user request; always sent second.
+    """
+    def __init__(self, system_prompt: str, user_prompt: str):
+        self.messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        self._kinds = [None, None]
+        self._tool_names = {}  # tool_call_id -> function name
+        self._tool_args = {}  # tool_call_id -> parsed arguments
+        self.scene_objects = []
+        self.lighting = None
+        self.last_stats = {}
+
+    def append(self, message: dict, kind: str = None):
+        """Adds a message to the history. Pass kind='verification' for forced-verification feedback."""
+        self.messages.append(message)
+        self._kinds.append(kind)
+        for tool_call in message.get("tool_calls") or []:
+            self._tool_names[tool_call["id"]] = tool_call["function"]["name"]
+            try:
+                self._tool_args[tool_call["id"]] = json.loads(tool_call["function"]["arguments"])
+            except (TypeError, ValueError):
+                self._tool_args[tool_call["id"]] = {}
+        if message.get("role") == "tool":
+            self._update_scene(message)
+
+    def tool_arguments(self, tool_call_id: str) -> dict:
+        """The parsed arguments of a tool call in the history ({} if they were not valid JSON)."""
+        return self._tool_args.get(tool_call_id, {})
+
+    # --- Scene digest ---
+    def _update_scene(self, message: dict):
+        name = self._tool_names.get(message.get("tool_call_id"))
+        if name not in SCENE_TOOLS:
+            return
+        try:
+            result = json.loads(message.get("content") or "{}")
+        except ValueError:
+            return
+        args = self._tool_args.get(message["tool_call_id"], {})
+        if name == "clear_scene" and result.get("success"):
+            self.scene_objects = []
+        elif name == "set_lighting" and result.get("success"):
+            self.lighting = args.get("preset")
+        elif name == "spawn_object" and result.get("success"):
+            self.scene_objects.append(dict(args, object_id=result.get("object_id") or args.get("object_id")))
+        elif name == "spawn_objects":
+            for item in result.get("results") or []:
+                objects = args.get("objects") or []
+                if item.get("success") and item.get("index", -1) < len(objects):
+                    obj = objects[item["index"]]
+                    self.scene_objects.append(dict(obj, object_id=item.get("object_id") or obj.get("object_id")))
+        elif name == "update_object" and result.get("success"):
+            for obj in self.scene_objects:
+                if obj.get("object_id") == args.get("object_id"):
+                    obj.update({field: args[field] for field in ("position", "scale", "color") if args.get(field)})
+        elif name == "delete_object" and result.get("success"):
+            self.scene_objects = [obj for obj in self.scene_objects if obj.get("object_id") != args.get("object_id")]
+        elif name == "apply_scene_spec" and "created" in result and not result.get("dry_run"):
+            self._apply_spec(args, result)
+
+    def _apply_spec(self, args: dict, result: dict):
+        try:
+            compiled = scene_spec.compile_spec(scene_spec.load_spec(args.get("spec")))
+        except scene_spec.SpecError:
+            return
+        failed = {failure.get("id") for failure in result.get("failed") or []}
+        assigned = result.get("assigned") or {}
+        models = result.get("models") or {}
+        changed = set(result["created"]) | set(result.get("updated") or [])
+        # A "replace" spec leaves exactly its own objects; an "add" spec adds or changes some.
+        wanted = changed if compiled["mode"] == "add" else changed | set(result.get("kept") or [])
+        objects = []
+        for obj in compiled["objects"]:
+            obj = dict(obj, id=assigned.get(obj["id"], obj["id"]))
+            if obj["id"] in wanted and obj["id"] not in failed:
+                objects.append(scene_spec.spawn_item(dict(obj, object_name=obj["object_name"] or models.get(obj["model"]))))
+        if compiled["mode"] == "add":
+            deleted = changed | set(result.get("deleted") or [])
+            self.scene_objects = [obj for obj in self.scene_objects if obj.get("object_id") not in deleted] + objects
+        else:
+            self.scene_objects = objects
+        if compiled["lighting"] and "lighting" not in failed:
+            self.lighting = compiled["lighting"]
+
+    def scene_digest(self) -> str:
+        lines = [f"lighting: {self.lighting or 'unchanged'}", f"objects spawned by you: {len(self.scene_objects)}"]
+        for obj in self.scene_objects:
+            position = obj.get("position") or {}
+            entry = f"- {obj.get('object_id') or '?'}: {obj.get('object_name')} at ({position.get('x')}, {position.get('y')}, {position.get('z')})"
+            if obj.get("scale"):
+                scale = obj["scale"]
+                entry += f" scale ({scale.get('x')}, {scale.get('y')}, {scale.get('z')})"
+            if obj.get("color"):
+                color = obj["color"]
+                entry += f" color rgb({color.get('r')}, {color.get('g')}, {color.get('b')})"
+            lines.append(entry)
+        return "SCENE STATE DIGEST (authoritative, replaces elided tool results):\n" + "\n".join(lines)
+
+    # --- Compaction ---
+    def _summarize_tool_result(self, message: dict, keep_vision: bool) -> dict:
+        name = self._tool_names.get(message.get("tool_call_id"), "tool")
+        limit = config.CONTEXT_SUMMARY_CHARS
+        try:
+            result = json.loads(message.get("content") or "{}")
+        except ValueError:
+            result = None
+        if not isinstance(result, dict):
+            summary = _truncate(str(message.get("content")), limit)
+        elif "vlm_analysis" in result and keep_vision:
+            return message
+        else:
+            parts = [f"success={result.get('success', 'error' not in result)}"]
+            if "vlm_analysis" in result:
+                parts.append("vision analysis superseded by a later capture")
+            for key in ("error", "data", "message"):
+                if result.get(key):
+                    parts.append(f"{key}={_truncate(str(result[key]), limit)}")
+            if "results" in result:
+                parts.append(f"spawned={result.get('spawned')} failed={result.get('failed')}")
+            summary = "; ".join(parts)
+        return {"role": "tool", "tool_call_id": message["tool_call_id"], "content": f"[elided {name} result] {summary}"}
+
+    def _compact(self, keep_recent_turns: int) -> list:
+        # Turn boundaries are the assistant messages.
+        turn_starts = [i for i, m in enumerate(self.messages) if m.get("role") == "assistant"]
+        cutoff = turn_starts[-keep_recent_turns] if len(turn_starts) >= keep_recent_turns else 0
+
+        last_vision = None
+        for i in range(len(self.messages) - 1, -1, -1):
+            if self.messages[i].get("role") == "tool" and "vlm_analysis" in str(self.messages[i].get("content")):
+                last_vision = i
+                break
+        last_verification = max((i for i, kind in enumerate(self._kinds) if kind == VERIFICATION_KIND), default=None)
+
+        compacted, elided = [], 0
+        for i, message in enumerate(self.messages):
+            if self._kinds[i] == VERIFICATION_KIND and i != last_verification:
+                elided += 1
+                continue
+            if message.get("role") == "tool" and i < cutoff:
+                message = self._summarize_tool_result(message, keep_vision=(i == last_vision))
+                elided += message is not self.messages[i]
+            elif message.get("role") == "assistant" and i < cutoff and message.get("content"):
+                message = {**message, "content": _truncate(message["content"], config.CONTEXT_SUMMARY_CHARS)}
+            compacted.append(message)
+
+        if elided:
+            compacted.insert(2, {"role": "system", "content": self.scene_digest()})
+        return compacted, elided
+
+    def for_request(self) -> list:
+        """Returns the compacted message list to send to the model."""
+        full_estimate = estimate_tokens(self.messages)
+        if not config.CONTEXT_COMPACTION:
+            self.last_stats = {"estimated_tokens": full_estimate, "full_history_tokens": full_estimate, "elided": 0}
+            return list(self.messages)
+
+        # The latest turn is always kept whole: the model has to see the results it is reacting to.
+        keep = max(1, config.CONTEXT_KEEP_RECENT_TURNS)
+        compacted, elided = self._compact(keep)
+        estimate = estimate_tokens(compacted)
+        while estimate > config.CONTEXT_TOKEN_BUDGET and keep > 1:
+            keep -= 1
+            compacted, elided = self._compact(keep)
+            estimate = estimate_tokens(compacted)
+
+        self.last_stats = {"estimated_tokens": estimate, "full_history_tokens": full_estimate, "elided": elided}
+        return compacted
@@ -0,0 +1,511 @@
+# glb_optimizer.py
+#
+# Optional preprocessing of downloaded GLB models before Unity imports them.
+# Sketchfab-style models often carry 4K textures and far more triangles than a
+# scene preview needs, which slows LoadGLBCoroutine, the editor frame rate and
+# every screenshot. The pass:
+#   - parses the binary glTF container (12-byte header, JSON chunk, BIN chunk)
+#   - downsizes embedded PNG/JPEG textures to GLB_MAX_TEXTURE_SIZE with Pillow,
+#     keeping the original bytes whenever re-encoding would not make them smaller
+#   - optionally decimates indexed triangle meshes to GLB_TRIANGLE_BUDGET by
+#     vertex clustering: vertices are snapped to the first vertex of their grid
+#     cell, collapsed triangles dropped and unused vertices compacted away. The
+#     grid is the finest one that fits each primitive's share of the budget
+#   - rebuilds the BIN chunk without the data nothing references any more
+# The result is written next to the original as <name>_optimized.glb. Before and
+# after stats are returned and stored in the variant's asset.extras, together
+# with the source hash and settings, so re-running on an unchanged model is free.
+#
+# Primitives the pass cannot rewrite safely (morph targets, sparse accessors,
+# compressed meshes, non-triangle modes) are kept as they are, and so are
+# primitives whose clustering would leave nothing or far less than their share
+# (sparse geometry spread over a large extent collapses at coarse grids).
+#
+# Usage (from the python/ folder):
+#   python glb_optimizer.py path/to/model.glb --max-texture 1024 --triangles 50000
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import config
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+MODE_TRIANGLES = 4
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+
+COMPONENT_DTYPES = {
+    5120: np.dtype("<i1"), 5121: np.dtype("<u1"), 5122: np.dtype("<i2"),
+    5123: np.dtype("<u2"), 5125: np.dtype("<u4"), 5126: np.dtype("<f4"),
+}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4}
+_IMAGE_FORMATS = {"image/png": "PNG", "image/jpeg": "JPEG"}
+# Mesh extensions that change how primitives are stored; decimation leaves those models alone.
+_MESH_EXTENSIONS = {"KHR_draco_mesh_compression", "EXT_meshopt_compression", "KHR_mesh_quantization", "EXT_mesh_gpu_instancing"}
+# A decimated primitive must keep at least this fraction of its triangle share; otherwise it is kept as it is.
+MIN_DECIMATION_FILL = 0.25
+
+
+class GLBError(ValueError):
+    """Raised for files that are not a GLB this pass can rewrite."""
+
+
+def optimized_path(path: Path) -> Path:
+    """Where the optimized variant of a model is written."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}_optimized{path.suffix}")
+
+
+# --- Container ---
+
+def read_glb(data: bytes) -> tuple:
+    """Splits a GLB into its parsed JSON and its BIN chunk (b"" if it has none)."""
+    if len(data) < 20:
+        raise GLBError("file is too short to be a GLB")
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != GLB_MAGIC:
+        raise GLBError("missing glTF magic")
+    if version != 2:
+        raise GLBError(f"unsupported glTF container version {version}")
+    if length > len(data):
+        raise GLBError(f"truncated (header says {length} bytes, file has {len(data)})")
+
+    gltf, binary, offset = None, b"", 12
+    while offset + 8 <= length:
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON and gltf is None:
+            gltf = json.loads(chunk.decode("utf-8"))
+        elif chunk_type == CHUNK_BIN and not binary:
+            binary = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise GLBError("no JSON chunk")
+    return gltf, binary
+
+
+def write_glb(gltf: dict, binary: bytes) -> bytes:
+    """Serializes JSON and BIN back into a GLB, padding both chunks to 4 bytes."""
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    parts = [struct.pack("<II", len(json_chunk), CHUNK_JSON), json_chunk]
+    if binary:
+        binary += b"\x00" * (-len(binary) % 4)
+        parts += [struct.pack("<II", len(binary), CHUNK_BIN), binary]
+    body = b"".join(parts)
+    return struct.pack("<4sII", GLB_MAGIC, 2, 12 + len(body)) + body
+
+
+class _Buffer:
+    """The BIN chunk being rebuilt: existing bufferViews can be replaced and new ones appended."""
+
+    def __init__(self, gltf: dict, binary: bytes):
+        self.gltf = gltf
+        self.binary = binary
+        self.views = gltf.setdefault("bufferViews", [])
+        self.replaced = {}  # bufferView index -> new bytes
+
+    def view_bytes(self, index: int) -> bytes:
+        if index in self.replaced:
+            return self.replaced[index]
+        view = self.views[index]
+        start = view.get("byteOffset", 0)
+        return self.binary[start:start + view["byteLength"]]
+
+    def add_view(self, data: bytes, target: int = None) -> int:
+        view = {"buffer": 0, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.views.append(view)
+        self.replaced[len(self.views) - 1] = data
+        return len(self.views) - 1
+
+    def read_accessor(self, index: int) -> np.ndarray:
+        """An accessor's elements as a (count, components) array."""
+        accessor = self.gltf["accessors"][index]
+        dtype = COMPONENT_DTYPES[accessor["componentType"]]
+        components = TYPE_SIZES[accessor["type"]]
+        view_index = accessor["bufferView"]
+        stride = self.views[view_index].get("byteStride") or dtype.itemsize * components
+        data = self.view_bytes(view_index)
+        return np.ndarray((accessor["count"], components), dtype=dtype, buffer=data,
+                          offset=accessor.get("byteOffset", 0), strides=(stride, dtype.itemsize)).copy()
+
+    def add_accessor(self, template: dict, values: np.ndarray, target: int = None) -> int:
+        """Appends a tightly packed copy of `template` holding `values`."""
+        accessor = {key: value for key, value in template.items() if key not in ("bufferView", "byteOffset", "min", "max", "sparse")}
+        accessor["bufferView"] = self.add_view(np.ascontiguousarray(values).tobytes(), target)
+        accessor["count"] = len(values)
+        if "min" in template and len(values):
+            cast = float if values.dtype.kind == "f" else int
+            accessor["min"] = [cast(v) for v in values.min(axis=0)]
+            accessor["max"] = [cast(v) for v in values.max(axis=0)]
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def pack(self) -> bytes:
+        """Drops unreferenced accessors and bufferViews and lays the rest out in a fresh BIN chunk."""
+        gltf = self.gltf
+        # Compressed meshes reference bufferViews from extensions this pass does not walk; keep everything.
+        collect = not (_MESH_EXTENSIONS & set(gltf.get("extensionsUsed", [])))
+        if collect and "accessors" in gltf:
+            keep = sorted(_accessor_references(gltf))
+            remap = {old: new for new, old in enumerate(keep)}
+            gltf["accessors"] = [gltf["accessors"][i] for i in keep]
+            _remap_accessors(gltf, remap)
+
+        used = {accessor["bufferView"] for accessor in gltf.get("accessors", []) if "bufferView" in accessor}
+        for accessor in gltf.get("accessors", []):
+            sparse = accessor.get("sparse")
+            if sparse:
+                used |= {sparse["indices"]["bufferView"], sparse["values"]["bufferView"]}
+        used |= {image["bufferView"] for image in gltf.get("images", []) if "bufferView" in image}
+        keep = sorted(used) if collect else list(range(len(self.views)))
+        remap = {old: new for new, old in enumerate(keep)}
+
+        chunks, offset = [], 0
+        new_views = []
+        for old in keep:
+            data = self.view_bytes(old)
+            padding = -offset % 4
+            if padding:
+                chunks.append(b"\x00" * padding)
+                offset += padding
+            view = dict(self.views[old], buffer=0, byteOffset=offset, byteLength=len(data))
+            new_views.append(view)
+            chunks.append(data)
+            offset += len(data)
+        binary = b"".join(chunks)
+
+        for accessor in gltf.get("accessors", []):
+            if "bufferView" in accessor:
+                accessor["bufferView"] = remap[accessor["bufferView"]]
+            sparse = accessor.get("sparse")
+            if sparse:
+                for part in (sparse["indices"], sparse["values"]):
+                    part["bufferView"] = remap[part["bufferView"]]
+        for image in gltf.get("images", []):
+            if "bufferView" in image:
+                image["bufferView"] = remap[image["bufferView"]]
+        if new_views:
+            gltf["bufferViews"] = new_views
+        else:
+            gltf.pop("bufferViews", None)
+        if binary:
+            gltf["buffers"] = [{"byteLength": len(binary)}]
+        else:
+            gltf.pop("buffers", None)
+        return binary
+
+
+def _primitive_accessors(primitive: dict):
+    yield from primitive.get("attributes", {}).values()
+    if "indices" in primitive:
+        yield primitive["indices"]
+    for target in primitive.get("targets", []):
+        yield from target.values()
+
+
+def _accessor_references(gltf: dict) -> set:
+    used = set()
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            used.update(_primitive_accessors(primitive))
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            used.add(skin["inverseBindMatrices"])
+    for animation in gltf.get("animations", []):
+        for sampler in animation.get("samplers", []):
+            used.update((sampler["input"], sampler["output"]))
+    return used
+
+
+def _remap_accessors(gltf: dict, remap: dict):
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            attributes = primitive.get("attributes", {})
+            for name in attributes:
+                attributes[name] = remap[attributes[name]]
+            if "indices" in primitive:
+                primitive["indices"] = remap[primitive["indices"]]
+            for target in primitive.get("targets", []):
+                for name in target:
+                    target[name] = remap[target[name]]
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            skin["inverseBindMatrices"] = remap[skin["inverseBindMatrices"]]
+    for animation in gltf.get("animations", []):
+        for sampler in animation.get("samplers", []):
+            sampler["input"] = remap[sampler["input"]]
+            sampler["output"] = remap[sampler["output"]]
+
+
+# --- Textures ---
+
+def downsize_textures(buffer: _Buffer, max_size: int, jpeg_quality: int) -> list:
+    """Re-encodes embedded images larger than `max_size` pixels on a side. Returns per-image stats."""
+    from PIL import Image
+
+    stats = []
+    for index, image_info in enumerate(buffer.gltf.get("images", [])):
+        pil_format = _IMAGE_FORMATS.get(image_info.get("mimeType"))
+        if "bufferView" not in image_info or pil_format is None:
+            continue
+        original = buffer.view_bytes(image_info["bufferView"])
+        try:
+            image = Image.open(io.BytesIO(original))
+            image.load()
+        except Exception as e:
+            print(f"GLB OPTIMIZER: Skipping image {index}: {e}")
+            continue
+        entry = {"image": index, "name": image_info.get("name"), "size_before": list(image.size),
+                 "bytes_before": len(original), "size_after": list(image.size), "bytes_after": len(original)}
+        stats.append(entry)
+        if max(image.size) <= max_size:
+            continue
+
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        output = io.BytesIO()
+        if pil_format == "JPEG":
+            image.convert("RGB").save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+        else:
+            image.save(output, format="PNG", optimize=True)
+        encoded = output.getvalue()
+        entry["size_after"] = list(image.size)
+        if len(encoded) < len(original):
+            buffer.replaced[image_info["bufferView"]] = encoded
+            entry["bytes_after"] = len(encoded)
+        else:
+            entry["size_after"] = entry["size_before"]
+    return stats
+
+
+# --- Meshes ---
+
+def triangle_count(gltf: dict) -> int:
+    """Triangles across all TRIANGLES-mode primitives (each mesh counted once)."""
+    total = 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            if primitive.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES:
+                continue
+            if "indices" in primitive:
+                total += gltf["accessors"][primitive["indices"]]["count"] // 3
+            elif "POSITION" in primitive.get("attributes", {}):
+                total += gltf["accessors"][primitive["attributes"]["POSITION"]]["count"] // 3
+    return total
+
+
+def _canonical_triangles(triangles: np.ndarray) -> np.ndarray:
+    """Drops collapsed and duplicate triangles, keeping winding order."""
+    a, b, c = triangles.T
+    triangles = triangles[(a != b) & (b != c) & (a != c)]
+    if not len(triangles):
+        return triangles
+    # Rotate each triangle so its smallest index comes first; winding is preserved.
+    shift = np.argmin(triangles, axis=1)
+    rows = np.arange(len(triangles))[:, None]
+    rotated = triangles[rows, (shift[:, None] + np.arange(3)) % 3]
+    _, first = np.unique(rotated, axis=0, return_index=True)
+    return triangles[np.sort(first)]
+
+
+def cluster_triangles(positions: np.ndarray, triangles: np.ndarray, resolution: int) -> np.ndarray:
+    """Snaps vertices to a resolution^3 grid (first vertex per cell) and returns the surviving triangles."""
+    low = positions.min(axis=0)
+    extent = float((positions.max(axis=0) - low).max()) or 1.0
+    cells = np.minimum(((positions - low) / extent * resolution).astype(np.int64), resolution - 1)
+    keys = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    representative = first[inverse.reshape(-1)]
+    return _canonical_triangles(representative[triangles])
+
+
+def decimate_triangles(positions: np.ndarray, triangles: np.ndarray, target: int):
+    """
+    The finest vertex clustering of `triangles` that leaves at most `target` of them,
+    or None if that leaves fewer than MIN_DECIMATION_FILL of `target` (or none at all).
+    """
+    best = None
+    low, high = 1, 1024
+    while low <= high:
+        resolution = (low + high) // 2
+        candidate = cluster_triangles(positions, triangles, resolution)
+        if len(candidate) <= target:
+            best, low = candidate, resolution + 1
+        else:
+            high = resolution - 1
+    if best is None or not len(best) or len(best) < target * MIN_DECIMATION_FILL:
+        return None
+    return best
+
+
+def _decimatable(gltf: dict, primitive: dict) -> bool:
+    if primitive.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES or primitive.get("targets") or primitive.get("extensions"):
+        return False
+    attributes = primitive.get("attributes", {})
+    if "POSITION" not in attributes:
+        return False
+    for index in _primitive_accessors(primitive):
+        accessor = gltf["accessors"][index]
+        if "sparse" in accessor or "bufferView" not in accessor or accessor["type"] not in TYPE_SIZES:
+            return False
+    return True
+
+
+def decimate_meshes(buffer: _Buffer, budget: int) -> bool:
+    """Shares `budget` triangles between primitives by their current counts. Returns whether anything changed."""
+    gltf = buffer.gltf
+    if _MESH_EXTENSIONS & set(gltf.get("extensionsUsed", [])):
+        print("GLB OPTIMIZER: Skipping decimation of a model with compressed or instanced meshes")
+        return False
+    total = triangle_count(gltf)
+    if total <= budget:
+        return False
+
+    changed = False
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            if not _decimatable(gltf, primitive):
+                continue
+            attributes = primitive["attributes"]
+            positions = buffer.read_accessor(attributes["POSITION"]).astype(np.float64)
+            if "indices" in primitive:
+                indices = buffer.read_accessor(primitive["indices"]).reshape(-1).astype(np.int64)
+            else:
+                indices = np.arange(len(positions), dtype=np.int64)
+            triangles = indices[:len(indices) // 3 * 3].reshape(-1, 3)
+            target = max(1, len(triangles) * budget // total)
+            if len(triangles) <= target:
+                continue
+            triangles = decimate_triangles(positions, triangles, target)
+            if triangles is None:
+                print(f"GLB OPTIMIZER: Keeping a {len(positions)}-vertex primitive as it is; "
+                      f"clustering it to at most {target} triangles would leave too few")
+                continue
+
+            # Keep only the vertices the remaining triangles use.
+            used, compact = np.unique(triangles, return_inverse=True)
+            for name, index in list(attributes.items()):
+                template = gltf["accessors"][index]
+                attributes[name] = buffer.add_accessor(template, buffer.read_accessor(index)[used], TARGET_ARRAY_BUFFER)
+            index_type = 5123 if len(used) < 65535 else 5125
+            primitive["indices"] = buffer.add_accessor(
+                {"componentType": index_type, "type": "SCALAR"},
+                compact.reshape(-1).astype(COMPONENT_DTYPES[index_type]), TARGET_ELEMENT_ARRAY_BUFFER)
+            changed = True
+    return changed
+
+
+# --- Optimization pass ---
+
+def optimize_glb(path, output_path=None, max_texture_size: int = None, triangle_budget: int = None,
+                 jpeg_quality: int = None, force: bool = False) -> dict:
+    """
+    Writes an optimized variant of a GLB model and reports what changed.
+
+    :param path: The model to optimize.
+    :param output_path: Where to write the result; defaults to <name>_optimized.glb next to it.
+    :param max_texture_size: Longest texture side in pixels (default config.GLB_MAX_TEXTURE_SIZE; None keeps textures).
+    :param triangle_budget: Triangles for the whole model (default config.GLB_TRIANGLE_BUDGET; None skips decimation).
+    :param jpeg_quality: Quality for re-encoded JPEG textures (default config.GLB_JPEG_QUALITY).
+    :param force: Rebuild even if an up-to-date variant already exists.
+    """
+    path = Path(path)
+    output_path = Path(output_path) if output_path else optimized_path(path)
+    max_texture_size = config.GLB_MAX_TEXTURE_SIZE if max_texture_size is None else max_texture_size
+    triangle_budget = config.GLB_TRIANGLE_BUDGET if triangle_budget is None else triangle_budget
+    jpeg_quality = jpeg_quality or config.GLB_JPEG_QUALITY
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        return {"success": False, "error": str(e)}
+    settings = {"source_sha256": hashlib.sha256(data).hexdigest(), "max_texture_size": max_texture_size,
+                "triangle_budget": triangle_budget, "jpeg_quality": jpeg_quality}
+
+    if not force and output_path.exists():
+        try:
+            previous = read_glb(output_path.read_bytes())[0].get("asset", {}).get("extras", {}).get("optimization")
+        except (GLBError, OSError, ValueError):
+            previous = None
+        if previous and previous.get("settings") == settings:
+            stats = dict(previous["stats"], bytes_after=output_path.stat().st_size)
+            return {"success": True, "path": str(output_path), "stats": stats, "cached": True}
+
+    start = time.perf_counter()
+    try:
+        gltf, binary = read_glb(data)
+        buffers = gltf.get("buffers", [])
+        if len(buffers) > 1 or any("uri" in buffer for buffer in buffers):
+            raise GLBError("models with external or multiple buffers are not supported")
+        buffer = _Buffer(gltf, binary)
+        triangles_before = triangle_count(gltf)
+        textures = downsize_textures(buffer, max_texture_size, jpeg_quality) if max_texture_size else []
+        if triangle_budget:
+            decimate_meshes(buffer, triangle_budget)
+        triangles_after = triangle_count(gltf)
+        if triangles_before and not triangles_after:
+            raise GLBError("decimation removed every triangle")
+        binary = buffer.pack()
+    except (GLBError, ValueError, KeyError, IndexError) as e:
+        return {"success": False, "error": f"Could not optimize {path.name}: {e}"}
+
+    stats = {
+        "bytes_before": len(data),
+        "triangles_before": triangles_before,
+        "triangles_after": triangles_after,
+        "texture_pixels_before": sum(t["size_before"][0] * t["size_before"][1] for t in textures),
+        "texture_pixels_after": sum(t["size_after"][0] * t["size_after"][1] for t in textures),
+        "textures": textures,
+    }
+    asset = gltf.setdefault("asset", {"version": "2.0"})
+    asset.setdefault("extras", {})["optimization"] = {"settings": settings, "stats": stats}
+    output = write_glb(gltf, binary)
+    stats = dict(stats, bytes_after=len(output), seconds=round(time.perf_counter() - start, 3))
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(output)
+        os.replace(temp_name, output_path)
+    except OSError as e:
+        Path(temp_name).unlink(missing_ok=True)
+        return {"success": False, "error": str(e)}
+    print(f"GLB OPTIMIZER: {path.name}: {stats['bytes_before']} -> {stats['bytes_after']} bytes, "
+          f"{triangles_before} -> {triangles_after} triangles in {stats['seconds']}s")
+    return {"success": True, "path": str(output_path), "stats": stats, "cached": False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsize textures and decimate meshes of GLB models.")
+    parser.add_argument("paths", nargs="+", help="GLB files to optimize.")
+    parser.add_argument("--max-texture", type=int, default=None, help="Longest texture side in pixels.")
+    parser.add_argument("--triangles", type=int, default=None, help="Triangle budget for each model.")
+    parser.add_argument("--force", action="store_true", help="Rebuild variants that are already up to date.")
+    args = parser.parse_args()
+    for path in args.paths:
+        result = optimize_glb(path, max_texture_size=args.max_texture, triangle_budget=args.triangles, force=args.force)
+        if result["success"]:
+            stats = result["stats"]
+            print(f"{result['path']}: {stats['bytes_before']} -> {stats['bytes_after']} bytes, "
+                  f"{stats['triangles_before']} -> {stats['triangles_after']} triangles, "
+                  f"{stats['texture_pixels_before']} -> {stats['texture_pixels_after']} texture pixels"
+                  + (" (up to date)" if result["cached"] else ""))
+        else:
+            print(f"{path}: {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# image_pipeline.py
+#
+# Prepares scene captures for upload to the VLM. Full-resolution PNGs from
+# the editor run to several MB once base64-encoded; downscaling, re-encoding
+# as JPEG/WebP and optionally cropping away empty background shrinks them by
+# an order of magnitude with little effect on what GPT-4o can see.
+#
+# Presets live in config.VISION_IMAGE_PRESETS; each may set
+#   max_dimension    - longest side in pixels after resizing (None keeps size)
+#   format           - "png", "jpeg" or "webp" ("original" passes bytes through)
+#   quality          - JPEG/WebP quality (1-95)
+#   crop_to_content  - trim uniform background around the objects
+#   detail           - OpenAI image detail level: "low", "high" or "auto"
+
+import io
+
+import config
+
+MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+_PIL_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+
+def get_preset(preset=None) -> dict:
+    """Resolves a preset name (or dict) against config.VISION_IMAGE_PRESETS."""
+    if isinstance(preset, dict):
+        return preset
+    name = preset or config.VISION_IMAGE_PRESET
+    if name not in config.VISION_IMAGE_PRESETS:
+        raise ValueError(f"Unknown vision image preset '{name}'. Available: {', '.join(config.VISION_IMAGE_PRESETS)}")
+    return config.VISION_IMAGE_PRESETS[name]
+
+
+def crop_to_content(image, margin: float = 0.05):
+    """Crops away the uniform background (taken from the top-left pixel) around the content."""
+    from PIL import Image, ImageChops
+
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    diff = ImageChops.difference(image, background).convert("L").point(lambda value: 255 if value > 12 else 0)
+    box = diff.getbbox()
+    if box is None:
+        return image
+    pad_x, pad_y = int(image.width * margin), int(image.height * margin)
+    left, top, right, bottom = box
+    return image.crop((max(0, left - pad_x), max(0, top - pad_y), min(image.width, right + pad_x), min(image.height, bottom + pad_y)))
+
+
+def prepare_image(image_bytes: bytes, mime_type: str = "image/png", preset=None) -> dict:
+    """
+    Downscales and re-encodes a captured frame for the VLM.
+
+    :param image_bytes: The encoded image as captured from Unity.
+    :param mime_type: MIME type of image_bytes.
+    :param preset: A preset name from config.VISION_IMAGE_PRESETS, a preset dict, or None for the default.
+    :return: {"image_bytes", "mime_type", "detail", "stats"} where stats holds the before/after sizes.
+    """
+    settings = get_preset(preset)
+    detail = settings.get("detail", "auto")
+    target_format = settings.get("format", "original")
+    stats = {"original_bytes": len(image_bytes)}
+
+    if target_format == "original" and not settings.get("max_dimension") and not settings.get("crop_to_content"):
+        stats["upload_bytes"] = len(image_bytes)
+        return {"image_bytes": image_bytes, "mime_type": mime_type, "detail": detail, "stats": stats}
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        image = source.convert("RGB")
+    stats["original_size"] = list(image.size)
+
+    if settings.get("crop_to_content"):
+        image = crop_to_content(image)
+
+    max_dimension = settings.get("max_dimension")
+    if max_dimension and max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    if target_format == "original":
+        target_format = "jpeg" if mime_type == "image/jpeg" else "png"
+    stats["upload_size"] = list(image.size)
+    if image.size == tuple(stats["original_size"]) and MIME_TYPES[target_format] == mime_type:
+        # Nothing to resize or convert: re-encoding would only cost time.
+        stats["upload_bytes"] = len(image_bytes)
+        return {"image_bytes": image_bytes, "mime_type": mime_type, "detail": detail, "stats": stats}
+
+    buffer = io.BytesIO()
+    save_options = {}
+    if target_format in ("jpeg", "webp"):
+        save_options["quality"] = settings.get("quality", 85)
+    image.save(buffer, format=_PIL_FORMATS[target_format], **save_options)
+    prepared = buffer.getvalue()
+    stats["upload_bytes"] = len(prepared)
+    return {"image_bytes": prepared, "mime_type": MIME_TYPES[target_format], "detail": detail, "stats": stats}
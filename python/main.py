@@ -4,11 +4,17 @@
 # This script runs a Flask web server that provides a simple UI for interacting
 # with the agent and an API endpoint to process user requests.
 
-from flask import Flask, render_template_string, request, Response
-from agent import AutonomousAgent
+import json
+import threading
+from flask import Flask, render_template_string, request, Response, jsonify
+from openai_client import warm_up
+from sessions import SessionManager, SessionRejected
+from unity_pool import get_unity_pool
+from plan_cache import get_plan_cache
 import config
 
 app = Flask(__name__)
+session_manager = SessionManager()
 
 # --- HTML & CSS for the Web UI ---
 # A simple, self-contained web page for interacting with the agent.
@@ -30,6 +36,9 @@ HTML_TEMPLATE = """
         .log-tool-call { border-color: #f97316; }
         .log-tool-response { border-color: #f59e0b; }
         .log-error { border-color: #ef4444; }
+        .log-trace { border-color: #a855f7; }
+        .trace-table td, .trace-table th { padding: 0 0.75rem 0 0; text-align: right; }
+        .trace-table td:first-child, .trace-table th:first-child { text-align: left; }
     </style>
 </head>
 <body class="bg-gray-900 text-white">
@@ -69,6 +78,7 @@ HTML_TEMPLATE = """
             title.textContent = type.replace('-', ' ');
             
             const content = document.createElement('div');
+            content.className = 'whitespace-pre-wrap';
             content.textContent = message;
             
             entry.appendChild(title);
@@ -76,6 +86,77 @@ HTML_TEMPLATE = """
             
             logOutput.appendChild(entry);
             logOutput.scrollTop = logOutput.scrollHeight;
+            return content;
+        }
+
+        // Streamed assistant text arrives as 'LLM STREAM: "<json string>"' lines
+        // and is appended to a single entry until another line type arrives.
+        let streamEntry = null;
+
+        // The session id (from the X-Session-Id header) links the summary to the full trace.
+        let sessionId = null;
+
+        function formatCount(value) {
+            return value === undefined ? '' : value.toLocaleString();
+        }
+
+        // Renders the 'TRACE SUMMARY:' line the agent emits at the end of a run.
+        function addTraceSummary(summary) {
+            const content = addLogEntry(`${summary.seconds}s, ${summary.spans} spans`, 'trace');
+            const table = document.createElement('table');
+            table.className = 'trace-table mt-2';
+            const columns = ['', 'calls', 'seconds', 'errors', 'prompt tok', 'completion tok', 'sent B', 'received B', 'retries'];
+            const header = table.insertRow();
+            columns.forEach(name => {
+                const cell = document.createElement('th');
+                cell.textContent = name;
+                header.appendChild(cell);
+            });
+            const rows = Object.entries(summary.by_category).concat(Object.entries(summary.by_name));
+            rows.forEach(([name, entry], index) => {
+                const row = table.insertRow();
+                const values = [name, entry.count, entry.seconds.toFixed(3), entry.errors, entry.prompt_tokens,
+                                entry.completion_tokens, entry.request_bytes, entry.response_bytes, entry.retries];
+                values.forEach((value, column) => {
+                    row.insertCell().textContent = column === 0 || column === 2 ? value : formatCount(value);
+                });
+                if (index === Object.keys(summary.by_category).length - 1) row.className = 'border-b border-gray-600';
+            });
+            content.appendChild(table);
+            if (sessionId) {
+                const links = document.createElement('div');
+                links.className = 'mt-2 text-purple-300';
+                [['Chrome/Perfetto trace', ''], ['JSONL', '?format=jsonl']].forEach(([label, query]) => {
+                    const link = document.createElement('a');
+                    link.href = `/sessions/${sessionId}/trace${query}`;
+                    link.textContent = label;
+                    link.className = 'underline mr-4';
+                    links.appendChild(link);
+                });
+                content.appendChild(links);
+            }
+        }
+
+        function handleLine(line) {
+            if (line.trim() === '') return;
+            if (line.startsWith('TRACE SUMMARY: ')) {
+                streamEntry = null;
+                addTraceSummary(JSON.parse(line.slice('TRACE SUMMARY: '.length)));
+                return;
+            }
+            if (line.startsWith('LLM STREAM: ')) {
+                if (!streamEntry) streamEntry = addLogEntry('', 'llm');
+                streamEntry.textContent += JSON.parse(line.slice('LLM STREAM: '.length));
+                logOutput.scrollTop = logOutput.scrollHeight;
+                return;
+            }
+            streamEntry = null;
+            let type = 'agent';
+            if (line.startsWith('LLM')) type = 'llm';
+            if (line.startsWith('TOOL CALL')) type = 'tool-call';
+            if (line.startsWith('TOOL RESPONSE')) type = 'tool-response';
+            if (line.startsWith('ERROR')) type = 'error';
+            addLogEntry(line, type);
         }
 
         form.addEventListener('submit', async (e) => {
@@ -94,26 +175,23 @@ HTML_TEMPLATE = """
                 body: JSON.stringify({ prompt: prompt })
             });
 
+            sessionId = response.headers.get('X-Session-Id');
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
+            let buffer = '';
+            streamEntry = null;
 
             while (true) {
                 const { value, done } = await reader.read();
                 if (done) break;
                 
-                const chunk = decoder.decode(value);
-                const lines = chunk.split('\\n');
-                
-                lines.forEach(line => {
-                    if (line.trim() === '') return;
-                    let type = 'agent';
-                    if (line.startsWith('LLM')) type = 'llm';
-                    if (line.startsWith('TOOL CALL')) type = 'tool-call';
-                    if (line.startsWith('TOOL RESPONSE')) type = 'tool-response';
-                    if (line.startsWith('ERROR')) type = 'error';
-                    addLogEntry(line, type);
-                });
+                // A read can end mid-line; keep the incomplete tail for the next chunk.
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
             }
+            handleLine(buffer);
 
             submitBtn.disabled = false;
             submitBtn.textContent = 'Execute Plan';
@@ -140,16 +218,71 @@ def run_agent_endpoint():
     if not prompt:
         return Response("Error: Prompt is required.", status=400)
 
-    agent = AutonomousAgent()
+    # The agent runs in the session pool; this request thread only relays its log.
+    try:
+        session = session_manager.submit(prompt, data.get('unity_url'))
+    except SessionRejected as e:
+        return Response(f"Error: {e}", status=503, headers={"Retry-After": "5"})
+    except ValueError as e:
+        return Response(f"Error: {e}", status=400)
     
     def event_stream():
-        # The agent's run method is a generator. We yield each message
-        # from it as a separate event in the stream.
-        for message in agent.run(prompt):
-            yield f"{message}\n"
+        # Each line the agent produces is sent as a separate event in the stream.
+        try:
+            for message in session.stream():
+                yield f"{message}\n"
+        finally:
+            # Also reached when the client disconnects: stop the agent rather
+            # than let it keep driving Unity for nobody.
+            session_manager.cancel(session.id)
     
-    # The Response object is configured to stream the output.
-    return Response(event_stream(), mimetype='text/plain')
+    # The Response object is configured to stream the output. Disabling caching and
+    # proxy buffering lets streamed tokens reach the browser as they are produced.
+    return Response(event_stream(), mimetype='text/plain',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session.id})
+
+@app.route('/sessions', methods=['GET'])
+def sessions_endpoint():
+    """Lists running, queued and recently finished agent sessions."""
+    return jsonify(session_manager.status())
+
+@app.route('/unity_instances', methods=['GET'])
+def unity_instances_endpoint():
+    """Reports health, pinned sessions and utilization of every Unity instance."""
+    return jsonify(get_unity_pool().metrics())
+
+@app.route('/plan_cache', methods=['GET'])
+def plan_cache_endpoint():
+    """Reports hit rate, evictions and invalidations of the cached tool-call plans."""
+    return jsonify(get_plan_cache().stats())
+
+@app.route('/sessions/<session_id>/trace', methods=['GET'])
+def session_trace_endpoint(session_id):
+    """
+    Returns a session's trace: Chrome trace JSON by default (opens in ui.perfetto.dev),
+    '?format=jsonl' for one span per line or '?format=summary' for the aggregates.
+    """
+    session = session_manager.get(session_id)
+    if session is None or session.trace is None:
+        return jsonify({"success": False, "error": f"No trace for session '{session_id}'."}), 404
+    trace_format = request.args.get('format', 'chrome')
+    if trace_format == 'summary':
+        return jsonify(session.trace.summary())
+    if trace_format == 'jsonl':
+        return Response(session.trace.to_jsonl(), mimetype='application/x-ndjson',
+                        headers={"Content-Disposition": f"attachment; filename=trace-{session.trace.id}.jsonl"})
+    if trace_format == 'chrome':
+        return Response(json.dumps(session.trace.to_chrome(), default=str), mimetype='application/json',
+                        headers={"Content-Disposition": f"attachment; filename=trace-{session.trace.id}.json"})
+    return jsonify({"success": False, "error": f"Unknown trace format '{trace_format}'. Use chrome, jsonl or summary."}), 400
+
+@app.route('/sessions/<session_id>/cancel', methods=['POST'])
+def cancel_session_endpoint(session_id):
+    """Stops a running session or removes a queued one."""
+    if session_manager.get(session_id) is None:
+        return jsonify({"success": False, "error": f"Unknown session '{session_id}'."}), 404
+    session_manager.cancel(session_id)
+    return jsonify({"success": True})
 
 if __name__ == '__main__':
     # Perform a check to ensure the Unity assets path is configured.
@@ -165,4 +298,9 @@ if __name__ == '__main__':
         print("Open http://127.0.0.1:5002 in your browser.")
         print("Make sure your Unity project is open and in Play mode.")
         print("="*60)
-        app.run(host='0.0.0.0', port=5002, debug=False) 
\ No newline at end of file
+        if config.OPENAI_WARMUP_ON_STARTUP:
+            # Warm the shared connection pool in the background so startup is not delayed.
+            threading.Thread(target=warm_up, daemon=True).start()
+        # Request threads only relay session output; the agent work itself is
+        # bounded by the session pool (config.AGENT_MAX_SESSIONS).
+        app.run(host='0.0.0.0', port=5002, debug=False, threaded=True) 
\ No newline at end of file
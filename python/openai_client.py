@@ -0,0 +1,78 @@
+# openai_client.py
+#
+# Process-wide OpenAI client. Every AutonomousAgent and the vision tool share
+# one client and therefore one httpx connection pool, so model calls reuse
+# warm TLS connections instead of handshaking on every request.
+
+import threading
+import time
+
+import config
+import recorder
+import tracing
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _build_client():
+    import httpx
+    from openai import OpenAI
+
+    limits = httpx.Limits(
+        max_connections=config.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY,
+    )
+    http_client = httpx.Client(
+        # Sent through the recorder, which passes requests straight through unless recording or replaying.
+        transport=recorder.wrap_transport("openai", httpx.HTTPTransport(limits=limits)),
+        timeout=httpx.Timeout(config.OPENAI_TIMEOUT, connect=config.OPENAI_CONNECT_TIMEOUT),
+        # Counts every attempt, including the SDK's own retries, on the current trace span.
+        event_hooks={"request": [tracing.count_http_request]},
+    )
+    return OpenAI(
+        api_key=config.OPENAI_API_KEY or "replay",
+        base_url=config.OPENAI_BASE_URL,
+        max_retries=config.OPENAI_MAX_RETRIES,
+        http_client=http_client,
+    )
+
+
+def get_openai_client():
+    """Returns the shared OpenAI client, creating it (and its connection pool) on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # A replayed session never reaches OpenAI, so it needs no key.
+                active = recorder.get_recorder()
+                if not (active and active.replaying) and (not config.OPENAI_API_KEY or config.OPENAI_API_KEY == "YOUR_OPENAI_API_KEY"):
+                    raise ValueError("OpenAI API key is not configured in config.py.")
+                _client = _build_client()
+    return _client
+
+
+def warm_up() -> dict:
+    """
+    Opens a connection to the OpenAI API ahead of the first user request, so
+    that request does not pay for DNS, TCP and TLS setup.
+    """
+    start = time.perf_counter()
+    try:
+        get_openai_client().models.list()
+    except Exception as e:
+        print(f"OPENAI: Warm-up failed: {e}")
+        return {"success": False, "error": str(e)}
+    elapsed = time.perf_counter() - start
+    print(f"OPENAI: Connection pool warmed up in {elapsed * 1e3:.0f} ms.")
+    return {"success": True, "elapsed": elapsed}
+
+
+def reset_client():
+    """Closes the shared client; the next get_openai_client() builds a new one."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
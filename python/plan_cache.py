@@ -0,0 +1,278 @@
+# plan_cache.py
+#
+# Cache of verified tool-call plans, shared by every session and persisted
+# across server restarts. People often ask for the same scene again (or
+# almost the same one); replaying the scene-changing calls that built it last
+# time skips most of the LLM turns the agent would need to rediscover them.
+#   - a plan is recorded only when a run ends with the scene passing
+#     verification; it keeps the successful scene-changing calls of the run
+#     (PLAN_TOOLS), in order, with the object ids Unity assigned
+#   - prompts are normalized (lower-cased, stopwords dropped) and matched by
+#     token-sequence similarity; PLAN_CACHE_MIN_SIMILARITY decides what counts
+#     as a close match. An exact match whose replay passes verification ends
+#     the run without an LLM turn; any other hit leaves the delta to the agent
+#   - on replay, ids Unity assigns anew are mapped onto later update and delete
+#     calls, so a plan also applies to a scene where the counters moved on
+#   - eviction is LRU with a TTL. Every entry stores a hash of TOOL_DEFINITIONS;
+#     entries made for other tool definitions, and plans whose replay failed,
+#     are dropped
+#
+# A plan is replayed onto whatever the scene holds. Plans for a whole scene
+# usually start with clear_scene or a "replace" spec, so that is harmless.
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+# Tools whose calls are recorded and replayed. Reads, captures, simulations and
+# scripts are left to the agent: they either change nothing or are not repeatable.
+PLAN_TOOLS = ("clear_scene", "download_and_import_model", "spawn_object", "spawn_objects",
+              "update_object", "delete_object", "set_lighting", "apply_scene_spec")
+
+# Filler words that do not change what the scene should contain.
+STOPWORDS = {
+    "a", "an", "the", "and", "please", "can", "could", "would", "you", "i", "me", "my", "we", "us",
+    "want", "like", "need", "to", "some", "create", "make", "build", "generate", "set", "up", "put",
+    "add", "place", "scene", "unity", "that", "this", "there", "is", "are", "be", "with", "containing",
+}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-cases the prompt and keeps its words and numbers in order, without stopwords."""
+    return " ".join(token for token in re.findall(r"[a-z0-9]+(?:\.[0-9]+)?", prompt.lower()) if token not in STOPWORDS)
+
+
+def similarity(first: str, second: str) -> float:
+    """Similarity (0-1) of two normalized prompts, compared word by word."""
+    if first == second:
+        return 1.0
+    return difflib.SequenceMatcher(None, first.split(), second.split(), autojunk=False).ratio()
+
+
+def tools_hash(tool_definitions: list = None) -> str:
+    """Hash of the tool definitions a plan was recorded against."""
+    if tool_definitions is None:
+        from tools import TOOL_DEFINITIONS as tool_definitions
+    return hashlib.sha256(json.dumps(tool_definitions, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def plan_steps(executed: list) -> list:
+    """
+    Picks the replayable part of a run.
+
+    :param executed: (function_name, arguments dict, result) of every tool call the run made, in order.
+    :return: [{"tool", "arguments", "object_ids"}] for the calls in PLAN_TOOLS that succeeded. For
+             spawn_objects only the items that were spawned are kept; "object_ids" lists the ids
+             Unity gave the spawned objects, aligned with the spawns.
+    """
+    steps = []
+    for name, arguments, result in executed:
+        if name not in PLAN_TOOLS or not isinstance(result, dict) or result.get("dry_run"):
+            continue
+        if name == "spawn_objects":
+            items = arguments.get("objects") or []
+            spawned = [item for item in result.get("results") or []
+                       if item.get("success") and item.get("index", -1) < len(items)]
+            if spawned:
+                steps.append({"tool": name, "arguments": dict(arguments, objects=[items[item["index"]] for item in spawned]),
+                              "object_ids": [item.get("object_id") for item in spawned]})
+        elif result.get("success"):
+            steps.append({"tool": name, "arguments": arguments,
+                          "object_ids": [result.get("object_id")] if name == "spawn_object" else []})
+    return steps
+
+
+def remap_ids(step: dict, id_map: dict) -> dict:
+    """Returns the arguments of a step with object ids that were assigned anew replaced."""
+    arguments = step["arguments"]
+    if step["tool"] in ("update_object", "delete_object") and arguments.get("object_id") in id_map:
+        return dict(arguments, object_id=id_map[arguments["object_id"]])
+    return arguments
+
+
+def assigned_ids(step: dict, result: dict) -> dict:
+    """Maps the ids a spawn step got when recorded onto the ids it got now."""
+    if step["tool"] == "spawn_object":
+        now = [result.get("object_id")]
+    elif step["tool"] == "spawn_objects":
+        now = [item.get("object_id") for item in result.get("results") or []]
+    else:
+        return {}
+    return {old: new for old, new in zip(step["object_ids"], now) if old and new and old != new}
+
+
+class PlanCache:
+    """
+    Thread-safe LRU/TTL cache of verified plans, keyed by normalized prompt.
+
+    :param max_entries: Maximum number of cached plans.
+    :param ttl: Seconds a plan stays valid (0 disables expiry).
+    :param path: Optional JSON file used to persist the cache.
+    :param min_similarity: Lowest prompt similarity that still counts as a hit.
+    :param tool_definitions: The tool definitions plans must have been recorded against; defaults to tools.TOOL_DEFINITIONS.
+    """
+    def __init__(self, max_entries: int = None, ttl: float = None, path: str = None, min_similarity: float = None,
+                 tool_definitions: list = None):
+        self.max_entries = config.PLAN_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = config.PLAN_CACHE_TTL if ttl is None else ttl
+        self.path = config.PLAN_CACHE_PATH if path is None else path
+        self.min_similarity = config.PLAN_CACHE_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self.tools_hash = tools_hash(tool_definitions)
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.replay_failures = 0
+        self.turns_saved = 0
+        self._entries = OrderedDict()  # normalized prompt -> {"prompt", "steps", "reply", "llm_turns", "tools_hash", "created", "hits"}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def lookup(self, prompt: str):
+        """
+        Returns the cached plan closest to `prompt`, or None.
+        The plan is a copy of the entry plus "key" and "similarity".
+        """
+        key = normalize_prompt(prompt)
+        with self._lock:
+            self._load()
+            self._expire()
+            best, best_similarity = None, self.min_similarity
+            for candidate in ([key] if key in self._entries else self._entries):
+                score = similarity(key, candidate)
+                if score >= best_similarity:
+                    best, best_similarity = candidate, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            entry = self._entries[best]
+            entry["hits"] += 1
+            self.hits += 1
+            self.exact_hits += best == key
+            return dict(entry, key=best, similarity=round(best_similarity, 3))
+
+    def record(self, prompt: str, executed: list, reply: str, llm_turns: int, replayed: dict = None):
+        """
+        Stores the plan of a run that passed verification. Runs without scene changes are not stored.
+
+        :param executed: (function_name, arguments dict, result) of every tool call, replayed ones included.
+        :param reply: The agent's final answer, repeated when an exact match needs no LLM turn.
+        :param llm_turns: LLM turns the run took.
+        :param replayed: The plan this run started from, if it was a hit.
+        """
+        steps = plan_steps(executed)
+        if not steps:
+            return
+        key = normalize_prompt(prompt)
+        with self._lock:
+            self._load()
+            if replayed is not None:
+                self.turns_saved += max(0, replayed["llm_turns"] - llm_turns)
+            previous = self._entries.get(key)
+            self._entries[key] = {
+                "prompt": prompt,
+                "steps": steps,
+                "reply": reply,
+                # A replayed run's own turn count only covers the delta.
+                "llm_turns": max(llm_turns, previous["llm_turns"] if previous else 0, replayed["llm_turns"] if replayed else 0),
+                "tools_hash": self.tools_hash,
+                "created": time.time(),
+                "hits": previous["hits"] if previous else 0,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._save()
+
+    def invalidate(self, key: str, replay_failed: bool = False):
+        """Drops the plan stored under a normalized prompt, e.g. after its replay failed."""
+        with self._lock:
+            self._load()
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+                self._save()
+            self.replay_failures += replay_failed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "replay_failures": self.replay_failures,
+            "llm_turns_saved": self.turns_saved,
+        }
+
+    # --- Internals (called with the lock held) ---
+    def _usable(self, entry: dict) -> bool:
+        return entry.get("tools_hash") == self.tools_hash and not (self.ttl and time.time() - entry["created"] > self.ttl)
+
+    def _expire(self):
+        stale = [key for key, entry in self._entries.items() if not self._usable(entry)]
+        for key in stale:
+            del self._entries[key]
+            self.invalidations += 1
+        if stale:
+            self._save()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+            for entry in stored.get("entries", []):
+                self._entries[normalize_prompt(entry["prompt"])] = entry
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"PLAN CACHE: Ignoring unreadable cache file {self.path}: {e}")
+        # Plans recorded against other tool definitions can not be replayed.
+        self._expire()
+
+    def _save(self):
+        if not self.path:
+            return
+        temp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(temp_path, "w") as f:
+                json.dump({"entries": list(self._entries.values())}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"PLAN CACHE: Could not persist cache to {self.path}: {e}")
+
+
+# --- Shared cache ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache:
+    """Returns the process-wide PlanCache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PlanCache()
+    return _cache
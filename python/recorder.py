@@ -0,0 +1,423 @@
+# recorder.py
+#
+# Record/replay of everything the agent exchanges with the outside world, so
+# agent changes can be benchmarked offline and deterministically.
+#   - the OpenAI client (httpx), UnityClient and AssetCache (requests) send
+#     through the wrappers in this module. Without an active recorder they
+#     pass requests straight through
+#   - "record" mode sends as usual and appends each exchange (request key,
+#     status, headers, body and timing) to a JSONL cassette. Bodies over
+#     RECORDER_INLINE_LIMIT (captured frames, model files) are stored once per
+#     hash in a <cassette>.blobs folder
+#   - "replay" mode never touches the network. Each request is answered from
+#     the cassette, first by an exact match on method, path and body, then in
+#     recorded order among requests of the same shape, so bodies that embed
+#     timings still find their answer. GET and HEAD requests that run past the
+#     recording repeat the last answer. Recorded connection errors and
+#     timeouts are raised again
+#   - replay latency is the recorded latency scaled by RECORDER_LATENCY
+#     (0 = instant). Streamed completions keep their chunk timing
+#
+# Record a session from the web UI, then benchmark against it offline:
+#   RECORDER_MODE=record RECORDER_CASSETTE=fox.jsonl python main.py
+#   python benchmarks/bench_agent_replay.py replay
+# The curl transport (UNITY_HTTP_MODE="curl") and "file" vision captures bypass the recorder.
+
+import atexit
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import config
+
+MODES = ("record", "replay")
+CASSETTE_VERSION = 1
+# Headers describing how a body was transferred; requests has already decoded it.
+TRANSFER_HEADERS = {"content-encoding", "transfer-encoding", "connection", "keep-alive"}
+
+
+def request_key(channel: str, method: str, url: str, body: bytes, byte_range: str = None, match_host: bool = False) -> tuple:
+    """
+    Returns (key, shape) for a request. The key identifies it exactly; the shape
+    (channel, method, path and, for JSON bodies, their top-level fields) groups
+    requests that are answered in recorded order when no exact match is left.
+    """
+    parts = urlsplit(url)
+    target = (parts.netloc if match_host else "") + parts.path + (f"?{parts.query}" if parts.query else "")
+    shape = f"{channel} {method} {target}" + (f" range={byte_range}" if byte_range else "")
+    try:
+        payload = json.loads(body) if body else None
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict):
+        shape += " {" + ",".join(sorted(payload)) + "}"
+    key = hashlib.sha256(shape.encode("utf-8") + b"\0" + body).hexdigest()
+    return key, shape
+
+
+class Recorder:
+    """
+    A cassette being recorded or replayed.
+
+    :param path: The cassette file (JSONL).
+    :param mode: "record" or "replay".
+    :param latency: Replay delay as a multiple of the recorded one (default config.RECORDER_LATENCY).
+    """
+    def __init__(self, path, mode: str, latency: float = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown recorder mode '{mode}'. Expected one of {MODES}.")
+        self.path = Path(path)
+        self.blob_dir = self.path.with_suffix(".blobs")
+        self.mode = mode
+        self.latency = config.RECORDER_LATENCY if latency is None else latency
+        self.stats = {"recorded": 0, "exact": 0, "by_order": 0, "repeated": 0, "missed": 0}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._file = None
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._write({"type": "cassette", "version": CASSETTE_VERSION, "created_at": time.time()})
+        else:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+        if self.replaying:
+            print(f"RECORDER: Replayed {self.path}: {self.summary()}")
+        else:
+            print(f"RECORDER: Recorded {self.stats['recorded']} exchanges to {self.path}")
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = dict(self.stats)
+            if self.replaying:
+                summary["unused"] = self._used.count(False)
+        return summary
+
+    # --- Recording ---
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def _store(self, body: bytes) -> dict:
+        if len(body) > config.RECORDER_INLINE_LIMIT:
+            digest = hashlib.sha256(body).hexdigest()
+            blob = self.blob_dir / digest
+            if not blob.exists():
+                self.blob_dir.mkdir(parents=True, exist_ok=True)
+                temp = blob.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                temp.write_bytes(body)
+                os.replace(temp, blob)
+            return {"blob": digest, "size": len(body)}
+        try:
+            return {"text": body.decode("utf-8")}
+        except UnicodeDecodeError:
+            return {"base64": base64.b64encode(body).decode("ascii")}
+
+    def record(self, channel: str, method: str, url: str, key: str, shape: str, status: int = None, reason: str = None,
+               headers: dict = None, body: bytes = b"", elapsed: float = 0.0, chunks: list = None, error: Exception = None):
+        """Appends one exchange. `chunks` are [seconds since the request, bytes so far] pairs of a streamed body."""
+        entry = {"type": "exchange", "channel": channel, "method": method, "url": url, "key": key, "shape": shape,
+                 "elapsed": round(elapsed, 6)}
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": str(error)}
+        else:
+            entry.update(status=status, reason=reason, headers=dict(headers or {}), body=self._store(body))
+            if chunks:
+                entry["chunks"] = chunks
+        with self._lock:
+            if self._closed:
+                return
+            entry["seq"] = self.stats["recorded"]
+            self.stats["recorded"] += 1
+            self._write(entry)
+
+    # --- Replay ---
+    def _load(self):
+        self._entries = []
+        self._exact = {}  # key -> deque of entry indexes
+        self._by_shape = {}  # shape -> deque of entry indexes
+        self._last = {}  # shape -> index of the last entry served
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("type") != "exchange":
+                    continue
+                index = len(self._entries)
+                self._entries.append(record)
+                self._exact.setdefault(record["key"], deque()).append(index)
+                self._by_shape.setdefault(record["shape"], deque()).append(index)
+        self._used = [False] * len(self._entries)
+
+    def _take(self, queue):
+        while queue:
+            index = queue.popleft()
+            if not self._used[index]:
+                self._used[index] = True
+                return index
+        return None
+
+    def replay(self, key: str, shape: str, method: str):
+        """The recorded exchange answering a request, or None if the cassette has none."""
+        with self._lock:
+            kind, index = "exact", self._take(self._exact.get(key))
+            if index is None:
+                kind, index = "by_order", self._take(self._by_shape.get(shape))
+            if index is None and method in ("GET", "HEAD"):
+                kind, index = "repeated", self._last.get(shape)
+            if index is None:
+                self.stats["missed"] += 1
+                print(f"RECORDER: No recorded response for {shape}")
+                return None
+            self.stats[kind] += 1
+            self._last[shape] = index
+            return self._entries[index]
+
+    def body(self, entry: dict) -> bytes:
+        stored = entry.get("body") or {}
+        if "blob" in stored:
+            return (self.blob_dir / stored["blob"]).read_bytes()
+        if "base64" in stored:
+            return base64.b64decode(stored["base64"])
+        return stored.get("text", "").encode("utf-8")
+
+    def wait(self, seconds: float):
+        """Sleeps for a recorded duration, scaled by the replay latency."""
+        if self.latency and seconds > 0:
+            time.sleep(seconds * self.latency)
+
+
+# --- Active recorder ---
+_recorder = None
+_configured = False
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """The active Recorder, or None. The first call sets it up from config.RECORDER_MODE and RECORDER_CASSETTE."""
+    global _recorder, _configured
+    if not _configured:
+        with _recorder_lock:
+            if not _configured:
+                if config.RECORDER_MODE:
+                    _recorder = Recorder(config.RECORDER_CASSETTE, config.RECORDER_MODE)
+                    atexit.register(_recorder.close)
+                    print(f"RECORDER: {config.RECORDER_MODE.capitalize()}ing {config.RECORDER_CASSETTE}")
+                _configured = True
+    return _recorder
+
+
+@contextmanager
+def use_cassette(path, mode: str, latency: float = None):
+    """Records to, or replays from, `path` for the enclosed code instead of the configured cassette."""
+    global _recorder, _configured
+    recorder = Recorder(path, mode, latency)
+    with _recorder_lock:
+        previous = (_recorder, _configured)
+        _recorder, _configured = recorder, True
+    try:
+        yield recorder
+    finally:
+        with _recorder_lock:
+            _recorder, _configured = previous
+        recorder.close()
+
+
+def _error_class(module, name: str, base: type, default: type) -> type:
+    """The exception class a recorded error was raised as, if `module` has it, else `default`."""
+    error = getattr(module, name, None)
+    return error if isinstance(error, type) and issubclass(error, base) else default
+
+
+# --- requests ---
+class RecordingAdapter(BaseAdapter):
+    """
+    A requests transport adapter that records or replays through the active recorder.
+
+    :param channel: Traffic label stored in the cassette, e.g. "unity".
+    :param adapter: The adapter that actually sends requests.
+    :param match_host: Whether the host is part of the match. Off for Unity, whose port differs between runs.
+    """
+    def __init__(self, channel: str, adapter: BaseAdapter, match_host: bool = False):
+        super().__init__()
+        self.channel = channel
+        self.adapter = adapter
+        self.match_host = match_host
+
+    def send(self, request, **kwargs):
+        recorder = get_recorder()
+        if recorder is None:
+            return self.adapter.send(request, **kwargs)
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        key, shape = request_key(self.channel, request.method, request.url, body, request.headers.get("Range"), self.match_host)
+
+        if recorder.replaying:
+            entry = recorder.replay(key, shape, request.method)
+            if entry is None:
+                raise requests.exceptions.ConnectionError(f"No recorded response for {shape}", request=request)
+            recorder.wait(entry["elapsed"])
+            if "error" in entry:
+                error = _error_class(requests.exceptions, entry["error"]["type"], requests.exceptions.RequestException,
+                                     requests.exceptions.ConnectionError)
+                raise error(entry["error"]["message"], request=request)
+            return self._replayed_response(request, entry, recorder.body(entry))
+
+        start = time.perf_counter()
+        try:
+            response = self.adapter.send(request, **kwargs)
+            content = response.content
+        except requests.exceptions.RequestException as e:
+            recorder.record(self.channel, request.method, request.url, key, shape, elapsed=time.perf_counter() - start, error=e)
+            raise
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in TRANSFER_HEADERS}
+        if "Content-Encoding" in response.headers:
+            headers.pop("Content-Length", None)
+        recorder.record(self.channel, request.method, request.url, key, shape, status=response.status_code,
+                        reason=response.reason, headers=headers, body=content, elapsed=time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def _replayed_response(request, entry: dict, body: bytes):
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+# --- httpx ---
+_transport_class = None
+
+
+def wrap_transport(channel: str, transport, match_host: bool = False):
+    """Wraps an httpx transport so its exchanges go through the active recorder (see RecordingAdapter)."""
+    global _transport_class
+    if _transport_class is None:
+        _transport_class = _build_transport_class()
+    return _transport_class(channel, transport, match_host)
+
+
+def _build_transport_class():
+    # httpx is only imported once an OpenAI client is built.
+    import httpx
+
+    class TeeStream(httpx.SyncByteStream):
+        """Passes a response body through while keeping a copy, and its chunk timing, for the cassette."""
+        def __init__(self, stream, start: float, done):
+            self.stream = stream
+            self.start = start
+            self.done = done
+            self.parts = []
+            self.chunks = []
+            self.size = 0
+
+        def __iter__(self):
+            for part in self.stream:
+                self.parts.append(part)
+                self.size += len(part)
+                self.chunks.append([round(time.perf_counter() - self.start, 6), self.size])
+                yield part
+
+        def close(self):
+            self.stream.close()
+            if self.done is not None:
+                done, self.done = self.done, None
+                done(b"".join(self.parts), self.chunks)
+
+    class ReplayStream(httpx.SyncByteStream):
+        """A recorded body, released chunk by chunk at its recorded pace (scaled by the replay latency)."""
+        def __init__(self, body: bytes, chunks: list, latency: float, start: float):
+            self.body = body
+            self.chunks = chunks or [[0.0, len(body)]]
+            self.latency = latency
+            self.start = start
+
+        def __iter__(self):
+            sent = 0
+            for offset, end in self.chunks:
+                if self.latency:
+                    delay = self.start + offset * self.latency - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield self.body[sent:end]
+                sent = end
+            if sent < len(self.body):
+                yield self.body[sent:]
+
+    class RecordingTransport(httpx.BaseTransport):
+        def __init__(self, channel: str, transport, match_host: bool = False):
+            self.channel = channel
+            self.transport = transport
+            self.match_host = match_host
+
+        def handle_request(self, request):
+            recorder = get_recorder()
+            if recorder is None:
+                return self.transport.handle_request(request)
+            body = request.read()
+            url = str(request.url)
+            key, shape = request_key(self.channel, request.method, url, body, request.headers.get("Range"), self.match_host)
+            start = time.perf_counter()
+
+            if recorder.replaying:
+                entry = recorder.replay(key, shape, request.method)
+                if entry is None:
+                    raise httpx.ConnectError(f"No recorded response for {shape}", request=request)
+                recorder.wait(entry["elapsed"])
+                if "error" in entry:
+                    error = _error_class(httpx, entry["error"]["type"], httpx.TransportError, httpx.ConnectError)
+                    raise error(entry["error"]["message"], request=request)
+                return httpx.Response(entry["status"], headers=entry["headers"], request=request,
+                                      stream=ReplayStream(recorder.body(entry), entry.get("chunks"), recorder.latency, start))
+
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                recorder.record(self.channel, request.method, url, key, shape, elapsed=time.perf_counter() - start, error=e)
+                raise
+            elapsed = time.perf_counter() - start
+
+            def done(content: bytes, chunks: list):
+                recorder.record(self.channel, request.method, url, key, shape, status=response.status_code,
+                                reason=response.reason_phrase, headers=dict(response.headers), body=content,
+                                elapsed=elapsed, chunks=chunks if len(chunks) > 1 else None)
+
+            return httpx.Response(response.status_code, headers=response.headers, request=request,
+                                  extensions=response.extensions, stream=TeeStream(response.stream, start, done))
+
+        def close(self):
+            self.transport.close()
+
+    return RecordingTransport
@@ -0,0 +1,448 @@
+# scene_spec.py
+#
+# Declarative scene specs. A whole scene (objects, transforms, colors,
+# imported models and lighting) is described in one JSON or YAML document,
+# which the agent emits in a single apply_scene_spec call instead of one
+# spawn per turn.
+#   - load_spec() parses JSON, or YAML when PyYAML is installed
+#   - compile_spec() validates the spec and expands it into spawn payloads,
+#     reporting every problem at once with its path ("objects[3].color")
+#   - models named by a search query are found and imported with the search
+#     and download tools, in parallel, and remembered for the process
+#   - spec ids are the scene's object ids. plan_changes() diffs the compiled
+#     spec against the scene mirror by id: objects already in place are kept,
+#     moved/rescaled/recolored ones are updated in place, missing ones are
+#     spawned and, for a "replace" spec, objects not in the spec are deleted.
+#     Each kind of change goes to Unity as one batch request, and the lighting
+#     is set only if it differs
+#   - re-applying a spec that is already in place sends no scene commands
+#
+# Example:
+#   {"lighting": "sunset",
+#    "objects": [{"id": "robot", "shape": "cube", "position": [0, 0.5, 0], "color": "blue"},
+#                {"id": "fox", "model": "fox", "position": [3, 0, 0]},
+#                {"id": "post", "shape": "cylinder", "position": [-4, 1, 0], "scale": [0.3, 2, 0.3],
+#                 "count": 5, "offset": [0, 0, 2]}]}
+#
+# Apply a spec file directly (from the python/ folder):
+#   python scene_spec.py my_scene.yaml --dry-run
+
+import contextvars
+import json
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import config
+from scene_state import PRIMITIVE_TYPES, WHITE, get_scene_mirror, predicted_name
+from verifier import COLORS, COLOR_ALIASES
+
+LIGHTING_PRESETS = ("day", "night", "sunset")
+MODES = ("replace", "add")
+SPEC_FIELDS = {"objects", "lighting", "mode"}
+OBJECT_FIELDS = {"id", "shape", "model", "position", "scale", "color", "count", "offset"}
+MODEL_EXTENSIONS = (".glb", ".gltf")
+ORIGIN = {"x": 0.0, "y": 0.0, "z": 0.0}
+UNIT_SCALE = {"x": 1.0, "y": 1.0, "z": 1.0}
+
+_resolved = {}  # model query -> download_and_import_model result, for this process
+_resolved_lock = threading.Lock()
+
+
+class SpecError(ValueError):
+    """A spec that cannot be parsed or is invalid. `problems` lists every issue found."""
+    def __init__(self, problems: list):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def unity_name(object_name: str) -> str:
+    """The GameObject name SceneController gives a spawned primitive or model."""
+    return predicted_name(object_name) or f"Model_{object_name.replace('.glb', '')}"
+
+
+# --- Parsing and validation ---
+def load_spec(source) -> dict:
+    """Parses a spec given as a dict, as JSON or YAML text, or as a path to a .json/.yaml/.yml file."""
+    if isinstance(source, dict):
+        return source
+    text = str(source)
+    if isinstance(source, Path) or (text.strip().endswith((".json", ".yaml", ".yml")) and "\n" not in text.strip()):
+        try:
+            text = Path(text.strip()).read_text(encoding="utf-8")
+        except OSError as e:
+            raise SpecError([f"cannot read spec file: {e}"])
+    try:
+        spec = json.loads(text)
+    except ValueError as json_error:
+        try:
+            import yaml
+        except ImportError:
+            raise SpecError([f"not valid JSON ({json_error}); YAML specs need PyYAML installed"])
+        try:
+            spec = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise SpecError([f"neither valid JSON nor valid YAML: {e}"])
+    if not isinstance(spec, dict):
+        raise SpecError(["a spec must be an object with an 'objects' list"])
+    return spec
+
+
+def _number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _vector(value, path: str, problems: list, default: dict, keys: str = "xyz", uniform: bool = False):
+    """A {x, y, z} (or {r, g, b}) dict from a dict, a 3-item list or (if `uniform`) a single number."""
+    if value is None:
+        return dict(default)
+    if uniform and _number(value):
+        return {key: float(value) for key in keys}
+    if isinstance(value, (list, tuple)) and len(value) == len(keys) and all(_number(item) for item in value):
+        return {key: float(item) for key, item in zip(keys, value)}
+    if isinstance(value, dict) and set(value) <= set(keys) and all(_number(item) for item in value.values()):
+        return {key: float(value.get(key, default[key])) for key in keys}
+    shapes = f"[{', '.join(keys)}] or {{{', '.join(keys)}}}" + (" or a number" if uniform else "")
+    problems.append(f"{path}: expected {shapes}, got {value!r}")
+    return dict(default)
+
+
+def _color(value, path: str, problems: list):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        name = COLOR_ALIASES.get(value.strip().lower(), value.strip().lower())
+        if name in COLORS:
+            return {key: float(channel) for key, channel in zip("rgb", COLORS[name])}
+        if re.fullmatch(r"#?[0-9a-fA-F]{6}", value.strip()):
+            digits = value.strip().lstrip("#")
+            return {key: int(digits[i:i + 2], 16) / 255 for key, i in zip("rgb", (0, 2, 4))}
+        problems.append(f"{path}: unknown color {value!r} (use a name like {', '.join(list(COLORS)[:4])}, '#rrggbb' or [r, g, b])")
+        return None
+    color = _vector(value, path, problems, WHITE, "rgb")
+    if any(not 0.0 <= channel <= 1.0 for channel in color.values()):
+        problems.append(f"{path}: color channels must be between 0 and 1")
+    return color
+
+
+def compile_spec(spec: dict) -> dict:
+    """
+    Validates a spec and expands it into the objects it describes.
+
+    :return: {"objects": [{"id", "object_name", "model", "position", "scale", "color"}], "lighting", "mode", "warnings"}.
+             "object_name" is None for models that still have to be resolved.
+    :raises SpecError: With every problem found.
+    """
+    problems, warnings = [], []
+    for field in sorted(set(spec) - SPEC_FIELDS):
+        problems.append(f"{field}: unknown field (expected {', '.join(sorted(SPEC_FIELDS))})")
+    lighting = spec.get("lighting")
+    if lighting is not None and (not isinstance(lighting, str) or lighting.lower() not in LIGHTING_PRESETS):
+        problems.append(f"lighting: expected one of {', '.join(LIGHTING_PRESETS)}, got {lighting!r}")
+    mode = spec.get("mode", "replace")
+    if mode not in MODES:
+        problems.append(f"mode: expected one of {', '.join(MODES)}, got {mode!r}")
+    entries = spec.get("objects")
+    if not isinstance(entries, list):
+        problems.append("objects: expected a list of objects")
+        entries = []
+
+    objects, counters = [], {}
+    for index, entry in enumerate(entries):
+        path = f"objects[{index}]"
+        if not isinstance(entry, dict):
+            problems.append(f"{path}: expected an object, got {entry!r}")
+            continue
+        for field in sorted(set(entry) - OBJECT_FIELDS):
+            problems.append(f"{path}.{field}: unknown field (expected {', '.join(sorted(OBJECT_FIELDS))})")
+        shape, model = entry.get("shape"), entry.get("model")
+        if (shape is None) == (model is None):
+            problems.append(f"{path}: give exactly one of 'shape' (a primitive) or 'model' (a search query or .glb file)")
+            continue
+        if shape is not None and (not isinstance(shape, str) or shape.lower() not in PRIMITIVE_TYPES):
+            problems.append(f"{path}.shape: expected one of {', '.join(sorted(PRIMITIVE_TYPES))}, got {shape!r}")
+            continue
+        if model is not None and (not isinstance(model, str) or not model.strip()):
+            problems.append(f"{path}.model: expected a search query or model file name, got {model!r}")
+            continue
+
+        position = _vector(entry.get("position"), f"{path}.position", problems, ORIGIN)
+        scale = _vector(entry.get("scale"), f"{path}.scale", problems, UNIT_SCALE, uniform=True)
+        offset = _vector(entry.get("offset"), f"{path}.offset", problems, ORIGIN)
+        color = _color(entry.get("color"), f"{path}.color", problems)
+        if model is not None and color is not None:
+            warnings.append(f"{path}.color: ignored, imported models keep their own materials")
+            color = None
+        count = entry.get("count", 1)
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            problems.append(f"{path}.count: expected a positive integer, got {count!r}")
+            count = 1
+
+        noun = shape.lower() if shape is not None else re.sub(r"\W+", "_", Path(model.strip()).stem.lower())
+        base_id = entry.get("id")
+        if base_id is not None and not isinstance(base_id, str):
+            problems.append(f"{path}.id: expected a string, got {base_id!r}")
+            base_id = None
+        for copy in range(count):
+            if base_id is None:
+                counters[noun] = counters.get(noun, 0) + 1
+                object_id = f"{noun}_{counters[noun]}"
+            else:
+                object_id = base_id if count == 1 else f"{base_id}_{copy + 1}"
+            resolved = shape.lower() if shape is not None else model.strip() if model.strip().lower().endswith(MODEL_EXTENSIONS) else None
+            objects.append({
+                "id": object_id,
+                "anonymous": base_id is None,
+                "object_name": resolved,
+                "model": model.strip() if model is not None else None,
+                "position": {axis: position[axis] + offset[axis] * copy for axis in "xyz"},
+                "scale": scale,
+                "color": color,
+            })
+
+    seen = set()
+    for obj in objects:
+        if obj["id"] in seen:
+            problems.append(f"id {obj['id']!r} is used more than once")
+        seen.add(obj["id"])
+    if len(objects) > config.SCENE_SPEC_MAX_OBJECTS:
+        problems.append(f"objects: {len(objects)} objects, over the limit of {config.SCENE_SPEC_MAX_OBJECTS}")
+    if problems:
+        raise SpecError(problems)
+    return {"objects": objects, "lighting": lighting.lower() if lighting else None, "mode": mode, "warnings": warnings}
+
+
+# --- Model resolution ---
+def _resolve_model(query: str, search, download) -> dict:
+    with _resolved_lock:
+        cached = _resolved.get(query.lower())
+    if cached is not None and Path(cached["file_path"]).exists():
+        return cached
+    found = search(query)
+    if not found.get("success"):
+        return found
+    imported = download(found["model_name"], found["download_url"])
+    if imported.get("success") and "file_path" in imported:
+        with _resolved_lock:
+            _resolved[query.lower()] = imported
+    return imported
+
+
+def resolve_models(objects: list, search=None, download=None) -> tuple:
+    """
+    Fills in "object_name" for objects whose model is a search query, importing each distinct model once.
+
+    :param search: search_web_for_3d_model-style callable; defaults to the tool.
+    :param download: download_and_import_model-style callable; defaults to the tool.
+    :return: ({query: model file name}, [problems]).
+    """
+    if search is None or download is None:
+        import tools
+        search, download = search or tools.search_web_for_3d_model, download or tools.download_and_import_model
+    queries = sorted({obj["model"] for obj in objects if obj["object_name"] is None})
+    if not queries:
+        return {}, []
+    with ThreadPoolExecutor(max_workers=min(len(queries), config.SCENE_SPEC_MODEL_WORKERS),
+                            thread_name_prefix="scene-spec") as pool:
+        # Each resolution runs in a copy of this context, so it stays on this session's trace.
+        futures = {query: pool.submit(contextvars.copy_context().run, _resolve_model, query, search, download)
+                   for query in queries}
+        results = {query: future.result() for query, future in futures.items()}
+
+    resolved, problems = {}, []
+    for query, result in results.items():
+        if result.get("success"):
+            resolved[query] = result["model_filename"]
+        else:
+            problems.append(f"model {query!r}: {result.get('error')}")
+    for obj in objects:
+        if obj["object_name"] is None and obj["model"] in resolved:
+            obj["object_name"] = resolved[obj["model"]]
+    return resolved, problems
+
+
+def predict_import(model_name: str, download_url: str) -> dict:
+    """The file name download_and_import_model would give a model, without downloading it (for dry runs)."""
+    return {"success": True, "model_filename": f"{model_name.replace(' ', '_').lower()}.{download_url.split('.')[-1]}"}
+
+
+# --- Diff ---
+def _close(first: dict, second: dict, keys: str = "xyz") -> bool:
+    tolerance = config.SCENE_SPEC_TOLERANCE
+    return all(abs(float(first.get(key, 0.0)) - float(second.get(key, 0.0))) <= tolerance for key in keys)
+
+
+def differences(obj: dict, scene_object: dict):
+    """
+    What update_object would have to change to turn a scene object into a compiled spec object:
+    {"position"/"scale"/"color": value}, or None if it is a different kind of object and must be respawned.
+    """
+    if scene_object["name"] != unity_name(obj["object_name"]):
+        return None
+    changes = {}
+    if not _close(scene_object["position"], obj["position"]):
+        changes["position"] = obj["position"]
+    if scene_object["name"].startswith("Model_"):
+        # SceneController rescales models to a target size, so their scale is not the requested one.
+        return changes
+    if not _close(scene_object.get("scale") or UNIT_SCALE, obj["scale"]):
+        changes["scale"] = obj["scale"]
+    if scene_object.get("has_color", True) and not _close(scene_object.get("color") or WHITE, obj["color"] or WHITE, "rgb"):
+        changes["color"] = obj["color"] or WHITE
+    return changes
+
+
+def _free_id(noun: str, taken: set) -> str:
+    counter = 1
+    while f"{noun}_{counter}" in taken:
+        counter += 1
+    return f"{noun}_{counter}"
+
+
+def plan_changes(compiled: dict, scene_objects: list, current_lighting: str = None) -> dict:
+    """
+    Diffs compiled spec objects against the scene by object id.
+
+    Spec ids are the scene's object ids. In "add" mode, objects without an id of
+    their own keep an identical scene object if there is one, and otherwise get
+    the first "<noun>_<n>" id not yet in the scene.
+
+    :return: {"keep": [spec objects already in place], "update": [(spec object, changes)],
+              "spawn": [spec objects to spawn], "delete": [ids to delete], "extra": [scene objects left alone],
+              "assigned": {spec id: scene id}, "lighting": preset to set or None}.
+    """
+    by_id = {scene_object["id"]: scene_object for scene_object in scene_objects if scene_object.get("id")}
+    unclaimed = {scene_object.get("id") or index: scene_object for index, scene_object in enumerate(scene_objects)}
+    taken = set(by_id) | {obj["id"] for obj in compiled["objects"] if not obj["anonymous"]}
+    keep, update, spawn, delete, assigned = [], [], [], [], {}
+    add = compiled["mode"] == "add"
+    for obj in compiled["objects"]:
+        if add and obj["anonymous"]:
+            scene_id = next((key for key, scene_object in unclaimed.items()
+                             if scene_object.get("id") and differences(obj, scene_object) == {}), None)
+            if scene_id is not None:
+                unclaimed.pop(scene_id)
+            else:
+                scene_id = _free_id(obj["id"].rsplit("_", 1)[0], taken)
+                taken.add(scene_id)
+            if scene_id != obj["id"]:
+                assigned[obj["id"]] = scene_id
+            (keep if scene_id in by_id else spawn).append(dict(obj, id=scene_id))
+            continue
+        current = by_id.get(obj["id"])
+        unclaimed.pop(obj["id"], None)
+        changes = differences(obj, current) if current is not None else None
+        if current is not None and changes is None:
+            delete.append(obj["id"])
+            spawn.append(obj)
+        elif current is None:
+            spawn.append(obj)
+        elif changes:
+            update.append((obj, changes))
+        else:
+            keep.append(obj)
+    extra = list(unclaimed.values())
+    if not add:
+        delete.extend(scene_object["id"] for scene_object in extra if scene_object.get("id"))
+        extra = [scene_object for scene_object in extra if not scene_object.get("id")]
+    lighting = compiled["lighting"] if compiled["lighting"] and compiled["lighting"] != current_lighting else None
+    return {"keep": keep, "update": update, "spawn": spawn, "delete": delete, "extra": extra,
+            "assigned": assigned, "lighting": lighting}
+
+
+def spawn_item(obj: dict) -> dict:
+    """The spawn_objects item for a compiled spec object."""
+    item = {"object_name": obj["object_name"], "position": obj["position"], "scale": obj["scale"], "object_id": obj["id"]}
+    if obj["color"] is not None:
+        item["color"] = obj["color"]
+    return item
+
+
+# --- Applying ---
+def apply_spec(spec, dry_run: bool = False) -> dict:
+    """
+    Compiles a spec and applies only what differs from the current scene: one
+    delete_batch, one update_batch and one spawn_batch request at most.
+
+    :param spec: A spec dict, JSON/YAML text or a spec file path.
+    :param dry_run: Search for models and diff, but download nothing and change nothing in Unity.
+    :return: {"success", "created", "updated", "deleted", "kept", "lighting", "models", "failed", "warnings"}
+             (ids), plus "assigned" ({spec id: scene id}) for objects an "add" spec matched or renamed and
+             "other_objects" for objects it left alone; or {"success": False, "error", "problems"}.
+    """
+    import tools
+
+    try:
+        compiled = compile_spec(load_spec(spec))
+    except SpecError as e:
+        return {"success": False, "error": f"Invalid scene spec: {len(e.problems)} problem(s)", "problems": e.problems}
+
+    mirror = get_scene_mirror()
+    models, problems = resolve_models(compiled["objects"], download=predict_import if dry_run else None)
+    if problems:
+        return {"success": False, "error": "Could not resolve every model in the spec", "problems": problems, "models": models}
+    scene_objects, error = mirror.objects()
+    if error:
+        return error
+    plan = plan_changes(compiled, scene_objects, mirror.lighting)
+    print(f"SCENE SPEC: {len(compiled['objects'])} objects: keep {len(plan['keep'])}, update {len(plan['update'])}, "
+          f"spawn {len(plan['spawn'])}, delete {len(plan['delete'])}"
+          f"{', lighting ' + plan['lighting'] if plan['lighting'] else ''}{' (dry run)' if dry_run else ''}")
+
+    result = {
+        "success": True,
+        "created": [obj["id"] for obj in plan["spawn"]],
+        "updated": [obj["id"] for obj, changes in plan["update"]],
+        "deleted": list(plan["delete"]),
+        "kept": [obj["id"] for obj in plan["keep"]],
+        "lighting": plan["lighting"],
+        "models": models,
+        "failed": [],
+        "warnings": compiled["warnings"],
+    }
+    if plan["assigned"]:
+        result["assigned"] = plan["assigned"]
+    if plan["extra"]:
+        result["other_objects"] = [scene_object.get("id") or scene_object["name"] for scene_object in plan["extra"]]
+    if dry_run:
+        return dict(result, dry_run=True)
+
+    # Deletes go first, so an object respawned as a different kind can reuse its id.
+    if plan["delete"]:
+        deleted = tools.delete_objects(plan["delete"])
+        for item in deleted["results"]:
+            if not item["success"]:
+                result["failed"].append({"id": plan["delete"][item["index"]], "error": item.get("error")})
+    if plan["update"]:
+        updated = tools.update_objects([dict(changes, object_id=obj["id"]) for obj, changes in plan["update"]])
+        for item in updated["results"]:
+            if not item["success"]:
+                result["failed"].append({"id": plan["update"][item["index"]][0]["id"], "error": item.get("error")})
+    if plan["spawn"]:
+        spawned = tools.spawn_objects([spawn_item(obj) for obj in plan["spawn"]])
+        for item in spawned["results"]:
+            if not item["success"]:
+                result["failed"].append({"id": plan["spawn"][item["index"]]["id"], "error": item.get("error")})
+    if plan["lighting"]:
+        lit = tools.set_lighting(plan["lighting"])
+        if not lit["success"]:
+            result["failed"].append({"id": "lighting", "error": lit.get("error")})
+            result["lighting"] = None
+
+    failed_ids = {failure["id"] for failure in result["failed"]}
+    for key in ("created", "updated", "deleted"):
+        result[key] = [object_id for object_id in result[key] if object_id not in failed_ids]
+    result["success"] = not result["failed"]
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply a JSON/YAML scene spec to the running Unity scene.")
+    parser.add_argument("spec", help="Path to a .json, .yaml or .yml spec.")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without changing it.")
+    args = parser.parse_args()
+    print(json.dumps(apply_spec(Path(args.spec), dry_run=args.dry_run), indent=2))
@@ -0,0 +1,321 @@
+# scene_state.py
+#
+# A local mirror of the objects spawned in the Unity scene. The agent asks for
+# positions and object lists constantly; answering those in-process saves an
+# HTTP round trip plus a main-thread frame in the editor for every query.
+#
+# Unity bumps a scene version whenever its spawned objects change and sends it
+# in the X-Scene-Version header of every response. After a spawn or clear, the
+# mirror applies the same change locally if the version it gets back is exactly
+# the one that change should produce. Updates and deletes by object id are
+# applied the same way. Anything else leaves the mirror stale,
+# and the next query reloads the 'scene_state' snapshot. That covers GLB loads,
+# simulations, other clients and lost responses. A fresh mirror still asks for
+# 'scene_version' at most every SCENE_MIRROR_CHECK_INTERVAL seconds; Unity
+# answers that on its listener thread, without waiting for a frame.
+
+import itertools
+import json
+import math
+import threading
+import time
+
+import config
+from unity_client import get_unity_client
+
+# Mirrors UnityEngine.PrimitiveType, which SceneController parses case-insensitively.
+PRIMITIVE_TYPES = {"sphere", "capsule", "cylinder", "cube", "plane", "quad"}
+WHITE = {"r": 1.0, "g": 1.0, "b": 1.0}  # Unity's default material color
+
+
+def predicted_name(object_name: str):
+    """
+    The GameObject name SceneController.SpawnObject gives a synchronously spawned
+    object, or None for models that are loaded (and named) asynchronously.
+    """
+    if ".glb" in object_name or ".gltf" in object_name:
+        return None
+    if object_name.lower() in PRIMITIVE_TYPES:
+        return f"Primitive_{object_name}"
+    return f"Unknown_{object_name}"
+
+
+class SceneMirror:
+    """
+    Name- and grid-indexed copy of Unity's spawned objects.
+
+    :param client: The UnityClient to synchronise through; defaults to the shared one.
+    """
+    def __init__(self, client=None):
+        self._client = client
+        self._lock = threading.RLock()
+        self._objects = []  # {"id", "name", "position", "scale", "color", "has_color"} in Unity's spawn order
+        self._by_id = {}  # object id -> object
+        self._find_cache = {}  # lower-cased query -> first matching object
+        self._grid = {}  # cell -> objects whose position falls in it
+        self.version = None
+        self.lighting = None  # last preset set through set_lighting, if Unity knows it
+        self.busy = 0
+        self._stale = True
+        self._checked_at = 0.0
+        self.stats = {"local_queries": 0, "version_checks": 0, "refreshes": 0}
+
+    @property
+    def client(self):
+        return self._client or get_unity_client()
+
+    # --- Index maintenance ---
+    def _cell(self, position: dict) -> tuple:
+        size = config.SCENE_MIRROR_GRID_CELL
+        return tuple(math.floor(float(position.get(axis, 0.0)) / size) for axis in "xyz")
+
+    def _add(self, obj: dict):
+        # Appending keeps cached hits the first match; only misses (which are
+        # not cached) could change. _remove() drops the cache instead.
+        self._objects.append(obj)
+        if obj.get("id"):
+            self._by_id[obj["id"]] = obj
+        self._grid.setdefault(self._cell(obj["position"]), []).append(obj)
+
+    def _remove(self, obj: dict):
+        self._objects.remove(obj)
+        self._by_id.pop(obj.get("id"), None)
+        self._grid[self._cell(obj["position"])].remove(obj)
+        self._find_cache = {}
+
+    def _move(self, obj: dict, position: dict):
+        self._grid[self._cell(obj["position"])].remove(obj)
+        obj["position"] = dict(position)
+        self._grid.setdefault(self._cell(position), []).append(obj)
+
+    def _reset(self, objects: list):
+        self._objects, self._by_id, self._find_cache, self._grid = [], {}, {}, {}
+        for obj in objects:
+            self._add(obj)
+
+    def mark_stale(self):
+        """Forces the next query to reload the snapshot from Unity."""
+        with self._lock:
+            self._stale = True
+
+    # --- Synchronisation ---
+    def refresh(self):
+        """Reloads every object from Unity's 'scene_state' endpoint. Returns an error dict or None."""
+        response = self.client.request("scene_state", {}, "GET")
+        if not response["success"]:
+            return response
+        try:
+            snapshot = json.loads(response["data"])
+        except (TypeError, ValueError):
+            return {"success": False, "error": f"Unexpected scene_state response: {response['data']}"}
+        with self._lock:
+            self._reset(snapshot.get("objects") or [])
+            self.version = snapshot.get("version")
+            self.lighting = snapshot.get("lighting") or None
+            self.busy = snapshot.get("busy", 0)
+            self._stale = False
+            self._checked_at = time.monotonic()
+            self.stats["refreshes"] += 1
+        return None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            stale, busy, checked_at = self._stale, self.busy, self._checked_at
+        # While GLBs load or bodies move, positions change between version bumps.
+        if stale or busy:
+            return self.refresh()
+        if time.monotonic() - checked_at < config.SCENE_MIRROR_CHECK_INTERVAL:
+            return None
+
+        response = self.client.request("scene_version", {}, "GET")
+        try:
+            info = json.loads(response["data"]) if response["success"] else None
+        except (TypeError, ValueError):
+            info = None
+        with self._lock:
+            self.stats["version_checks"] += 1
+            if info is not None and info.get("version") == self.version and not info.get("busy") and not self._stale:
+                self._checked_at = time.monotonic()
+                return None
+        return self.refresh()
+
+    def _apply(self, result: dict, expected_changes: int, change):
+        """
+        Applies `change` if Unity's reported version is exactly `expected_changes` ahead of ours.
+        A change that returns False could not be applied and leaves the mirror stale.
+        """
+        with self._lock:
+            version = result.get("scene_version")
+            if (change is None or self._stale or self.version is None or version is None
+                    or version != self.version + expected_changes or change() is False):
+                self._stale = True
+                return
+            self.version = version
+
+    # --- Updates from scene-changing tools ---
+    def record_spawns(self, result: dict, payloads: list):
+        """
+        Records spawn payloads that Unity reported as successful.
+
+        :param result: The Unity response of the spawn or spawn_batch request.
+        :param payloads: The SpawnPayload dicts that succeeded, in request order, with the "id" Unity gave each.
+        """
+        if not result.get("success"):
+            self.mark_stale()
+            return
+        objects = []
+        for payload in payloads:
+            name = predicted_name(payload["object_name"])
+            if name is None or not payload.get("id"):
+                self.mark_stale()
+                return
+            primitive = name.startswith("Primitive_")
+            objects.append({
+                "id": payload["id"],
+                "name": name,
+                "position": dict(payload["position"]),
+                # Placeholders for unknown objects keep Unity's default scale and material.
+                "scale": dict(payload.get("scale") or {"x": 1.0, "y": 1.0, "z": 1.0}) if primitive else {"x": 1.0, "y": 1.0, "z": 1.0},
+                "color": dict(payload.get("color") or WHITE) if primitive else dict(WHITE),
+                "has_color": True,
+            })
+        self._apply(result, len(objects), lambda: [self._add(obj) for obj in objects])
+
+    def record_updates(self, result: dict, payloads: list):
+        """
+        Records update_object payloads that Unity reported as successful.
+
+        :param result: The Unity response of the update_object or update_batch request.
+        :param payloads: The UpdatePayload dicts that succeeded, in request order.
+        """
+        if not result.get("success"):
+            self.mark_stale()
+            return
+
+        def change():
+            if any(payload["object_id"] not in self._by_id for payload in payloads):
+                return False
+            for payload in payloads:
+                obj = self._by_id[payload["object_id"]]
+                if payload.get("has_position"):
+                    self._move(obj, payload["position"])
+                if payload.get("has_scale"):
+                    obj["scale"] = dict(payload["scale"])
+                if payload.get("has_color"):
+                    obj["color"] = dict(payload["color"])
+
+        self._apply(result, len(payloads), change)
+
+    def record_deletes(self, result: dict, object_ids: list):
+        """Records deletes Unity reported as successful, given the deleted objects' ids."""
+        if not result.get("success"):
+            self.mark_stale()
+            return
+
+        def change():
+            if any(object_id not in self._by_id for object_id in object_ids):
+                return False
+            for object_id in object_ids:
+                self._remove(self._by_id[object_id])
+
+        self._apply(result, len(object_ids), change)
+
+    def record_lighting(self, result: dict, preset: str):
+        # Lighting does not change the scene version, so it needs no version check.
+        if result.get("success"):
+            with self._lock:
+                self.lighting = preset.lower()
+
+    def record_clear(self, result: dict):
+        if not result.get("success"):
+            self.mark_stale()
+            return
+        self._apply(result, 1, lambda: self._reset([]))
+
+    # --- Queries ---
+    def find(self, name: str):
+        """
+        Returns (object, None) for the object with id `name`, else the first object
+        whose name contains `name` (case-insensitive, as SceneController.FindObject),
+        or (None, error dict).
+        """
+        error = self._ensure_fresh()
+        if error:
+            return None, error
+        query = name.lower()
+        with self._lock:
+            self.stats["local_queries"] += 1
+            obj = self._by_id.get(name) or self._find_cache.get(query)
+            if obj is None:
+                obj = next((o for o in self._objects if query in o["name"].lower()), None)
+                if obj is not None:
+                    self._find_cache[query] = obj
+        if obj is None:
+            return None, {"success": False, "error": f"Object '{name}' not found."}
+        return obj, None
+
+    def get_object_position(self, object_name: str) -> dict:
+        obj, error = self.find(object_name)
+        if error:
+            return error
+        return {"success": True, "data": json.dumps(obj["position"]), "source": "mirror"}
+
+    def objects(self):
+        """Returns (copies of every object in spawn order, None) or (None, error dict)."""
+        error = self._ensure_fresh()
+        if error:
+            return None, error
+        with self._lock:
+            self.stats["local_queries"] += 1
+            return [dict(obj) for obj in self._objects], None
+
+    def list_all_objects(self) -> dict:
+        error = self._ensure_fresh()
+        if error:
+            return error
+        with self._lock:
+            self.stats["local_queries"] += 1
+            names = [obj["name"] for obj in self._objects]
+        return {"success": True, "data": json.dumps(names), "source": "mirror"}
+
+    def objects_near(self, position: dict, radius: float, limit: int = 10) -> dict:
+        """Returns the objects within `radius` of `position`, nearest first, using the grid index."""
+        error = self._ensure_fresh()
+        if error:
+            return error
+        center = [float(position.get(axis, 0.0)) for axis in "xyz"]
+        low = self._cell({axis: c - radius for axis, c in zip("xyz", center)})
+        high = self._cell({axis: c + radius for axis, c in zip("xyz", center)})
+        cell_count = (high[0] - low[0] + 1) * (high[1] - low[1] + 1) * (high[2] - low[2] + 1)
+        matches = []
+        with self._lock:
+            self.stats["local_queries"] += 1
+            if cell_count > len(self._grid):
+                # A radius spanning more cells than are occupied: scanning is cheaper.
+                candidates = self._objects
+            else:
+                candidates = [obj for cell in itertools.product(*(range(l, h + 1) for l, h in zip(low, high)))
+                              for obj in self._grid.get(cell, ())]
+            for obj in candidates:
+                distance = math.dist(center, [float(obj["position"].get(axis, 0.0)) for axis in "xyz"])
+                if distance <= radius:
+                    matches.append({"id": obj.get("id"), "name": obj["name"], "position": obj["position"], "distance": round(distance, 3)})
+        matches.sort(key=lambda match: match["distance"])
+        return {"success": True, "data": matches[:limit], "source": "mirror"}
+
+
+# --- Shared mirrors ---
+_mirrors = {}  # Unity base URL -> SceneMirror
+_mirror_lock = threading.Lock()
+
+
+def get_scene_mirror() -> SceneMirror:
+    """Returns the SceneMirror of the current Unity instance, creating it on first use."""
+    client = get_unity_client()
+    mirror = _mirrors.get(client.base_url)
+    if mirror is None:
+        with _mirror_lock:
+            mirror = _mirrors.get(client.base_url)
+            if mirror is None:
+                mirror = _mirrors[client.base_url] = SceneMirror(client)
+    return mirror
@@ -0,0 +1,212 @@
+# scheduler.py
+#
+# Runs the tool calls of one LLM turn concurrently on a shared thread pool
+# while keeping the calls that must stay ordered in order.
+#
+# Every tool declares which pieces of shared state it touches and how:
+#   "shared"    - reads; any number may overlap (e.g. two get_object_position)
+#   "append"    - independent additions; they commute with each other but not
+#                 with readers (e.g. five spawn_object calls)
+#   "exclusive" - must not overlap with anything else on that resource
+#                 (e.g. clear_scene)
+# A call waits for every earlier call in the same turn that it conflicts with,
+# so "clear_scene, spawn, spawn, capture" runs as clear -> (spawn | spawn) -> capture.
+#
+# Calls that change single objects by id also take "scene:<id>" exclusively and
+# only append to "scene": updates and deletes of different objects overlap,
+# two calls on the same object stay in order, and scene readers wait for both.
+# Only clear_scene (and the tools that touch any object) hold "scene" exclusively.
+
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import config
+import tracing
+
+SHARED = "shared"
+APPEND = "append"
+EXCLUSIVE = "exclusive"
+
+# Resource accesses per tool. Tools that are not listed are treated as
+# touching everything exclusively, which makes them run strictly in order.
+TOOL_ACCESS = {
+    "spawn_object": {"scene": APPEND, "assets": SHARED},
+    "spawn_objects": {"scene": APPEND, "assets": SHARED},
+    "update_object": {"scene": APPEND},
+    "update_objects": {"scene": APPEND},
+    "delete_object": {"scene": APPEND},
+    "delete_objects": {"scene": APPEND},
+    "clear_scene": {"scene": EXCLUSIVE},
+    "set_lighting": {"lighting": EXCLUSIVE},
+    "apply_scene_spec": {"scene": EXCLUSIVE, "lighting": EXCLUSIVE, "assets": APPEND},
+    "attach_script_to_object": {"scene": EXCLUSIVE, "scripts": SHARED},
+    "capture_and_analyze_scene": {"scene": SHARED, "lighting": SHARED},
+    "run_simulation_and_get_results": {"scene": EXCLUSIVE},
+    "run_simulation_batch": {"scene": SHARED},  # reads positions; moves no objects
+    "get_object_position": {"scene": SHARED},
+    "list_all_objects": {"scene": SHARED},
+    "find_objects_near": {"scene": SHARED},
+    "click_unity_play_button": {"scene": EXCLUSIVE, "gui": EXCLUSIVE},
+    "click_gui_element": {"scene": EXCLUSIVE, "gui": EXCLUSIVE},
+    "search_web_for_3d_model": {},
+    "download_and_import_model": {"assets": APPEND},
+    "write_new_unity_script": {"scripts": APPEND},
+}
+
+_ALL_RESOURCES = {"scene", "lighting", "assets", "scripts", "gui"}
+
+# Tools that name the objects they touch: tool -> (list argument or None, id key or None).
+# Their calls add "scene:<id>" EXCLUSIVE for every id in the arguments.
+OBJECT_IDS = {
+    "spawn_object": (None, "object_id"),
+    "spawn_objects": ("objects", "object_id"),
+    "update_object": (None, "object_id"),
+    "update_objects": ("updates", "object_id"),
+    "delete_object": (None, "object_id"),
+    "delete_objects": ("object_ids", None),
+}
+# Of those, the ones that need an id; without one they take the whole scene exclusively.
+_NEEDS_IDS = {"update_object", "update_objects", "delete_object", "delete_objects"}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide thread pool used for tool execution."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.TOOL_MAX_PARALLELISM, thread_name_prefix="tool")
+    return _executor
+
+
+def _object_ids(function_name: str, arguments) -> list:
+    """The object ids a call names in its (JSON) arguments; spawns without an id name none."""
+    try:
+        arguments = json.loads(arguments) if isinstance(arguments, str) else arguments
+    except ValueError:
+        return []
+    if not isinstance(arguments, dict):
+        return []
+    list_key, id_key = OBJECT_IDS[function_name]
+    items = arguments.get(list_key) if list_key else [arguments]
+    if not isinstance(items, list):
+        return []
+    if id_key:
+        ids = [item.get(id_key) for item in items if isinstance(item, dict)]
+    else:
+        ids = items
+    return [str(object_id) for object_id in ids if isinstance(object_id, (str, int)) and str(object_id)]
+
+
+def tool_access(function_name: str, arguments=None) -> dict:
+    """
+    Returns the resource access map for a call (exclusive on everything if the tool is unknown).
+
+    :param function_name: The tool called.
+    :param arguments: The call's arguments, parsed or as JSON; they give the object ids of OBJECT_IDS tools.
+    """
+    if function_name not in TOOL_ACCESS:
+        return {resource: EXCLUSIVE for resource in _ALL_RESOURCES}
+    access = TOOL_ACCESS[function_name]
+    if function_name in OBJECT_IDS:
+        ids = _object_ids(function_name, arguments)
+        if not ids and function_name in _NEEDS_IDS:
+            return dict(access, scene=EXCLUSIVE)
+        access = dict(access, **{f"scene:{object_id}": EXCLUSIVE for object_id in ids})
+    return access
+
+
+def conflicts(first: dict, second: dict) -> bool:
+    """True if two access maps cannot run concurrently."""
+    for resource, mode in first.items():
+        other = second.get(resource)
+        if other is None:
+            continue
+        if mode == other and mode in (SHARED, APPEND):
+            continue
+        return True
+    return False
+
+
+class ScheduledCall:
+    """A tool call submitted to a ToolScheduler, with its result once finished."""
+    def __init__(self, index: int, call_id: str, function_name: str, arguments: str):
+        self.index = index
+        self.call_id = call_id
+        self.function_name = function_name
+        self.arguments = arguments
+        self.access = tool_access(function_name, arguments)
+        self.future = None
+        self.result = None
+
+
+class ToolScheduler:
+    """
+    Schedules the tool calls of a single LLM turn.
+
+    :param execute: Callable (function_name, arguments) -> result dict that runs one tool.
+    :param parallel: If False, every call waits for the previous one (the old sequential behaviour).
+    """
+    def __init__(self, execute, parallel: bool = None):
+        self.execute = execute
+        self.parallel = config.PARALLEL_TOOL_CALLS if parallel is None else parallel
+        self.calls = []
+        self._pending = set()
+
+    def submit(self, call_id: str, function_name: str, arguments: str) -> ScheduledCall:
+        """Queues a call; it starts as soon as every earlier conflicting call has finished."""
+        call = ScheduledCall(len(self.calls), call_id, function_name, arguments)
+        if self.parallel:
+            dependencies = [c.future for c in self.calls if conflicts(c.access, call.access)]
+        else:
+            dependencies = [self.calls[-1].future] if self.calls else []
+
+        # Copy the caller's context so per-session state follows the call into the pool.
+        context = contextvars.copy_context()
+        call.future = get_tool_executor().submit(context.run, self._run, call, dependencies)
+        self.calls.append(call)
+        self._pending.add(call.future)
+        return call
+
+    def _run(self, call: ScheduledCall, dependencies: list):
+        # Dependencies were submitted earlier to the same FIFO pool, so they
+        # are already running or done and waiting on them cannot deadlock.
+        queued = time.perf_counter()
+        wait(dependencies)
+        with tracing.span(f"tool {call.function_name}", "tool", request_bytes=len(call.arguments or ""),
+                          waited=round(time.perf_counter() - queued, 4)) as span:
+            try:
+                call.result = self.execute(call.function_name, call.arguments)
+            except Exception as e:
+                call.result = {"error": str(e)}
+            if isinstance(call.result, dict):
+                span.set(response_bytes=tracing.payload_size(call.result))
+                if call.result.get("error") or call.result.get("success") is False:
+                    span.set(error=str(call.result.get("error") or "failed")[:200])
+        return call
+
+    def as_completed(self):
+        """Yields submitted calls in the order they finish."""
+        while self._pending:
+            done, self._pending = wait(self._pending, return_when=FIRST_COMPLETED)
+            for call in sorted((f.result() for f in done), key=lambda c: c.index):
+                yield call
+
+    def poll(self):
+        """Yields calls that have finished since they were last reported, without blocking."""
+        if not self._pending:
+            return
+        done, self._pending = wait(self._pending, timeout=0)
+        for call in sorted((f.result() for f in done), key=lambda c: c.index):
+            yield call
+
+    def results_in_order(self) -> list:
+        """Returns every submitted call in submission (tool_call_id) order once all have finished."""
+        wait([c.future for c in self.calls])
+        return list(self.calls)
@@ -0,0 +1,255 @@
+# sessions.py
+#
+# Runs agent sessions for the web server. A request thread no longer executes
+# the agent itself: it hands the prompt to a SessionManager and relays the
+# session's log lines to the client.
+#   - at most AGENT_MAX_SESSIONS agent loops run at once and SESSION_QUEUE_LIMIT
+#     more may wait for a slot; beyond that new sessions are rejected
+#   - each session is pinned to a Unity instance (see unity_pool.py): the one
+#     it asked for, or the least-loaded idle one. Sessions for the same instance
+#     run one at a time, in arrival order, since they would clear each other's scene
+#   - each session buffers at most SESSION_STREAM_BUFFER lines; when the client
+#     reads slower than the agent writes, the agent pauses at its next line
+#   - cancelling a session (e.g. because the client disconnected) stops its agent
+#     at the next line it produces, or takes it out of the queue
+
+import collections
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from unity_client import current_pin
+from unity_pool import get_unity_pool
+
+# Session states
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+DONE_STATES = (FINISHED, FAILED, CANCELLED)
+
+
+class SessionRejected(Exception):
+    """Raised when the session pool and its queue are both full."""
+
+
+class Session:
+    """
+    One agent run and the buffered log it produces.
+
+    :param prompt: The user's request.
+    :param unity_url: The Unity instance the agent must drive; None lets the pool pick one.
+    """
+    def __init__(self, prompt: str, unity_url: str = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.prompt = prompt
+        self.unity_url = unity_url
+        self.pin = None  # set when the session is started
+        self.trace = None  # the agent's tracing.Trace, once it has started
+        self.state = QUEUED
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._lines = queue.Queue(maxsize=config.SESSION_STREAM_BUFFER)
+        self._cancelled = threading.Event()
+        self._closed = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Asks the session to stop; a finished session is left as it is."""
+        self._cancelled.set()
+
+    def emit(self, line) -> bool:
+        """Queues a line for the client, blocking while the buffer is full. Returns False once cancelled."""
+        while not self._cancelled.is_set():
+            try:
+                self._lines.put(line, timeout=0.25)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def close(self):
+        """Marks the end of the session's output."""
+        self._closed.set()
+
+    def stream(self):
+        """Yields the session's lines until it has ended and its buffer is drained."""
+        while True:
+            try:
+                yield self._lines.get(timeout=0.25)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+
+    def summary(self) -> dict:
+        now = time.time()
+        return {
+            "id": self.id,
+            "state": self.state,
+            "unity_url": self.pin.url if self.pin else self.unity_url,
+            "unity_failovers": self.pin.failovers if self.pin else 0,
+            "prompt": self.prompt[:80],
+            "queued_seconds": round((self.started or now) - self.created, 3),
+            "run_seconds": round((self.finished or now) - self.started, 3) if self.started else None,
+            "trace_id": self.trace.id if self.trace else None,
+        }
+
+
+class SessionManager:
+    """
+    A bounded pool of agent sessions.
+
+    Waiting sessions are started in arrival order, skipping those for which no
+    Unity instance is free, so one busy instance does not hold up sessions that
+    can run elsewhere.
+
+    :param max_sessions: Agent loops allowed to run at once.
+    :param queue_limit: Sessions allowed to wait for a free slot or Unity instance.
+    :param agent_factory: Callable returning an object with run(prompt); defaults to AutonomousAgent.
+    """
+    def __init__(self, max_sessions: int = None, queue_limit: int = None, agent_factory=None):
+        self.max_sessions = max_sessions or config.AGENT_MAX_SESSIONS
+        self.queue_limit = config.SESSION_QUEUE_LIMIT if queue_limit is None else queue_limit
+        self._agent_factory = agent_factory
+        self._executor = ThreadPoolExecutor(max_workers=self.max_sessions, thread_name_prefix="agent-session")
+        self._lock = threading.Lock()
+        self._sessions = collections.OrderedDict()  # id -> Session, oldest first
+        self._waiting = collections.deque()  # sessions not started yet, in arrival order
+        self._running = 0
+        self._pool = get_unity_pool()
+        self._pool.on_change(self._redispatch)
+        self._pool.start_health_checks()
+
+    def submit(self, prompt: str, unity_url: str = None) -> Session:
+        """Queues a new session. Raises SessionRejected when full and ValueError for unknown Unity instances."""
+        if unity_url is not None and unity_url not in config.UNITY_API_URLS and unity_url != config.UNITY_API_URL:
+            raise ValueError(f"Unknown Unity instance '{unity_url}'. Configured: {', '.join(config.UNITY_API_URLS)}")
+        with self._lock:
+            if self._running + len(self._waiting) >= self.max_sessions + self.queue_limit:
+                raise SessionRejected(f"Server busy: {self._running} sessions running, {len(self._waiting)} queued. Try again shortly.")
+            session = Session(prompt, unity_url)
+            self._sessions[session.id] = session
+            self._waiting.append(session)
+            self._prune()
+            started = self._dispatch()
+        if session not in started:
+            session.emit(f"SESSION {session.id}: all agent slots or its Unity instance are busy; queued at position {self._position(session) + 1}.")
+        return session
+
+    def get(self, session_id: str):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def cancel(self, session_id: str):
+        """Cancels a session; a queued one is removed from the queue immediately."""
+        session = self.get(session_id)
+        if session is None:
+            return
+        session.cancel()
+        with self._lock:
+            self._dispatch()
+
+    def status(self) -> dict:
+        with self._lock:
+            sessions = [session.summary() for session in self._sessions.values()]
+            running, waiting = self._running, len(self._waiting)
+        return {
+            "max_sessions": self.max_sessions,
+            "queue_limit": self.queue_limit,
+            "running": running,
+            "queued": waiting,
+            "counts": dict(collections.Counter(session["state"] for session in sessions)),
+            "sessions": sessions,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            session.cancel()
+        with self._lock:
+            self._dispatch()
+        self._executor.shutdown(wait=True)
+
+    # --- Scheduling (called with self._lock held) ---
+    def _prune(self):
+        done = [session_id for session_id, session in self._sessions.items() if session.state in DONE_STATES]
+        for session_id in done[:max(0, len(done) - config.SESSION_HISTORY)]:
+            del self._sessions[session_id]
+
+    def _position(self, session: Session) -> int:
+        with self._lock:
+            return sum(1 for other in self._waiting if other.created <= session.created and other is not session)
+
+    def _redispatch(self):
+        with self._lock:
+            self._dispatch()
+
+    def _dispatch(self) -> list:
+        """Starts every waiting session that has both a free slot and a free Unity instance."""
+        started = []
+        for session in list(self._waiting):
+            if session.cancelled:
+                self._waiting.remove(session)
+                session.state = CANCELLED
+                session.started = session.finished = time.time()
+                session.close()
+            elif self._running < self.max_sessions:
+                session.pin = self._pool.pin(session.id, session.unity_url)
+                if session.pin is None:
+                    continue
+                self._waiting.remove(session)
+                self._running += 1
+                session.state = RUNNING
+                self._executor.submit(self._run, session)
+                started.append(session)
+        return started
+
+    def _finish(self, session: Session):
+        self._pool.unpin(session.pin)
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+
+    # --- Session thread ---
+    def _create_agent(self):
+        if self._agent_factory is not None:
+            return self._agent_factory()
+        from agent import AutonomousAgent
+        return AutonomousAgent()
+
+    def _run(self, session: Session):
+        # Tools (and their scheduler threads) talk to this session's Unity instance.
+        token = current_pin.set(session.pin)
+        session.started = time.time()
+        try:
+            agent = self._create_agent()
+            run = agent.run(session.prompt)
+            stopped = False
+            try:
+                for line in run:
+                    if session.trace is None:
+                        session.trace = getattr(agent, "trace", None)
+                    if not session.emit(line):
+                        stopped = True
+                        break
+            finally:
+                # Stops the agent at the line it was blocked on.
+                run.close()
+            session.state = CANCELLED if stopped else FINISHED
+        except Exception as e:
+            session.state = FAILED
+            session.emit(f"Error: Agent session failed: {e}")
+        finally:
+            current_pin.reset(token)
+            session.finished = time.time()
+            session.close()
+            self._finish(session)
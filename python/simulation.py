@@ -0,0 +1,115 @@
+# simulation.py
+#
+# Kinematic reference for Unity's robot/target simulation. SceneController
+# moves the robot straight at the target with Vector3.MoveTowards at a fixed
+# speed, and the episode succeeds once the robot is within the reach distance.
+# run_simulation_batch runs the same policy at a fixed timestep, frame by frame
+# but many episodes at a time. This module steps a whole batch at once with NumPy.
+#   - sweeps can be pre-screened without Unity
+#   - Unity's batch results can be checked against this reference; they agree up
+#     to float32 rounding at the reach boundary
+#
+# Each step moves first, then checks for success, like SimulationCoroutine.
+
+import math
+
+import numpy as np
+
+# Defaults of SimulationEpisode in SceneController.cs
+DEFAULT_SPEED = 5.0
+DEFAULT_DURATION = 10.0
+DEFAULT_REACH_DISTANCE = 1.0
+DEFAULT_TIMESTEP = 0.02  # Unity's default fixed timestep
+
+
+def _vector(value) -> list:
+    return [float(value.get(axis, 0.0)) for axis in "xyz"]
+
+
+def step_count(duration: float, timestep: float) -> int:
+    """Steps of `timestep` in a `duration`-second episode, as `while (t < duration) t += dt` counts them."""
+    return max(0, math.ceil(duration / timestep - 1e-6))
+
+
+def simulate_episodes(starts, targets, speeds=DEFAULT_SPEED, durations=DEFAULT_DURATION,
+                      reach_distances=DEFAULT_REACH_DISTANCE, timestep: float = DEFAULT_TIMESTEP) -> dict:
+    """
+    Runs every episode of a batch in lockstep.
+
+    :param starts: (n, 3) array of robot start positions.
+    :param targets: (n, 3) array of target positions.
+    :param speeds: Robot speed in units per second, a scalar or one per episode.
+    :param durations: Seconds each episode may run, a scalar or one per episode.
+    :param reach_distances: Distance to the target that counts as reaching it, a scalar or one per episode.
+    :param timestep: Seconds per simulation step.
+    :return: Arrays "success", "time_to_target" (NaN if not reached), "path_length",
+             "final_distance" and "final_position", one entry per episode.
+    """
+    positions = np.array(starts, dtype=np.float64).reshape(-1, 3)
+    targets = np.array(targets, dtype=np.float64).reshape(-1, 3)
+    n = len(positions)
+    max_step = np.broadcast_to(np.asarray(speeds, dtype=np.float64) * timestep, (n,))
+    reach = np.broadcast_to(np.asarray(reach_distances, dtype=np.float64), (n,))
+    steps = np.array([step_count(d, timestep) for d in np.broadcast_to(np.asarray(durations, dtype=np.float64), (n,))], dtype=np.int64)
+
+    success = np.zeros(n, dtype=bool)
+    time_to_target = np.full(n, np.nan)
+    path_length = np.zeros(n)
+    active = steps > 0
+
+    step = 0
+    while active.any():
+        step += 1
+        index = np.flatnonzero(active)
+        delta = targets[index] - positions[index]
+        distance = np.linalg.norm(delta, axis=1)
+        # Vector3.MoveTowards: land on the target when it is within one step
+        moved = np.minimum(distance, max_step[index])
+        scale = np.divide(moved, distance, out=np.zeros_like(distance), where=distance > 0)
+        positions[index] += delta * scale[:, None]
+        path_length[index] += moved
+
+        reached = distance - moved < reach[index]
+        success[index[reached]] = True
+        time_to_target[index[reached]] = step * timestep
+        active[index[reached | (step >= steps[index])]] = False
+
+    return {
+        "success": success,
+        "time_to_target": time_to_target,
+        "path_length": path_length,
+        "final_distance": np.linalg.norm(targets - positions, axis=1),
+        "final_position": positions,
+    }
+
+
+def run_batch(episodes: list, timestep: float = DEFAULT_TIMESTEP) -> dict:
+    """
+    Runs episode dicts with resolved positions and returns the same compact
+    results as Unity's run_simulation_batch job.
+
+    :param episodes: Dicts with 'start' and 'target' ({x, y, z}) and optional 'speed', 'duration' and 'reach_distance'.
+    :param timestep: Seconds per simulation step.
+    """
+    if not episodes:
+        return {"succeeded": 0, "failed": 0, "timestep": timestep, "episodes": []}
+    outcome = simulate_episodes(
+        [_vector(episode["start"]) for episode in episodes],
+        [_vector(episode["target"]) for episode in episodes],
+        [float(episode.get("speed", DEFAULT_SPEED)) for episode in episodes],
+        [float(episode.get("duration", DEFAULT_DURATION)) for episode in episodes],
+        [float(episode.get("reach_distance", DEFAULT_REACH_DISTANCE)) for episode in episodes],
+        timestep,
+    )
+    results = []
+    for index in range(len(episodes)):
+        time_to_target = outcome["time_to_target"][index]
+        results.append({
+            "index": index,
+            "success": bool(outcome["success"][index]),
+            "time_to_target": None if np.isnan(time_to_target) else round(float(time_to_target), 4),
+            "path_length": round(float(outcome["path_length"][index]), 4),
+            "final_distance": round(float(outcome["final_distance"][index]), 4),
+        })
+    succeeded = int(outcome["success"].sum())
+    return {"succeeded": succeeded, "failed": len(episodes) - succeeded, "timestep": timestep, "episodes": results}
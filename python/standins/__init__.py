@@ -0,0 +1,11 @@
+# standins/__init__.py
+#
+# Local stand-in servers that speak the same HTTP protocols as the real
+# backends (Unity HttpServer.cs, OpenAI Chat Completions, a model file host). They let the
+# Python side be exercised and benchmarked without a running Unity editor.
+
+from standins.unity_server import UnityStandIn
+from standins.openai_server import OpenAIStandIn
+from standins.file_server import FileServerStandIn
+
+__all__ = ["UnityStandIn", "OpenAIStandIn", "FileServerStandIn"]
@@ -0,0 +1,144 @@
+# standins/file_server.py
+#
+# An in-process static file server for exercising asset downloads offline.
+# It serves in-memory files with HEAD, single byte-range GETs and
+# "Accept-Ranges: bytes" like a CDN, and can throttle bandwidth, refuse ranges
+# or drop a response midway to test resumed downloads.
+
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_glb(size: int, seed: int = 0) -> bytes:
+    """Builds a structurally valid GLB of exactly `size` bytes (JSON chunk plus a filler BIN chunk)."""
+    json_chunk = b'{"asset":{"version":"2.0"},"scenes":[{"nodes":[]}],"scene":0}'
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    fixed = 12 + 8 + len(json_chunk) + 8
+    if size < fixed or (size - fixed) % 4:
+        raise ValueError(f"GLB size must be at least {fixed} and a multiple of 4 bytes beyond it")
+    payload_length = size - fixed
+    pattern = bytes((seed + i) % 251 for i in range(251))
+    payload = (pattern * (payload_length // len(pattern) + 1))[:payload_length]
+    return (struct.pack("<4sII", b"glTF", 2, size)
+            + struct.pack("<I4s", len(json_chunk), b"JSON") + json_chunk
+            + struct.pack("<I4s", payload_length, b"BIN\x00") + payload)
+
+
+class _FileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head: bool):
+        server = self.server.standin
+        path = self.path.split("?", 1)[0]
+        with server.lock:
+            server.requests.append((self.command, path, self.headers.get("Range")))
+        data = server.files.get(path)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        first, last, status = 0, len(data) - 1, 200
+        range_header = self.headers.get("Range")
+        if range_header and server.accept_ranges and range_header.startswith("bytes="):
+            start_text, _, end_text = range_header[len("bytes="):].partition("-")
+            first = int(start_text)
+            last = min(int(end_text), len(data) - 1) if end_text else len(data) - 1
+            if first > last:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        body = data[first:last + 1]
+        self.send_response(status)
+        self.send_header("Content-Type", "model/gltf-binary")
+        self.send_header("Content-Length", str(len(body)))
+        if server.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(data)}")
+        self.end_headers()
+        if head:
+            return
+
+        sent = 0
+        block = 64 * 1024
+        while sent < len(body):
+            piece = body[sent:sent + block]
+            with server.lock:
+                if server.fail_after_bytes is not None:
+                    if server.bytes_sent + len(piece) > server.fail_after_bytes:
+                        # Emulate a dropped connection partway through the transfer.
+                        server.fail_after_bytes = None
+                        self.close_connection = True
+                        return
+                server.bytes_sent += len(piece)
+            if server.bandwidth:
+                time.sleep(len(piece) / server.bandwidth)
+            self.wfile.write(piece)
+            sent += len(piece)
+
+
+class FileServerStandIn:
+    """
+    A threaded HTTP server for model downloads.
+
+    :param files: Mapping of URL path ("/models/fox.glb") to file bytes.
+    :param accept_ranges: Whether byte-range requests are honoured and advertised.
+    :param bandwidth: Bytes per second per response; 0 disables throttling.
+    """
+    def __init__(self, files: dict = None, host: str = "127.0.0.1", port: int = 0,
+                 accept_ranges: bool = True, bandwidth: float = 0.0):
+        self.files = dict(files or {})
+        self.accept_ranges = accept_ranges
+        self.bandwidth = bandwidth
+        self.fail_after_bytes = None
+        self.bytes_sent = 0
+        self.requests = []  # (method, path, Range header)
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _FileHandler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FileServerStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def drop_after(self, byte_count: int):
+        """Drops the connection once `byte_count` more body bytes have been sent (once)."""
+        with self.lock:
+            self.fail_after_bytes = self.bytes_sent + byte_count
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,186 @@
+# standins/openai_server.py
+#
+# A local stand-in for the OpenAI Chat Completions API. The real `openai`
+# SDK can be pointed at it with base_url=OpenAIStandIn.url, so benchmarks
+# exercise the same client, serialization and upload path as production
+# without network access or API cost.
+#
+# Replies come from a `responder` callable that receives the parsed request
+# body and returns an assistant message dict ({"content": ..., "tool_calls": [...]}).
+# Requests with "stream": true get the same message back as SSE chunks.
+# Latency can be emulated as a fixed delay plus an upload-bandwidth term, and
+# per-chunk delays for streamed responses.
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def default_responder(body: dict) -> dict:
+    """Answers every request with a short description, mentioning any attached images."""
+    images = 0
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            images += sum(1 for part in content if part.get("type") == "image_url")
+    text = f"I see a Unity scene ({images} image(s) received)." if images else "Understood."
+    return {"role": "assistant", "content": text}
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "standin"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        standin = self.server.standin
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        body = json.loads(raw or b"{}")
+        standin.record(len(raw), body)
+        delay = standin.latency
+        if standin.upload_bandwidth:
+            delay += len(raw) / standin.upload_bandwidth
+        if delay:
+            time.sleep(delay)
+
+        message = standin.responder(body)
+        message.setdefault("role", "assistant")
+        message.setdefault("content", None)
+        if body.get("stream"):
+            self._send_stream(body, message)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+            "usage": standin.usage_for(body, message),
+        })
+
+    def _send_stream(self, body: dict, message: dict):
+        """Sends the message as server-sent chat.completion.chunk events, the way the API streams."""
+        standin = self.server.standin
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def emit(delta: dict, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            if standin.stream_delay:
+                time.sleep(standin.stream_delay)
+
+        emit({"role": "assistant", "content": ""})
+        for word in (message.get("content") or "").split(" "):
+            if word:
+                emit({"content": word + " "})
+        for index, tool_call in enumerate(message.get("tool_calls") or []):
+            emit({"tool_calls": [{"index": index, "id": tool_call["id"], "type": "function",
+                                  "function": {"name": tool_call["function"]["name"], "arguments": ""}}]})
+            arguments = tool_call["function"]["arguments"]
+            for start in range(0, len(arguments), 16):
+                emit({"tool_calls": [{"index": index, "function": {"arguments": arguments[start:start + 16]}}]})
+        emit({}, "tool_calls" if message.get("tool_calls") else "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = self.server.standin.usage_for(body, message)
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": body.get("model", "gpt-4o"), "choices": [], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class OpenAIStandIn:
+    """
+    A threaded HTTP server that imitates the OpenAI Chat Completions endpoint.
+
+    :param host: Interface to bind to.
+    :param port: Port to bind to; 0 picks a free ephemeral port.
+    :param latency: Fixed seconds added to every completion.
+    :param upload_bandwidth: Bytes per second used to emulate request upload time (None disables).
+    :param responder: Callable (request_body) -> assistant message dict.
+    :param stream_delay: Seconds between streamed chunks, emulating token generation.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, upload_bandwidth: float = None, responder=None, stream_delay: float = 0.0):
+        self.latency = latency
+        self.stream_delay = stream_delay
+        self.upload_bandwidth = upload_bandwidth
+        self.responder = responder or default_responder
+        self.request_count = 0
+        self.request_bytes = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _OpenAIHandler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, size: int, body: dict):
+        with self._lock:
+            self.request_count += 1
+            self.request_bytes.append(size)
+
+    @staticmethod
+    def usage_for(body: dict, message: dict) -> dict:
+        """Approximate token usage (~4 characters per token), enough to compare prompt sizes."""
+        prompt_tokens = max(1, len(json.dumps(body.get("messages", []))) // 4)
+        completion_tokens = max(1, len(json.dumps(message)) // 4)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    def start(self) -> "OpenAIStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,512 @@
+# standins/unity_server.py
+#
+# An in-process stand-in for the Unity HttpServer.cs / SceneController.cs pair.
+# It answers the same endpoints with the same {"success", "message"} JSON
+# envelope, keeps a small in-memory scene, and can emulate the main-thread
+# frame latency of Unity's Update() drain. GLB loads and simulations run as
+# jobs that finish on timers, like the coroutines they stand in for.
+
+import base64
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Mirrors UnityEngine.PrimitiveType, which SceneController parses case-insensitively.
+PRIMITIVE_TYPES = {"sphere", "capsule", "cylinder", "cube", "plane", "quad"}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between commands.
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; otherwise Nagle plus delayed ACKs
+    # add ~40 ms to every kept-alive request.
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable.
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        self._dispatch(body)
+
+    def do_GET(self):
+        self._dispatch("")
+
+    def _dispatch(self, body):
+        standin = self.server.standin
+        if standin.failing:
+            # Emulates a crashed player: drop the connection without answering.
+            self.close_connection = True
+            return
+        endpoint = self.path.split("?", 1)[0].strip("/")
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            payload = {}
+
+        standin.request_count += 1
+        if standin.frame_time and endpoint not in ("scene_version", "health"):
+            # Commands are only picked up on the next Update() tick; HttpServer
+            # answers version and health checks on its listener thread instead.
+            time.sleep(standin.frame_time)
+        if endpoint == "job_status" and payload.get("wait"):
+            standin.wait_for_job(payload.get("job_id"), float(payload["wait"]))
+
+        with standin.lock:
+            # Handlers answer (success, message[, job_id[, object_id]]).
+            success, message, *extra = standin.handle(endpoint, payload)
+            version = standin.version
+
+        envelope = {"success": success, "message": message}
+        for key, value in zip(("job_id", "object_id"), extra):
+            if value:
+                envelope[key] = value
+        data = json.dumps(envelope).encode("utf-8")
+        self.send_response(200 if success else 400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Scene-Version", str(version))
+        if self.close_connection:
+            # Like HttpListener, confirm "Connection: close" so clients drop the socket.
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class UnityStandIn:
+    """
+    A threaded HTTP server that imitates the Unity scene API.
+
+    :param host: Interface to bind to.
+    :param port: Port to bind to; 0 picks a free ephemeral port.
+    :param frame_time: Seconds each request waits before being processed, emulating Update() latency.
+    :param glb_load_time: Seconds a GLB load job takes.
+    :param job_time_scale: Real seconds per simulated second of a simulation job.
+    :param missing_models: Model files that fail to load and get the fallback object instead.
+    """
+    # SceneController.SimulationCoroutine moves the robot at this speed until it is within 1 unit.
+    SIMULATION_SPEED = 5.0
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, frame_time: float = 0.0,
+                 glb_load_time: float = 0.05, job_time_scale: float = 1.0, missing_models=()):
+        self.frame_time = frame_time
+        self.glb_load_time = glb_load_time
+        self.job_time_scale = job_time_scale
+        self.missing_models = set(missing_models)
+        self.lock = threading.Lock()
+        self.jobs_changed = threading.Condition(self.lock)
+        self.objects = []
+        self.ids = {}  # object id -> object, or None while its model loads (SceneController.objectsById)
+        self.id_counters = {}
+        self.clear_generation = 0  # SceneController.clearGeneration
+        self.jobs = {}
+        self.lighting = "day"
+        self.version = 0
+        self.request_count = 0
+        self.failing = False
+        self._server = ThreadingHTTPServer((host, port), _StandInHandler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "UnityStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def fail(self):
+        """Stops answering: every request, kept-alive or new, is dropped unanswered."""
+        self.failing = True
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Jobs (mirror SceneController's coroutines) ---
+    def _start_job(self, kind: str, message: str, run_time: float, complete, changes_scene: bool = True) -> str:
+        """
+        Registers a running job; `complete` is called under the lock after `run_time` seconds and
+        returns (success, message, result), plus False if the job ended up not changing the scene.
+        """
+        job_id = f"{kind}-{len(self.jobs) + 1}"
+        job = {"job_id": job_id, "kind": kind, "state": "running", "progress": 0.0,
+               "message": message, "result": "", "started": time.monotonic(), "run_time": run_time}
+        self.jobs[job_id] = job
+
+        def finish():
+            with self.jobs_changed:
+                if self.failing:
+                    return  # a crashed player never finishes its jobs
+                success, message, result, *changed = complete()
+                job.update(state="succeeded" if success else "failed", progress=1.0, message=message,
+                           result=json.dumps(result), elapsed=time.monotonic() - job["started"])
+                if changes_scene and (not changed or changed[0]):
+                    self.version += 1
+                self.jobs_changed.notify_all()
+
+        timer = threading.Timer(run_time, finish)
+        timer.daemon = True
+        timer.start()
+        return job_id
+
+    def _busy(self) -> int:
+        return sum(1 for job in self.jobs.values() if job["state"] == "running")
+
+    def wait_for_job(self, job_id: str, wait: float):
+        """Holds a job_status request until the job finishes, like HttpServer's pending waits."""
+        with self.jobs_changed:
+            self.jobs_changed.wait_for(lambda: self.jobs.get(job_id, {}).get("state") != "running", timeout=min(wait, 30.0))
+
+    def _handle_job_status(self, payload):
+        job = self.jobs.get(payload.get("job_id"))
+        if job is None:
+            return False, f"Unknown job '{payload.get('job_id')}'."
+        info = {key: job[key] for key in ("job_id", "kind", "state", "progress", "message", "result")}
+        if job["state"] == "running":
+            info["elapsed"] = time.monotonic() - job["started"]
+            info["progress"] = min(1.0, info["elapsed"] / job["run_time"]) if job["run_time"] else 0.0
+        else:
+            info["elapsed"] = job["elapsed"]
+        return True, json.dumps(info), job["job_id"]
+
+    # --- Endpoint handlers (mirror SceneController) ---
+    def handle(self, endpoint: str, payload: dict):
+        handler = getattr(self, f"_handle_{endpoint}", None)
+        if handler is None:
+            return False, "Invalid endpoint."
+        return handler(payload)
+
+    def _find(self, name: str):
+        # Same lookup as SceneController.FindObject: an id, else a case-insensitive substring of the name.
+        if self.ids.get(name) is not None:
+            return self.ids[name]
+        for obj in self.objects:
+            if name.lower() in obj["name"].lower():
+                return obj
+        return None
+
+    def _reserve_id(self, payload: dict):
+        # Same scheme as SceneController.ReserveId: the requested id, or "<model>_<n>".
+        object_id = payload.get("id")
+        if not object_id:
+            stem = os.path.splitext(payload.get("object_name") or "")[0].lower().replace(" ", "_")
+            counter = self.id_counters.get(stem, 0)
+            while True:
+                counter += 1
+                object_id = f"{stem}_{counter}"
+                if object_id not in self.ids:
+                    break
+            self.id_counters[stem] = counter
+        elif object_id in self.ids:
+            return None
+        self.ids[object_id] = None
+        return object_id
+
+    def _register(self, obj: dict):
+        self.objects.append(obj)
+        self.ids[obj["id"]] = obj
+
+    def _spawn_one(self, payload: dict):
+        object_name = payload.get("object_name") or ""
+        position = payload.get("position") or {"x": 0.0, "y": 0.0, "z": 0.0}
+        scale = payload.get("scale") or {"x": 1.0, "y": 1.0, "z": 1.0}
+        object_id = self._reserve_id(payload)
+        if object_id is None:
+            return False, f"Object id '{payload.get('id')}' is already in use."
+        if ".glb" in object_name or ".gltf" in object_name:
+            return self._start_glb_load(object_id, object_name, position, scale, payload.get("color"))
+        if object_name.lower() in PRIMITIVE_TYPES:
+            name = f"Primitive_{object_name}"
+            message = f"Successfully spawned '{name}'."
+        else:
+            name = f"Unknown_{object_name}"
+            message = f"Created placeholder for unknown object: {object_name}"
+            # SceneController does not apply the requested scale or color to placeholders.
+            scale = {"x": 1.0, "y": 1.0, "z": 1.0}
+        self._register({
+            "id": object_id,
+            "name": name,
+            "position": dict(position),
+            "scale": dict(scale),
+            "color": payload.get("color") if name.startswith("Primitive_") else None,
+        })
+        self.version += 1
+        return True, message, None, object_id
+
+    def _start_glb_load(self, object_id, object_name, position, scale, color):
+        generation = self.clear_generation
+
+        def complete():
+            if generation != self.clear_generation:
+                # SceneController.DiscardIfCleared: the scene was cleared while the model loaded.
+                if object_id in self.ids and self.ids[object_id] is None:
+                    del self.ids[object_id]
+                message = f"The scene was cleared while {object_name} was loading; it was not added."
+                return False, message, {"object_name": object_name, "object_id": object_id}, False
+            if object_name in self.missing_models:
+                name = "Fox_Fallback"
+                message = f"Could not load {object_name} (file not found); spawned '{name}' in its place."
+            else:
+                name = f"Model_{object_name.replace('.glb', '')}"
+                message = f"Successfully spawned '{name}'."
+            fallback_color = {"r": 0.8, "g": 0.4, "b": 0.1}  # CreateFoxFallback's fox orange
+            self._register({"id": object_id, "name": name, "position": dict(position), "scale": dict(scale),
+                            "color": fallback_color if name == "Fox_Fallback" else color})
+            return name != "Fox_Fallback", message, {"object_name": name, "object_id": object_id, "fallback": name == "Fox_Fallback"}
+
+        job_id = self._start_job("spawn", f"Loading {object_name}", self.glb_load_time, complete)
+        return True, f"GLB loading started for {object_name}", job_id, object_id
+
+    def _handle_spawn(self, payload):
+        return self._spawn_one(payload)
+
+    def _handle_spawn_batch(self, payload):
+        # Same contract as SceneController.SpawnObjects: the whole batch is handled
+        # in one main-thread drain and failures are reported per item.
+        objects = payload.get("objects") or []
+        if not objects:
+            return False, "Spawn batch contains no objects."
+        return self._run_batch(objects, lambda item: self._spawn_one(item) if isinstance(item, dict) and item.get("object_name")
+                               else (False, "Missing object_name."))
+
+    def _run_batch(self, items: list, run_item):
+        results = []
+        for index, item in enumerate(items):
+            success, message, *extra = run_item(item)
+            job_id, object_id = (list(extra) + [None, None])[:2]
+            results.append({"index": index, "success": success, "message": message,
+                            "job_id": job_id or "", "object_id": object_id or ""})
+        succeeded = sum(1 for r in results if r["success"])
+        return True, json.dumps({"succeeded": succeeded, "failed": len(results) - succeeded, "results": results})
+
+    def _spawned(self, object_id):
+        if not object_id or object_id not in self.ids:
+            return None, f"No object with id '{object_id}'."
+        if self.ids[object_id] is None:
+            return None, f"Object '{object_id}' is still loading."
+        return self.ids[object_id], None
+
+    def _handle_update_object(self, payload):
+        # SceneController.UpdateObject: only the fields flagged with has_* change.
+        obj, error = self._spawned(payload.get("object_id"))
+        if error:
+            return False, error
+        if payload.get("has_color") and obj["name"].startswith("Model_"):
+            return False, f"'{obj['name']}' ({obj['id']}) has no material color of its own."
+        for field in ("position", "scale", "color"):
+            if payload.get(f"has_{field}"):
+                obj[field] = dict(payload[field])
+        self.version += 1
+        return True, f"Updated '{obj['name']}' ({obj['id']}).", None, obj["id"]
+
+    def _handle_update_batch(self, payload):
+        objects = payload.get("objects") or []
+        if not objects:
+            return False, "Update batch contains no objects."
+        return self._run_batch(objects, self._handle_update_object)
+
+    def _handle_delete_object(self, payload):
+        obj, error = self._spawned(payload.get("object_id"))
+        if error:
+            return False, error
+        self.objects.remove(obj)
+        del self.ids[obj["id"]]
+        self.version += 1
+        return True, f"Deleted '{obj['name']}' ({obj['id']}).", None, obj["id"]
+
+    def _handle_delete_batch(self, payload):
+        object_ids = payload.get("object_ids") or []
+        if not object_ids:
+            return False, "Delete batch contains no objects."
+        return self._run_batch(object_ids, lambda object_id: self._handle_delete_object({"object_id": object_id}))
+
+    def _handle_clear_scene(self, payload):
+        count = len(self.objects)
+        self.objects = []
+        # As in SceneController.ClearScene: loads still running are discarded when they
+        # finish, and their ids stay reserved until then.
+        self.clear_generation += 1
+        self.ids = {object_id: obj for object_id, obj in self.ids.items() if obj is None}
+        self.version += 1
+        return True, f"Cleared scene - destroyed {count} objects."
+
+    def _handle_set_lighting(self, payload):
+        preset = (payload.get("preset") or "").lower()
+        if preset not in ("day", "night", "sunset"):
+            return False, f"Unknown lighting preset: {payload.get('preset')}"
+        self.lighting = preset
+        return True, f"Lighting set to {payload.get('preset')}."
+
+    def _handle_capture_vision(self, payload):
+        # Same contract as SceneController.CaptureVision: the frame is complete
+        # before the response is sent, either inline or already on disk.
+        image_format = "jpg" if payload.get("format") in ("jpg", "jpeg") else "png"
+        width = int(payload.get("width") or 1280)
+        height = int(payload.get("height") or 720)
+        image_bytes = self.render_frame(width, height, image_format, int(payload.get("quality") or 85))
+        if payload.get("mode") == "inline":
+            return True, json.dumps({
+                "format": image_format,
+                "width": width,
+                "height": height,
+                "image_base64": base64.b64encode(image_bytes).decode("ascii"),
+            })
+        path = os.path.join(tempfile.gettempdir(), f"standin_scene_capture.{image_format}")
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+        return True, f"Scene captured to {path}"
+
+    def render_frame(self, width: int, height: int, image_format: str = "png", quality: int = 85) -> bytes:
+        """Draws a top-down sketch of the scene: one colored shape per object on a sky gradient."""
+        from PIL import Image, ImageDraw
+
+        sky = {"day": (135, 190, 235), "night": (20, 24, 60), "sunset": (240, 150, 90)}[self.lighting]
+        image = Image.new("RGB", (width, height), sky)
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([0, height * 2 // 3, width, height], fill=(90, 110, 80))
+        unit = width / 20.0
+        for obj in self.objects:
+            color = obj.get("color") or {"r": 0.8, "g": 0.8, "b": 0.8}
+            fill = tuple(int(255 * max(0.0, min(1.0, float(color.get(c, 0.8))))) for c in "rgb")
+            cx = width / 2 + float(obj["position"].get("x", 0)) * unit
+            cy = height * 2 / 3 - float(obj["position"].get("y", 0)) * unit - float(obj["position"].get("z", 0)) * unit / 3
+            rx = max(2.0, float(obj["scale"].get("x", 1)) * unit / 2)
+            ry = max(2.0, float(obj["scale"].get("y", 1)) * unit / 2)
+            box = [cx - rx, cy - 2 * ry, cx + rx, cy]
+            if "sphere" in obj["name"].lower():
+                draw.ellipse(box, fill=fill)
+            else:
+                draw.rectangle(box, fill=fill)
+
+        buffer = io.BytesIO()
+        if image_format == "jpg":
+            image.save(buffer, format="JPEG", quality=quality)
+        else:
+            image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def _handle_run_simulation(self, payload):
+        robot = self._find(payload.get("robot_name") or "")
+        target = self._find(payload.get("target_name") or "")
+        if robot is None or target is None:
+            return False, "Could not find robot or target for simulation."
+        duration = float(payload.get("duration", 10.0))
+        start = [float(robot["position"].get(axis, 0.0)) for axis in "xyz"]
+        goal = [float(target["position"].get(axis, 0.0)) for axis in "xyz"]
+        distance = math.dist(start, goal)
+        # Same kinematics as SimulationCoroutine: straight line until within 1 unit.
+        reach_time = max(0.0, distance - 1.0) / self.SIMULATION_SPEED
+        elapsed = min(reach_time, duration)
+
+        def complete():
+            if robot not in self.objects or target not in self.objects:
+                return False, "Robot or target was removed during the simulation.", {"success": False, "elapsed": elapsed}
+            travelled = min(distance, self.SIMULATION_SPEED * elapsed)
+            fraction = travelled / distance if distance else 0.0
+            robot["position"] = {axis: s + (g - s) * fraction for axis, s, g in zip("xyz", start, goal)}
+            reached = reach_time <= duration
+            reason = "Robot reached the target." if reached else "Simulation timed out."
+            return reached, reason, {"success": reached, "reason": reason, "elapsed": elapsed,
+                                     "final_distance": distance - travelled, "final_position": robot["position"]}
+
+        job_id = self._start_job("simulation", f"Simulating {robot['name']} moving to {target['name']}",
+                                 elapsed * self.job_time_scale, complete)
+        return True, "Simulation started.", job_id
+
+    def _handle_run_simulation_batch(self, payload):
+        # SceneController.RunSimulationBatch steps the same policy as simulation.py.
+        from simulation import run_batch
+
+        episodes = payload.get("episodes") or []
+        if not episodes:
+            return False, "Simulation batch contains no episodes."
+        timestep = float(payload.get("timestep", 0.02))
+        if timestep <= 0:
+            return False, "Simulation batch timestep must be positive."
+        resolved = []
+        for index, episode in enumerate(episodes):
+            item = {key: episode[key] for key in ("speed", "duration", "reach_distance") if key in episode}
+            for name_key, point_key in (("robot_name", "start"), ("target_name", "target")):
+                obj = self._find(episode[name_key]) if episode.get(name_key) else None
+                if episode.get(name_key) and obj is None:
+                    return False, f"Episode {index}: could not find robot or target."
+                item[point_key] = obj["position"] if obj else episode.get(point_key) or {"x": 0.0, "y": 0.0, "z": 0.0}
+            resolved.append(item)
+
+        def complete():
+            batch = run_batch(resolved, timestep)
+            for item in batch["episodes"]:
+                # JsonUtility has no null floats; Unity reports -1
+                if item["time_to_target"] is None:
+                    item["time_to_target"] = -1.0
+            return True, f"{batch['succeeded']} of {len(resolved)} episodes reached the target.", batch
+
+        job_id = self._start_job("simulation_batch", f"Simulating {len(resolved)} episodes", 0.0, complete,
+                                 changes_scene=False)
+        return True, f"Simulation batch of {len(resolved)} episodes started.", job_id
+
+    def _handle_get_object_position(self, payload):
+        obj = self._find(payload.get("object_name") or "")
+        if obj is None:
+            return False, f"Object '{payload.get('object_name')}' not found."
+        return True, json.dumps(obj["position"])
+
+    def _handle_list_all_objects(self, payload):
+        return True, json.dumps([obj["name"] for obj in self.objects])
+
+    def _handle_scene_version(self, payload):
+        return True, json.dumps({"version": self.version, "busy": self._busy()})
+
+    def _handle_health(self, payload):
+        return True, json.dumps({"status": "ok", "scene_version": self.version, "busy": self._busy(), "queued_commands": 0})
+
+    def _handle_scene_state(self, payload):
+        objects = [{"id": obj["id"], "name": obj["name"], "position": obj["position"], "scale": obj["scale"],
+                    # Imported models have no renderer of their own (see SceneController.GetSceneState).
+                    "color": obj["color"] or {"r": 1.0, "g": 1.0, "b": 1.0}, "has_color": not obj["name"].startswith("Model_")}
+                   for obj in self.objects]
+        return True, json.dumps({"version": self.version, "busy": self._busy(), "lighting": self.lighting, "objects": objects})
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    # The batch simulation handler uses python/simulation.py
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="Run a stand-in Unity scene API server.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--frame-time", type=float, default=0.0)
+    parser.add_argument("--glb-load-time", type=float, default=0.05)
+    parser.add_argument("--job-time-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = UnityStandIn(port=args.port, frame_time=args.frame_time, glb_load_time=args.glb_load_time,
+                          job_time_scale=args.job_time_scale).start()
+    print(f"Unity stand-in listening on {server.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,271 @@
+# tool_registry.py
+#
+# One source for the tools the agent can call. Registering a function with
+# @registry.tool(description, **schemas) derives its OpenAI tool definition
+# from the function itself:
+#   - parameter types from the annotations (str, int, float, bool, list, dict);
+#     structured parameters (vectors, colors, batch items) take a JSON schema
+#     fragment passed to the decorator instead
+#   - parameters without a default are required; other defaults are listed
+#   - parameter descriptions come from the docstring's ":param name:" lines,
+#     unless the fragment has its own
+# Each tool's parameter schema is compiled once into a tree of small check
+# functions. validate() runs them on the parsed arguments before the tool is
+# called and returns every problem with its path (e.g. "position.x: required"),
+# so a malformed call fails without a Unity round trip.
+#
+# The validators cover the schema subset the tool definitions use: type,
+# properties, required, items, enum, minimum and maximum. Properties that are
+# not declared are allowed inside objects, but not as top-level arguments.
+# A null optional argument means "use the default".
+
+import difflib
+import inspect
+import json
+import re
+from collections import OrderedDict
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+# JSON type -> the Python types json.loads produces for it. Exact types, so True is not a number.
+_PYTHON_TYPES = {
+    "string": frozenset({str}),
+    "number": frozenset({int, float}),
+    "integer": frozenset({int}),
+    "boolean": frozenset({bool}),
+    "object": frozenset({dict}),
+    "array": frozenset({list}),
+}
+
+_PARAM_LINE = re.compile(r"^:param (\w+):\s*(.*)$")
+
+
+def _type_name(value) -> str:
+    if value is None:
+        return "null"
+    for python_type, json_type in reversed(list(_JSON_TYPES.items())):
+        if isinstance(value, python_type):
+            return json_type
+    return type(value).__name__
+
+
+def _render(path) -> str:
+    """Renders a path, kept as nested (parent, key) pairs until a problem needs it, as 'objects[2].position.x'."""
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    rendered = ""
+    for key in reversed(keys):
+        rendered += f"[{key}]" if isinstance(key, int) else (f".{key}" if rendered else key)
+    return rendered or "arguments"
+
+
+def compile_schema(schema: dict):
+    """
+    Compiles a JSON schema into a check function `check(value, path, problems)`
+    that appends a message for every violation to `problems`. `path` is None for
+    the top level and (parent path, key) below it. Only the checks a schema asks
+    for end up in its function, and paths are rendered only for problems.
+    """
+    checks = []
+    expected = schema.get("type")
+    accepted = _PYTHON_TYPES.get(expected)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        listed = ", ".join(repr(option) for option in allowed)
+
+        def check_enum(value, path, problems):
+            if value not in allowed:
+                problems.append(f"{_render(path)}: must be one of {listed}, got {value!r}")
+        checks.append(check_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        low, high = schema.get("minimum"), schema.get("maximum")
+        if low is not None and high is not None:
+            bounds = f"between {low} and {high}"
+        else:
+            bounds = f"at least {low}" if low is not None else f"at most {high}"
+
+        def check_range(value, path, problems):
+            if (low is not None and value < low) or (high is not None and value > high):
+                problems.append(f"{_render(path)}: must be {bounds}, got {value}")
+        checks.append(check_range)
+
+    properties = schema.get("properties", {})
+    required = schema.get("required", ())
+    # (key, check or None, required), one pass over the object's fields.
+    fields = [(key, compile_schema(sub) if sub else None, key in required) for key, sub in properties.items()]
+    fields += [(key, None, True) for key in required if key not in properties]
+    if fields:
+        def check_object(value, path, problems):
+            for key, check_field, needed in fields:
+                item = value.get(key)
+                if item is None:
+                    if needed:
+                        problems.append(f"{_render((path, key))}: required")
+                elif check_field is not None:
+                    check_field(item, (path, key), problems)
+        checks.append(check_object)
+
+    if schema.get("items"):
+        check_item = compile_schema(schema["items"])
+
+        def check_items(value, path, problems):
+            for index, item in enumerate(value):
+                check_item(item, (path, index), problems)
+        checks.append(check_items)
+
+    def wrong_type(value, path, problems) -> bool:
+        if type(value) in accepted or (expected == "integer" and type(value) is float and value.is_integer()):
+            return False
+        problems.append(f"{_render(path)}: expected {expected}, got {_type_name(value)}")
+        return True
+
+    if accepted is None:
+        def check(value, path, problems):
+            for step in checks:
+                step(value, path, problems)
+    elif not checks:
+        def check(value, path, problems):
+            if type(value) not in accepted:
+                wrong_type(value, path, problems)
+    elif len(checks) == 1:
+        only = checks[0]
+
+        def check(value, path, problems):
+            if type(value) in accepted or not wrong_type(value, path, problems):
+                only(value, path, problems)
+    else:
+        def check(value, path, problems):
+            if type(value) in accepted or not wrong_type(value, path, problems):
+                for step in checks:
+                    step(value, path, problems)
+
+    return check
+
+
+def param_descriptions(function) -> dict:
+    """Reads the ':param name: text' lines (with indented continuation lines) of a docstring."""
+    descriptions, current = {}, None
+    for line in (inspect.getdoc(function) or "").splitlines():
+        line = line.strip()
+        match = _PARAM_LINE.match(line)
+        if match:
+            current = match.group(1)
+            descriptions[current] = match.group(2)
+        elif current and line and not line.startswith(":"):
+            descriptions[current] += " " + line
+        else:
+            current = None
+    return descriptions
+
+
+class Tool:
+    """
+    A registered tool: the function, its OpenAI definition and its compiled validator.
+
+    :param function: The tool implementation.
+    :param description: What the tool does, as the model should read it.
+    :param schemas: JSON schema fragments for parameters whose annotation is not enough.
+    :param unchecked: Parameters the tool validates itself; their schema only guides the model.
+    """
+    def __init__(self, function, description: str, schemas: dict, unchecked=()):
+        self.name = function.__name__
+        self.function = function
+        signature = inspect.signature(function)
+        docs = param_descriptions(function)
+        unknown = set(schemas) - set(signature.parameters)
+        if unknown:
+            raise TypeError(f"Schemas given for {self.name}() parameters that do not exist: {', '.join(sorted(unknown))}")
+
+        properties, required = OrderedDict(), []
+        for name, parameter in signature.parameters.items():
+            if name in schemas:
+                schema = dict(schemas[name])
+            elif parameter.annotation in _JSON_TYPES:
+                schema = {"type": _JSON_TYPES[parameter.annotation]}
+            else:
+                raise TypeError(f"{self.name}({name}): annotate it with str, int, float, bool, list or dict, or pass a schema")
+            if docs.get(name) and "description" not in schema:
+                schema["description"] = docs[name]
+            if parameter.default is inspect.Parameter.empty:
+                required.append(name)
+            elif parameter.default is not None:
+                schema["default"] = parameter.default
+            properties[name] = schema
+
+        self.parameters = dict(properties)
+        self.required = frozenset(required)
+        self.definition = {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": description,
+                "parameters": {"type": "object", "properties": properties, "required": required},
+            },
+        }
+        checked = {name: ({} if name in unchecked else schema) for name, schema in properties.items()}
+        self._check = compile_schema({"type": "object", "properties": checked, "required": required})
+        json.dumps(self.definition)  # fails at import if a default is not JSON-serializable
+
+    def validate(self, arguments) -> tuple:
+        """
+        Checks parsed arguments against the tool's schema.
+
+        :return: (arguments without null optional values, list of problems); no problems means the call may run.
+        """
+        if not isinstance(arguments, dict):
+            return arguments, [f"arguments: expected object, got {_type_name(arguments)}"]
+        problems = []
+        for key in arguments:
+            if key not in self.parameters:
+                close = difflib.get_close_matches(key, self.parameters, n=1)
+                problems.append(f"{key}: unexpected argument" + (f" (did you mean '{close[0]}'?)" if close else ""))
+        arguments = {key: value for key, value in arguments.items() if value is not None or key in self.required}
+        self._check(arguments, None, problems)
+        return arguments, problems
+
+
+class ToolRegistry:
+    """The tools offered to the model, in registration order."""
+    def __init__(self):
+        self._tools = OrderedDict()
+
+    def tool(self, description: str, unchecked=(), **schemas):
+        """
+        Decorator registering a function as a tool. The function itself is returned unchanged.
+
+        :param description: What the tool does, as the model should read it.
+        :param unchecked: Parameters the tool validates itself (their schema is only sent to the model).
+        :param schemas: JSON schema fragments by parameter name, e.g. position=VECTOR3.
+        """
+        def register(function):
+            registered = Tool(function, description, schemas, unchecked)
+            if registered.name in self._tools:
+                raise ValueError(f"Tool '{registered.name}' is registered twice")
+            self._tools[registered.name] = registered
+            return function
+        return register
+
+    def unregister(self, name: str):
+        self._tools.pop(name, None)
+
+    def get(self, name: str):
+        return self._tools.get(name)
+
+    def definitions(self) -> list:
+        """The OpenAI tool definitions of every registered tool."""
+        return [registered.definition for registered in self._tools.values()]
+
+    def functions(self) -> dict:
+        """Tool name -> function."""
+        return {name: registered.function for name, registered in self._tools.items()}
+
+    def validate(self, name: str, arguments) -> tuple:
+        """Validates the arguments of a call to tool `name`; see Tool.validate."""
+        registered = self._tools.get(name)
+        if registered is None:
+            return arguments, [f"unknown tool '{name}'"]
+        return registered.validate(arguments)
@@ -1,97 +1,350 @@
 # tools.py (Upgraded for VLM, Simulation, and Queries)
 #
 # Defines the suite of tools that the Autonomous Agent can use to interact
-# with the world (Unity, Web, GUI, Code). Each function is decorated to
-# be recognizable by the OpenAI tool-calling API.
+# with the world (Unity, Web, GUI, Code). Each tool function is registered
+# with @REGISTRY.tool, which derives its OpenAI tool definition and argument
+# validator from the signature and docstring.
 
-import requests
+import importlib.util
 import json
 import os
+import sys
+import time
 from pathlib import Path
 import config
 import base64
-import pyautogui # For real GUI automation
+from unity_pool import get_unity_pool
+from scene_state import get_scene_mirror
+from asset_cache import get_asset_cache
+import tracing
+import scene_spec
+from vision_cache import get_vision_cache, image_hash
+from image_pipeline import prepare_image
+from openai_client import get_openai_client
+from tool_registry import ToolRegistry
+
+# Heavy or optional dependencies (pyautogui, NumPy via asset_catalog, simulation
+# and glb_optimizer) are imported by the tools that use them, on first use.
+# Model search also works without NumPy (asset_catalog falls back to a plain scan).
+# Tools whose dependencies this host lacks are not registered (see the end of this file).
+
+# --- Tool registry ---
+# The LLM-facing tools are registered with @REGISTRY.tool below. Their definitions
+# are derived from the signatures and docstrings (see tool_registry.py), and every
+# call is validated against them before it runs. The fragments below describe
+# the parameters whose annotation is not enough.
+REGISTRY = ToolRegistry()
+
+VECTOR3 = {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}, "z": {"type": "number"}},
+           "required": ["x", "y", "z"]}
+COLOR = {"type": "object", "properties": {channel: {"type": "number", "minimum": 0, "maximum": 1} for channel in "rgb"},
+         "required": ["r", "g", "b"]}
+OBJECT_ID = {"type": "string", "description": "The object_id returned by the spawn, e.g. 'cube_1'."}
+
+SPAWN_ITEM = {
+    "type": "object",
+    "properties": {
+        "object_name": {"type": "string", "description": "Name of the primitive ('cube', 'sphere') or model file ('my_model.glb')."},
+        "position": VECTOR3,
+        "scale": VECTOR3,
+        "color": COLOR,
+        "object_id": {"type": "string", "description": "Optional id for the object, unique in the scene (e.g. 'robot'). Unity assigns one like 'cube_3' otherwise."},
+    },
+    "required": ["object_name", "position"],
+}
+
+SCENE_SPEC = {
+    "type": "object",
+    "properties": {
+        "objects": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": "The object's id in the scene, unique in the spec, e.g. 'robot'. Keep the same ids when re-applying a corrected spec."},
+                    "shape": {"type": "string", "enum": ["cube", "sphere", "cylinder", "capsule", "plane", "quad"], "description": "A primitive. Give either shape or model."},
+                    "model": {"type": "string", "description": "A model search query like 'fox', or an imported model file like 'low_poly_fox.glb'."},
+                    "position": VECTOR3,
+                    "scale": VECTOR3,
+                    "color": {"type": "string", "description": "A color name ('red', 'brown') or '#rrggbb'. Primitives only."},
+                    "count": {"type": "integer", "description": "Number of copies, each moved by offset from the previous one. Ids get _1, _2, ... suffixes."},
+                    "offset": VECTOR3,
+                },
+                "required": ["position"],
+            },
+        },
+        "lighting": {"type": "string", "enum": list(scene_spec.LIGHTING_PRESETS)},
+        "mode": {"type": "string", "enum": list(scene_spec.MODES), "description": "'replace' (default): the scene should contain exactly these objects; others are deleted. 'add': leave other objects alone."},
+    },
+    "required": ["objects"],
+}
+
+SIMULATION_EPISODE = {
+    "type": "object",
+    "properties": {
+        "robot_name": {"type": "string", "description": "Start from this object's current position."},
+        "target_name": {"type": "string", "description": "Use this object's current position as the target."},
+        "start": VECTOR3,
+        "target": VECTOR3,
+        "speed": {"type": "number", "minimum": 0, "description": "Units per second (default 5)."},
+        "duration": {"type": "number", "minimum": 0, "description": "Maximum seconds per episode (default 10)."},
+        "reach_distance": {"type": "number", "minimum": 0, "description": "Distance that counts as reaching the target (default 1)."},
+    },
+}
 
 # --- Helper Function for Unity Communication ---
 def send_command_to_unity(endpoint: str, payload: dict, method: str = "POST") -> dict:
-    """Helper function to send requests to the Unity API."""
-    url = f"{config.UNITY_API_URL}/{endpoint}"
-    try:
-        if method.upper() == "POST":
-            # Use curl as a workaround for Unity HttpServer Python compatibility issue
-            import subprocess
-            json_data = json.dumps(payload)
-            
-            curl_cmd = [
-                'curl', '-X', 'POST', url,
-                '-H', 'Content-Type: application/json',
-                '-d', json_data,
-                '-s', '-w', '%{http_code}'
-            ]
-            
-            result = subprocess.run(curl_cmd, capture_output=True, text=True, timeout=15)
-            response_text = result.stdout
-            
-            # Extract status code (last 3 characters)
-            if len(response_text) >= 3:
-                status_code = int(response_text[-3:])
-                response_body = response_text[:-3]
-                
-                if status_code == 200:
-                    print(f"UNITY API SUCCESS: Called endpoint '{endpoint}'. Response: {response_body}")
-                    return {"success": True, "data": response_body}
-                else:
-                    print(f"UNITY API ERROR: Status {status_code}. Response: {response_body}")
-                    return {"success": False, "error": f"HTTP {status_code}: {response_body}"}
-            else:
-                return {"success": False, "error": "Invalid response from Unity"}
-        else: # Default to GET
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                response_json = response.json()
-                print(f"UNITY API SUCCESS: Called '{endpoint}'. Response: {response_json.get('message')}")
-                return {"success": True, "data": response_json.get('message')}
-            else:
-                error_message = f"Unity API Error: Status {response.status_code} - {response.text}"
-                print(error_message)
-                return {"success": False, "error": error_message}
-            
-    except Exception as e:
-        error_message = f"UNITY API ERROR: Failed to call endpoint '{endpoint}'. Is Unity in Play mode? Error: {e}"
-        print(error_message)
-        return {"success": False, "error": error_message}
+    """Helper function to send requests to the current session's Unity instance, failing over if it goes away."""
+    return get_unity_pool().send(endpoint, payload, method)
+
+def wait_for_unity_job(job_id: str, timeout: float = None) -> dict:
+    """
+    Waits for a Unity job (GLB load, simulation) to finish, using 'job_status' long polls.
+    Returns {"success", "data" or "error", "job"}, where success means the job succeeded.
+
+    :param job_id: The job id returned by the command that started the job.
+    :param timeout: Seconds to wait in total; defaults to config.UNITY_JOB_TIMEOUT.
+    """
+    deadline = time.monotonic() + (config.UNITY_JOB_TIMEOUT if timeout is None else timeout)
+    job = None
+    while True:
+        wait = max(0.0, min(config.UNITY_JOB_POLL_WAIT, deadline - time.monotonic()))
+        response = send_command_to_unity("job_status", {"job_id": job_id, "wait": round(wait, 3)})
+        if not response["success"]:
+            return {"success": False, "error": response["error"], "job": job}
+        try:
+            job = json.loads(response["data"])
+        except (TypeError, ValueError):
+            return {"success": False, "error": f"Unexpected job_status response: {response['data']}", "job": job}
+        if job.get("state") != "running":
+            try:
+                job["result"] = json.loads(job["result"]) if job.get("result") else None
+            except (TypeError, ValueError):
+                pass
+            key = "data" if job["state"] == "succeeded" else "error"
+            return {"success": job["state"] == "succeeded", key: job.get("message"), "job": job}
+        if time.monotonic() >= deadline:
+            progress = int(float(job.get("progress") or 0.0) * 100)
+            return {"success": False, "error": f"Job {job_id} is still running after {job.get('elapsed', 0):.1f}s ({progress}% done).", "job": job}
 
 # --- Core Tools ---
-def spawn_object(object_name: str, position: dict, scale: dict = {"x": 1.0, "y": 1.0, "z": 1.0}, color: dict = None) -> dict:
+@REGISTRY.tool("Spawns a primitive or imported model in the Unity scene and returns its object_id. Models are loaded before it returns; a model that fails to load is reported as an error naming the fallback object spawned in its place.",
+               position=VECTOR3, scale=VECTOR3, color=COLOR)
+def spawn_object(object_name: str, position: dict, scale: dict = {"x": 1.0, "y": 1.0, "z": 1.0}, color: dict = None,
+                 object_id: str = None) -> dict:
     """
     Spawns a primitive object (cube, sphere, etc.) or a pre-existing asset/model in the Unity scene.
+    The result's 'object_id' names the object for update_object and delete_object.
     
     :param object_name: The name of the primitive ('cube', 'sphere') or the name of the model file (e.g., 'classic_cola_can.glb').
     :param position: A dictionary with 'x', 'y', 'z' coordinates.
     :param scale: An optional dictionary with 'x', 'y', 'z' scale values.
     :param color: An optional dictionary with 'r', 'g', 'b' values (0-1) for primitives.
+    :param object_id: An optional id for the new object, unique in the scene (e.g., 'robot'); Unity assigns one like 'cube_3' otherwise.
     """
-    # Build the structured payload for the new ARSS API
+    payload = _build_spawn_payload(object_name, position, scale, color, object_id)
+    result = send_command_to_unity("spawn", payload)
+    if result["success"] and result.get("job_id"):
+        # GLB models load over several frames; report the loaded model (or the fallback), not "started"
+        outcome = wait_for_unity_job(result["job_id"])
+        result = {**result, **outcome}
+        result.pop("data" if "error" in outcome else "error", None)
+        result.pop("job", None)
+    get_scene_mirror().record_spawns(result, [dict(payload, id=result.get("object_id"))])
+    return result
+
+def _build_spawn_payload(object_name: str, position: dict, scale: dict = None, color: dict = None, object_id: str = None) -> dict:
+    """Builds the structured SpawnPayload for the ARSS API."""
     payload = {
         "object_name": object_name,
         "position": {"x": float(position["x"]), "y": float(position["y"]), "z": float(position["z"])}
     }
     
+    if object_id:
+        payload["id"] = str(object_id)
+    
     if scale:
         payload["scale"] = {"x": float(scale["x"]), "y": float(scale["y"]), "z": float(scale["z"])}
     
     if color:
         payload["color"] = {"r": float(color["r"]), "g": float(color["g"]), "b": float(color["b"])}
     
-    return send_command_to_unity("spawn", payload)
+    return payload
+
+@REGISTRY.tool("Spawns several primitives or imported models in a single request. Prefer this over repeated spawn_object calls when creating more than one object. Returns a result with the object_id of each item.",
+               objects={"type": "array", "items": SPAWN_ITEM})
+def spawn_objects(objects: list) -> dict:
+    """
+    Spawns many objects with one request to Unity's 'spawn_batch' endpoint.
+    Each item takes the same fields as spawn_object. Items that fail (locally or in
+    Unity) are reported individually and do not stop the rest of the batch.
+    
+    :param objects: A list of dictionaries with 'object_name', 'position' and optional 'scale', 'color' and 'object_id'.
+    """
+    print(f"SPAWN TOOL: Spawning a batch of {len(objects)} objects.")
+    results = [None] * len(objects)
+    payloads, indices = [], []
+    for index, item in enumerate(objects):
+        try:
+            payloads.append(_build_spawn_payload(
+                item["object_name"], item["position"],
+                item.get("scale", {"x": 1.0, "y": 1.0, "z": 1.0}), item.get("color"), item.get("object_id")
+            ))
+            indices.append(index)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            results[index] = {"index": index, "success": False, "error": f"Invalid spawn parameters: {e!r}"}
+
+    batch_size = config.SPAWN_BATCH_MAX_SIZE
+    for start in range(0, len(payloads), batch_size):
+        chunk, chunk_indices = payloads[start:start + batch_size], indices[start:start + batch_size]
+        response = send_command_to_unity("spawn_batch", {"objects": chunk})
+        try:
+            item_results = json.loads(response["data"])["results"] if response["success"] else None
+        except (TypeError, ValueError, KeyError):
+            item_results = None
+        if item_results is None:
+            get_scene_mirror().mark_stale()
+        else:
+            spawned = [dict(chunk[offset], id=item.get("object_id")) for offset, item in enumerate(item_results[:len(chunk)])
+                       if item.get("success")]
+            get_scene_mirror().record_spawns(response, spawned)
 
+        for offset, index in enumerate(chunk_indices):
+            if item_results is None or offset >= len(item_results):
+                error = response.get("error") or f"Unexpected spawn_batch response: {response.get('data')}"
+                results[index] = {"index": index, "success": False, "error": error}
+            else:
+                item = item_results[offset]
+                key = "message" if item.get("success") else "error"
+                results[index] = {"index": index, "success": bool(item.get("success")), key: item.get("message")}
+                if item.get("object_id"):
+                    results[index]["object_id"] = item["object_id"]
+                if item.get("success") and item.get("job_id"):
+                    results[index]["job_id"] = item["job_id"]
+
+    # GLB items are still loading; Unity loads them concurrently, so wait for them against one deadline.
+    deadline = time.monotonic() + config.UNITY_JOB_TIMEOUT
+    for result in results:
+        job_id = result.pop("job_id", None)
+        if job_id is None:
+            continue
+        outcome = wait_for_unity_job(job_id, max(0.0, deadline - time.monotonic()))
+        result.pop("message", None)
+        result["success"] = outcome["success"]
+        result["message" if outcome["success"] else "error"] = outcome.get("data") or outcome.get("error")
+
+    failed = sum(1 for result in results if not result["success"])
+    return {
+        "success": failed == 0,
+        "spawned": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
+
+def _build_update_payload(object_id: str, position: dict = None, scale: dict = None, color: dict = None) -> dict:
+    """Builds an UpdatePayload; the has_* flags tell Unity which fields to apply."""
+    payload = {"object_id": str(object_id)}
+    if position:
+        payload.update(has_position=True, position={"x": float(position["x"]), "y": float(position["y"]), "z": float(position["z"])})
+    if scale:
+        payload.update(has_scale=True, scale={"x": float(scale["x"]), "y": float(scale["y"]), "z": float(scale["z"])})
+    if color:
+        payload.update(has_color=True, color={"r": float(color["r"]), "g": float(color["g"]), "b": float(color["b"])})
+    return payload
+
+def _send_batch(endpoint: str, field: str, items: list, record) -> list:
+    """
+    Sends items to a Unity batch endpoint in chunks of SPAWN_BATCH_MAX_SIZE and
+    returns one {"index", "success", "message"/"error"} result per item.
+    `record(response, succeeded_items)` updates the scene mirror.
+    """
+    results = []
+    batch_size = config.SPAWN_BATCH_MAX_SIZE
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        response = send_command_to_unity(endpoint, {field: chunk})
+        try:
+            item_results = json.loads(response["data"])["results"] if response["success"] else None
+        except (TypeError, ValueError, KeyError):
+            item_results = None
+        if item_results is None:
+            get_scene_mirror().mark_stale()
+            error = response.get("error") or f"Unexpected {endpoint} response: {response.get('data')}"
+            results.extend({"index": start + offset, "success": False, "error": error} for offset in range(len(chunk)))
+            continue
+        record(response, [chunk[offset] for offset, item in enumerate(item_results[:len(chunk)]) if item.get("success")])
+        for offset in range(len(chunk)):
+            item = item_results[offset] if offset < len(item_results) else {"success": False, "message": "No result from Unity."}
+            key = "message" if item.get("success") else "error"
+            results.append({"index": start + offset, "success": bool(item.get("success")), key: item.get("message")})
+    return results
+
+@REGISTRY.tool("Moves, rescales or recolors one spawned object in place by its object_id. Only the given fields change. Use this to correct a scene instead of clearing and respawning it.",
+               object_id=OBJECT_ID, position=VECTOR3, scale=VECTOR3, color=COLOR)
+def update_object(object_id: str, position: dict = None, scale: dict = None, color: dict = None) -> dict:
+    """
+    Moves, rescales or recolors a spawned object in place, without respawning it.
+    Only the given fields change.
+    
+    :param object_id: The id returned when the object was spawned (e.g., 'cube_1' or 'robot').
+    :param position: An optional dictionary with 'x', 'y', 'z' coordinates.
+    :param scale: An optional dictionary with 'x', 'y', 'z' scale values (for models, relative to their automatic size).
+    :param color: An optional dictionary with 'r', 'g', 'b' values (0-1); primitives only.
+    """
+    if not (position or scale or color):
+        return {"success": False, "error": "Nothing to update: give a position, scale or color."}
+    payload = _build_update_payload(object_id, position, scale, color)
+    result = send_command_to_unity("update_object", payload)
+    get_scene_mirror().record_updates(result, [payload])
+    return result
+
+def update_objects(updates: list) -> dict:
+    """
+    Applies many updates with one request to Unity's 'update_batch' endpoint.
+    
+    :param updates: A list of dictionaries with 'object_id' and any of 'position', 'scale' and 'color'.
+    """
+    print(f"UPDATE TOOL: Updating a batch of {len(updates)} objects.")
+    payloads = [_build_update_payload(item["object_id"], item.get("position"), item.get("scale"), item.get("color"))
+                for item in updates]
+    results = _send_batch("update_batch", "objects", payloads, get_scene_mirror().record_updates)
+    failed = sum(1 for result in results if not result["success"])
+    return {"success": failed == 0, "updated": len(results) - failed, "failed": failed, "results": results}
+
+@REGISTRY.tool("Removes one spawned object by its object_id, leaving the rest of the scene untouched.", object_id=OBJECT_ID)
+def delete_object(object_id: str) -> dict:
+    """
+    Removes one spawned object from the scene, leaving every other object as it is.
+    
+    :param object_id: The id returned when the object was spawned (e.g., 'cube_1' or 'robot').
+    """
+    result = send_command_to_unity("delete_object", {"object_id": str(object_id)})
+    get_scene_mirror().record_deletes(result, [str(object_id)])
+    return result
+
+def delete_objects(object_ids: list) -> dict:
+    """
+    Removes many spawned objects with one request to Unity's 'delete_batch' endpoint.
+    
+    :param object_ids: The ids of the objects to remove.
+    """
+    print(f"DELETE TOOL: Deleting a batch of {len(object_ids)} objects.")
+    results = _send_batch("delete_batch", "object_ids", [str(object_id) for object_id in object_ids],
+                          get_scene_mirror().record_deletes)
+    failed = sum(1 for result in results if not result["success"])
+    return {"success": failed == 0, "deleted": len(results) - failed, "failed": failed, "results": results}
+
+@REGISTRY.tool("Clears all objects from the Unity scene.")
 def clear_scene() -> dict:
     """
     Clears all objects from the Unity scene.
     """
     # Use the new ARSS endpoint approach (no payload needed for clear_scene)
-    return send_command_to_unity("clear_scene", {})
+    result = send_command_to_unity("clear_scene", {})
+    get_scene_mirror().record_clear(result)
+    return result
 
+@REGISTRY.tool("Sets the scene's lighting to a preset.", preset={"type": "string", "enum": list(scene_spec.LIGHTING_PRESETS)})
 def set_lighting(preset: str) -> dict:
     """
     Sets the scene's lighting to a specified preset.
@@ -99,8 +352,24 @@ def set_lighting(preset: str) -> dict:
     :param preset: The name of the lighting preset (e.g., 'day', 'night', 'sunset').
     """
     payload = {"preset": preset}
-    return send_command_to_unity("set_lighting", payload)
+    result = send_command_to_unity("set_lighting", payload)
+    get_scene_mirror().record_lighting(result, preset)
+    return result
 
+# scene_spec.compile_spec checks the spec itself, with more leeway (colors as RGB, specs as text).
+@REGISTRY.tool("Builds a whole scene from one declarative spec: primitives and models (searched for and imported automatically), their transforms and colors, and the lighting. Object ids in the spec are the scene's object ids: only what differs from the current scene is changed (objects are moved, rescaled or recolored in place, missing ones spawned and, in 'replace' mode, others deleted), so re-applying a corrected spec is cheap and applying an unchanged one does nothing. Prefer this for scenes with several objects and for corrections.",
+               unchecked=("spec",), spec=SCENE_SPEC)
+def apply_scene_spec(spec: dict, dry_run: bool = False) -> dict:
+    """
+    Builds a whole scene from a declarative spec, changing only what differs from the current scene.
+    See scene_spec.py for the spec format.
+    
+    :param spec: {"objects": [...], "lighting": preset, "mode": "replace" or "add"}, or the same as JSON/YAML text.
+    :param dry_run: Report what would change without changing anything.
+    """
+    return scene_spec.apply_spec(spec, dry_run=dry_run)
+
+@REGISTRY.tool("Attaches a previously written C# script to an object in the scene.")
 def attach_script_to_object(object_name: str, script_name: str) -> dict:
     """
     Attaches a C# script component to a specified GameObject in the scene.
@@ -112,61 +381,120 @@ def attach_script_to_object(object_name: str, script_name: str) -> dict:
     return send_command_to_unity("attach_script", payload)
 
 # *** 1. NEW: VLM TOOL ***
+IMAGE_MIME_TYPES = {"png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg"}
+
+def capture_scene_image() -> dict:
+    """
+    Asks Unity to render the main camera and returns the encoded frame.
+    In 'inline' mode the image bytes come back in the HTTP response; in 'file' mode
+    Unity only responds once the file is written, and reports where it is.
+    
+    Returns {"success": True, "image_bytes": bytes, "mime_type": str} or an error dict.
+    """
+    payload = {"mode": config.VISION_CAPTURE_MODE, "format": config.VISION_CAPTURE_FORMAT}
+    capture_result = send_command_to_unity("capture_vision", payload)
+    if not capture_result["success"]:
+        return capture_result
+
+    if config.VISION_CAPTURE_MODE == "inline":
+        try:
+            capture = json.loads(capture_result["data"])
+            image_bytes = base64.b64decode(capture["image_base64"])
+        except (TypeError, ValueError, KeyError) as e:
+            return {"success": False, "error": f"Unity returned an unreadable scene capture: {e!r}"}
+        image_format = capture.get("format", config.VISION_CAPTURE_FORMAT)
+    else:
+        message = capture_result["data"] or ""
+        prefix = "Scene captured to "
+        if message.startswith(prefix):
+            image_path = Path(message[len(prefix):].strip())
+        else:
+            image_path = Path(config.UNITY_ASSETS_PATH).parent / config.UNITY_SCREENSHOT_PATH
+        if not image_path.exists():
+            return {"success": False, "error": f"Scene was captured but the image file was not found at {image_path}."}
+        image_bytes = image_path.read_bytes()
+        image_format = image_path.suffix.lstrip(".") or config.VISION_CAPTURE_FORMAT
+
+    mime_type = IMAGE_MIME_TYPES.get(image_format.lower(), "image/png")
+    return {"success": True, "image_bytes": image_bytes, "mime_type": mime_type}
+
+@REGISTRY.tool("Takes a picture of the Unity scene and uses a Vision-Language Model to answer a question about it. Use this to verify results or analyze the visual state.")
 def capture_and_analyze_scene(analysis_prompt: str) -> dict:
     """
     Captures the current view from the Unity camera and uses a VLM to analyze it.
     :param analysis_prompt: The question to ask the VLM about the scene image.
     """
     print(f"VISION TOOL: Capturing scene from Unity...")
-    capture_result = send_command_to_unity("capture_vision", {})
-    if not capture_result["success"]:
-        return capture_result
+    with tracing.span("vision capture", "vision") as span:
+        capture = capture_scene_image()
+        span.set(response_bytes=len(capture.get("image_bytes") or b""))
+    if not capture["success"]:
+        return capture
 
-    # The image is saved to Unity's project directory, so check there first
-    image_path = Path("/Users/dullmanatee/My project/scene_capture.png")
-    if not image_path.exists():
-        # Fallback to current directory
-        image_path = Path("scene_capture.png")
-        if not image_path.exists():
-            return {"success": False, "error": "Scene was captured but the image file was not found."}
+    # An unchanged frame asked the same question gets the previous answer. The scene
+    # version is part of the key, so no answer outlives a change the mirror saw.
+    cache = get_vision_cache() if config.VISION_CACHE_ENABLED else None
+    if cache is not None:
+        frame_hash = image_hash(capture["image_bytes"])
+        scene_version = get_scene_mirror().version if config.SCENE_MIRROR_ENABLED else None
+        if scene_version is not None:
+            frame_hash += f".v{scene_version}"
+        cached_analysis = cache.get(frame_hash, analysis_prompt)
+        if cached_analysis is not None:
+            print(f"VISION TOOL: Scene unchanged, reusing cached analysis.")
+            tracing.event("vision cache hit", "vision")
+            return {"success": True, "vlm_analysis": cached_analysis, "cache": {"hit": True, **cache.stats()}}
 
     # --- REAL VLM ANALYSIS ---
     print(f"VISION TOOL: Analyzing image with VLM. Prompt: '{analysis_prompt}'")
+    image_stats = None
     try:
-        import base64
-        from openai import OpenAI
-        from config import OPENAI_API_KEY
-        
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        with open(image_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        with tracing.span("vision prepare", "vision") as span:
+            upload = prepare_image(capture["image_bytes"], capture["mime_type"])
+            span.set(upload_bytes=upload["stats"]["upload_bytes"])
+        image_stats = upload["stats"]
+        print(f"VISION TOOL: Upload size {image_stats['original_bytes']} -> {image_stats['upload_bytes']} bytes.")
+
+        client = get_openai_client()
+        base64_image = base64.b64encode(upload["image_bytes"]).decode('utf-8')
         
-        vlm_response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": analysis_prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": f"data:image/png;base64,{base64_image}"}
-                        }
-                    ]
-                }
-            ],
-            max_tokens=300
-        )
+        with tracing.span("llm vision", "llm", model=config.OPENAI_MODEL, request_bytes=len(base64_image) + len(analysis_prompt)) as span:
+            vlm_response = client.chat.completions.create(
+                model=config.OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": analysis_prompt},
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": f"data:{upload['mime_type']};base64,{base64_image}", "detail": upload["detail"]}
+                            }
+                        ]
+                    }
+                ],
+                max_tokens=300
+            )
+            if vlm_response.usage:
+                span.set(prompt_tokens=vlm_response.usage.prompt_tokens, completion_tokens=vlm_response.usage.completion_tokens)
         simulated_response = vlm_response.choices[0].message.content
         print(f"VISION ANALYSIS RESULT: {simulated_response}")
+        if cache is not None:
+            cache.put(frame_hash, analysis_prompt, simulated_response)
         
     except Exception as e:
         simulated_response = f"VISION ERROR: Could not analyze image - {e}"
     
-    return {"success": True, "vlm_analysis": simulated_response}
+    result = {"success": True, "vlm_analysis": simulated_response}
+    if image_stats is not None:
+        result["image"] = image_stats
+    if cache is not None:
+        result["cache"] = {"hit": False, **cache.stats()}
+    return result
 
 # *** 2. NEW: SIMULATION TOOL ***
+@REGISTRY.tool("Executes a physics simulation for a set duration to see if a robot can reach a target. Waits for the run to finish and returns whether the target was reached, the time taken and the robot's final position and distance.",
+               duration={"type": "number", "minimum": 0})
 def run_simulation_and_get_results(robot_name: str, target_name: str, duration: float = 10.0) -> dict:
     """
     Runs a physics-based simulation in Unity and returns the outcome.
@@ -176,26 +504,140 @@ def run_simulation_and_get_results(robot_name: str, target_name: str, duration:
     """
     print(f"SIMULATION TOOL: Running simulation. Robot: '{robot_name}', Target: '{target_name}'.")
     payload = {"robot_name": robot_name, "target_name": target_name, "duration": duration}
-    return send_command_to_unity("run_simulation", payload)
+    result = send_command_to_unity("run_simulation", payload)
+    # The robot moves for the whole run; Unity reports the scene as busy until it settles.
+    get_scene_mirror().mark_stale()
+    if not result["success"] or not result.get("job_id"):
+        return result
+
+    outcome = wait_for_unity_job(result["job_id"], float(duration) + config.UNITY_JOB_TIMEOUT)
+    job = outcome.get("job") or {}
+    if job.get("state") in (None, "running"):
+        # The wait itself failed; the simulation may still be running in Unity.
+        return {"success": False, "error": outcome["error"], "job_id": result["job_id"]}
+    # The tool succeeded whenever the simulation ran to an outcome, including "timed out".
+    simulation = job.get("result") if isinstance(job.get("result"), dict) else {}
+    return {
+        "success": True,
+        "data": {
+            "reached_target": job["state"] == "succeeded",
+            "reason": job.get("message"),
+            "elapsed": simulation.get("elapsed"),
+            "final_distance": simulation.get("final_distance"),
+            "final_position": simulation.get("final_position"),
+        },
+        "job_id": result["job_id"],
+    }
+
+@REGISTRY.tool("Runs many robot/target episodes at once (e.g. a sweep of start positions or speeds) at a fixed timestep, much faster than real time. The robot moves straight at the target, as in run_simulation_and_get_results. Returns success, time to target and path length per episode, plus the success rate.",
+               episodes={"type": "array", "items": SIMULATION_EPISODE}, timestep={"type": "number", "minimum": 0},
+               engine={"type": "string", "enum": ["unity", "reference"]})
+def run_simulation_batch(episodes: list, timestep: float = config.SIMULATION_TIMESTEP, engine: str = "unity") -> dict:
+    """
+    Runs many robot/target episodes (e.g. a sweep of start positions or speeds) at a
+    fixed timestep, much faster than real time, and returns compact results per episode.
+
+    :param episodes: Dicts with 'robot_name' or a 'start' position, 'target_name' or a 'target' position,
+                     and optional 'speed', 'duration' and 'reach_distance'.
+    :param timestep: Seconds per simulation step.
+    :param engine: "unity" runs the batch in Unity; "reference" pre-screens the sweep locally without
+                   Unity (the NumPy reference in simulation.py), taking named objects' positions from the scene mirror.
+    """
+    print(f"SIMULATION TOOL: Running a batch of {len(episodes)} episodes ({engine}).")
+    fields = ("speed", "duration", "reach_distance")
+    if engine == "reference":
+        resolved = []
+        for index, episode in enumerate(episodes):
+            item = {key: float(episode[key]) for key in fields if episode.get(key) is not None}
+            for name_key, point_key in (("robot_name", "start"), ("target_name", "target")):
+                if episode.get(name_key):
+                    obj, error = get_scene_mirror().find(episode[name_key])
+                    if error:
+                        return {"success": False, "error": f"Episode {index}: {error['error']}"}
+                    item[point_key] = obj["position"]
+                elif episode.get(point_key):
+                    item[point_key] = episode[point_key]
+                else:
+                    return {"success": False, "error": f"Episode {index} needs '{name_key}' or '{point_key}'."}
+            resolved.append(item)
+        try:
+            import simulation
+        except ImportError as e:
+            return {"success": False, "error": f"The reference engine needs NumPy ({e}); use engine='unity'."}
+        batch = simulation.run_batch(resolved, float(timestep))
+    elif engine == "unity":
+        payload_episodes = []
+        for episode in episodes:
+            item = {key: episode[key] for key in ("robot_name", "target_name") if episode.get(key)}
+            item.update({key: {axis: float(episode[key].get(axis, 0.0)) for axis in "xyz"} for key in ("start", "target") if episode.get(key)})
+            item.update({key: float(episode[key]) for key in fields if episode.get(key) is not None})
+            payload_episodes.append(item)
+        result = send_command_to_unity("run_simulation_batch", {"episodes": payload_episodes, "timestep": float(timestep)})
+        if not result["success"] or not result.get("job_id"):
+            return result
+        outcome = wait_for_unity_job(result["job_id"])
+        if not outcome["success"]:
+            return {"success": False, "error": outcome["error"], "job_id": result["job_id"]}
+        batch = outcome["job"]["result"]
+        for item in batch["episodes"]:
+            time_to_target = item["time_to_target"]
+            item["time_to_target"] = round(time_to_target, 4) if time_to_target >= 0 else None
+            item["path_length"] = round(item["path_length"], 4)
+            item["final_distance"] = round(item["final_distance"], 4)
+    else:
+        return {"success": False, "error": f"Unknown simulation engine '{engine}'. Use 'unity' or 'reference'."}
+
+    times = [item["time_to_target"] for item in batch["episodes"] if item["success"]]
+    return {
+        "success": True,
+        "engine": engine,
+        "episodes": len(batch["episodes"]),
+        "succeeded": batch["succeeded"],
+        "success_rate": round(batch["succeeded"] / len(batch["episodes"]), 4) if batch["episodes"] else None,
+        "mean_time_to_target": round(sum(times) / len(times), 4) if times else None,
+        "results": batch["episodes"],
+    }
 
 # *** 3. NEW: QUERY TOOLS ***
+@REGISTRY.tool("Returns the current {x, y, z} world coordinates of any object in the scene.")
 def get_object_position(object_name: str) -> dict:
     """Gets the current 3D world coordinates of a named object in Unity."""
     print(f"QUERY TOOL: Getting position for '{object_name}'")
+    if config.SCENE_MIRROR_ENABLED:
+        return get_scene_mirror().get_object_position(object_name)
     return send_command_to_unity("get_object_position", {"object_name": object_name})
 
+@REGISTRY.tool("Returns a list of names of all objects the agent has created in the scene.")
 def list_all_objects() -> dict:
     """Lists the names of all objects currently in the Unity scene."""
     print(f"QUERY TOOL: Listing all objects in the scene.")
+    if config.SCENE_MIRROR_ENABLED:
+        return get_scene_mirror().list_all_objects()
     return send_command_to_unity("list_all_objects", {})
 
+@REGISTRY.tool("Returns the objects within a radius of a point, nearest first, with their positions and distances. Use it to check for free space before placing objects.",
+               position=VECTOR3, radius={"type": "number", "minimum": 0}, limit={"type": "integer", "minimum": 1})
+def find_objects_near(position: dict, radius: float = 2.0, limit: int = 10) -> dict:
+    """
+    Finds the spawned objects within a radius of a point, nearest first.
+
+    :param position: A dictionary with 'x', 'y', 'z' coordinates.
+    :param radius: Search radius in world units.
+    :param limit: Maximum number of objects to return.
+    """
+    print(f"QUERY TOOL: Finding objects within {radius} of {position}")
+    return get_scene_mirror().objects_near(position, float(radius), int(limit))
+
 # *** 4. NEW: REAL GUI AUTOMATION ***
+@REGISTRY.tool("Performs a GUI click on the Unity Editor's play button. Use this to start a simulation that requires manual starting.")
 def click_unity_play_button() -> dict:
     """
     Uses GUI automation to click the 'Play' button in the Unity Editor.
     NOTE: This is highly dependent on screen resolution and requires configuration.
     """
     try:
+        # Imported here: pyautogui connects to the display on import.
+        import pyautogui
         # User must find these coordinates manually using a tool or screenshot
         # This is an example coordinate for a 1920x1080 screen.
         play_button_coords = (950, 60) 
@@ -208,6 +650,7 @@ def click_unity_play_button() -> dict:
 # --- Tool 2: Web Tool ---
 # This tool simulates searching for and "downloading" assets from the web.
 
+@REGISTRY.tool("Searches the web (a mock database) for a 3D model if it's not a basic primitive.")
 def search_web_for_3d_model(query: str) -> dict:
     """
     Searches a mock database (simulating Sketchfab) for a 3D model.
@@ -216,19 +659,35 @@ def search_web_for_3d_model(query: str) -> dict:
     """
     print(f"WEB TOOL: Searching for 3D model with query: '{query}'")
     # In a real implementation, this would make an API call to Sketchfab.
-    for key, model_info in config.MOCK_SKETCHFAB_DATABASE.items():
-        if key in query.lower():
-            print(f"WEB TOOL: Found model '{model_info['name']}'.")
-            return {"success": True, "model_name": model_info['name'], "download_url": model_info['download_url']}
+    from asset_catalog import get_asset_catalog
+
+    results = get_asset_catalog().search(query, config.ASSET_SEARCH_TOP_K)
+    if results:
+        best = results[0]
+        print(f"WEB TOOL: Found model '{best['name']}' (score {best['score']}, {len(results)} candidates).")
+        return {
+            "success": True,
+            "model_name": best["name"],
+            "download_url": best["download_url"],
+            "score": best["score"],
+            "alternatives": [
+                {"model_name": result["name"], "download_url": result["download_url"], "score": result["score"]}
+                for result in results[1:]
+            ],
+        }
     print(f"WEB TOOL: No model found for query '{query}'.")
     return {"success": False, "error": f"No 3D model found for query: {query}"}
 
-def download_and_import_model(model_name: str, download_url: str) -> dict:
+@REGISTRY.tool("Downloads a model found with the web search tool and places it in the Unity project.")
+def download_and_import_model(model_name: str, download_url: str, optimize: bool = None) -> dict:
     """
     Downloads a real 3D model from the web and places it in the Unity project's 'ImportedModels' directory.
     
     :param model_name: The name to save the model as (e.g., 'Low Poly Fox').
     :param download_url: The URL to the model file.
+    :param optimize: Also write a variant with downsized textures (and decimated meshes, if
+                     config.GLB_TRIANGLE_BUDGET is set) and return that as model_filename.
+                     Defaults to config.GLB_OPTIMIZE.
     """
     print(f"WEB TOOL: Downloading {model_name} from {download_url}")
     if "ABSOLUTE_PATH_TO_YOUR_UNITY_PROJECT" in config.UNITY_ASSETS_PATH:
@@ -245,26 +704,42 @@ def download_and_import_model(model_name: str, download_url: str) -> dict:
     import_dir.mkdir(exist_ok=True)
     file_path = import_dir / file_name
 
-    # Check if file already exists
-    if file_path.exists():
-        print(f"WEB TOOL: Model {model_name} already exists at {file_path}")
-        return {"success": True, "file_path": str(file_path), "model_filename": file_name, "unity_name": unity_prefab_name}
+    # The cache downloads each URL once (shared by aliases of the same model) and
+    # replaces an existing file only if its content differs.
+    result = get_asset_cache().materialize(download_url, file_path)
+    if not result["success"]:
+        print(f"WEB TOOL: Failed to download {model_name}: {result['error']}")
+        return {"success": False, "error": result["error"], "model_filename": file_name}
+    source = "asset cache" if result["cached"] else "download"
+    print(f"WEB TOOL: Placed {model_name} at {file_path} (from {source}, sha256 {result['sha256'][:12]})")
+    imported = {"success": True, "file_path": str(file_path), "model_filename": file_name, "unity_name": unity_prefab_name}
 
-    try:
-        # Actually download the file
-        import urllib.request
-        urllib.request.urlretrieve(download_url, file_path)
-        print(f"WEB TOOL: Successfully downloaded {model_name} to {file_path}")
-        return {"success": True, "file_path": str(file_path), "model_filename": file_name, "unity_name": unity_prefab_name}
-    except Exception as e:
-        print(f"WEB TOOL: Failed to download {model_name}: {e}")
-        # Fallback: create empty placeholder
-        file_path.touch()
-        return {"success": False, "error": f"Download failed: {e}", "file_path": str(file_path), "model_filename": file_name}
+    if config.GLB_OPTIMIZE if optimize is None else optimize:
+        if file_path.suffix.lower() != ".glb":
+            print(f"WEB TOOL: Not optimizing {file_name}; only .glb models are supported")
+            return imported
+        import glb_optimizer
+
+        optimized = glb_optimizer.optimize_glb(file_path)
+        if not optimized["success"]:
+            # The original is still usable; spawn it unoptimized.
+            print(f"WEB TOOL: {optimized['error']}; using the original model")
+            return dict(imported, optimization_error=optimized["error"])
+        stats = optimized["stats"]
+        optimized_file = Path(optimized["path"])
+        imported.update({
+            "file_path": str(optimized_file),
+            "model_filename": optimized_file.name,
+            "unity_name": optimized_file.stem,
+            "original_filename": file_name,
+            "optimization": {key: value for key, value in stats.items() if key != "textures"},
+        })
+    return imported
 
 # --- Tool 3: Code Generation Tool ---
 # This tool writes new C# scripts directly into the Unity project folder.
 
+@REGISTRY.tool("Writes a new C# MonoBehaviour script to create novel behaviors not supported by the API.")
 def write_new_unity_script(script_name: str, csharp_code: str) -> dict:
     """
     Writes a new C# script file into the Unity project's 'GeneratedScripts' directory.
@@ -294,6 +769,7 @@ def write_new_unity_script(script_name: str, csharp_code: str) -> dict:
 # --- Tool 4: GUI Automation Tool (Placeholder) ---
 # In a real implementation, this would use a library like askui or pyautogui.
 
+@REGISTRY.tool("(Placeholder) Simulates clicking on a GUI element in the Unity Editor for tasks not covered by the API.")
 def click_gui_element(element_description: str) -> dict:
     """
     (Placeholder) Simulates clicking on a GUI element within the Unity Editor.
@@ -304,185 +780,31 @@ def click_gui_element(element_description: str) -> dict:
     print(message)
     return {"success": True, "message": message}
 
-# --- Updated Tool Definitions for OpenAI ---
-TOOL_DEFINITIONS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "spawn_object",
-            "description": "Spawns a primitive or imported model in the Unity scene.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "object_name": {"type": "string", "description": "Name of the primitive ('cube', 'sphere') or model file ('my_model.glb')."},
-                    "position": {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}, "z": {"type": "number"}}},
-                    "scale": {"type": "object", "properties": {"x": {"type": "number"}, "y": {"type": "number"}, "z": {"type": "number"}}},
-                    "color": {"type": "object", "properties": {"r": {"type": "number"}, "g": {"type": "number"}, "b": {"type": "number"}}},
-                },
-                "required": ["object_name", "position"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "clear_scene",
-            "description": "Clears all objects from the Unity scene.",
-            "parameters": {
-                "type": "object",
-                "properties": {},
-                "required": [],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "set_lighting",
-            "description": "Sets the scene's lighting to a preset.",
-            "parameters": {
-                "type": "object",
-                "properties": {"preset": {"type": "string", "enum": ["day", "night", "sunset"]}},
-                "required": ["preset"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "capture_and_analyze_scene",
-            "description": "Takes a picture of the Unity scene and uses a Vision-Language Model to answer a question about it. Use this to verify results or analyze the visual state.",
-            "parameters": {
-                "type": "object",
-                "properties": { "analysis_prompt": {"type": "string", "description": "The question to ask about the visual scene. E.g., 'Is the red cube on top of the blue sphere?'"} },
-                "required": ["analysis_prompt"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "run_simulation_and_get_results",
-            "description": "Executes a physics simulation for a set duration to see if a robot can reach a target. Generates physical data.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "robot_name": {"type": "string"},
-                    "target_name": {"type": "string"},
-                    "duration": {"type": "number", "description": "Maximum seconds to run the simulation."}
-                },
-                "required": ["robot_name", "target_name"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_object_position",
-            "description": "Returns the current {x, y, z} world coordinates of any object in the scene.",
-            "parameters": { "type": "object", "properties": {"object_name": {"type": "string"}}, "required": ["object_name"], },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "list_all_objects",
-            "description": "Returns a list of names of all objects the agent has created in the scene.",
-            "parameters": {"type": "object", "properties": {}},
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "click_unity_play_button",
-            "description": "Performs a GUI click on the Unity Editor's play button. Use this to start a simulation that requires manual starting.",
-            "parameters": {"type": "object", "properties": {}},
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "search_web_for_3d_model",
-            "description": "Searches the web (a mock database) for a 3D model if it's not a basic primitive.",
-            "parameters": {
-                "type": "object",
-                "properties": {"query": {"type": "string", "description": "A search query like 'soda can' or 'desk lamp'."}},
-                "required": ["query"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "download_and_import_model",
-            "description": "Downloads a model found with the web search tool and places it in the Unity project.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "model_name": {"type": "string", "description": "The name of the model, e.g., 'Classic Cola Can'."},
-                    "download_url": {"type": "string", "description": "The download URL provided by the search tool."},
-                },
-                "required": ["model_name", "download_url"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "write_new_unity_script",
-            "description": "Writes a new C# MonoBehaviour script to create novel behaviors not supported by the API.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "script_name": {"type": "string", "description": "A valid C# class name for the script, e.g., 'WobbleEffect'."},
-                    "csharp_code": {"type": "string", "description": "The full, complete C# code for the MonoBehaviour script."},
-                },
-                "required": ["script_name", "csharp_code"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "attach_script_to_object",
-            "description": "Attaches a previously written C# script to an object in the scene.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "object_name": {"type": "string", "description": "The name of the target GameObject."},
-                    "script_name": {"type": "string", "description": "The name of the script component to attach."},
-                },
-                "required": ["object_name", "script_name"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "click_gui_element",
-            "description": "(Placeholder) Simulates clicking on a GUI element in the Unity Editor for tasks not covered by the API.",
-            "parameters": {
-                "type": "object",
-                "properties": {"element_description": {"type": "string", "description": "A clear, textual description of the GUI element to be clicked."}},
-                "required": ["element_description"],
-            },
-        },
-    },
-]
-
-# A dictionary to map tool names to their actual functions.
-AVAILABLE_TOOLS = {
-    "spawn_object": spawn_object,
-    "clear_scene": clear_scene,
-    "set_lighting": set_lighting,
-    "capture_and_analyze_scene": capture_and_analyze_scene,
-    "run_simulation_and_get_results": run_simulation_and_get_results,
-    "get_object_position": get_object_position,
-    "list_all_objects": list_all_objects,
-    "click_unity_play_button": click_unity_play_button,
-    "search_web_for_3d_model": search_web_for_3d_model,
-    "download_and_import_model": download_and_import_model,
-    "write_new_unity_script": write_new_unity_script,
-    "attach_script_to_object": attach_script_to_object,
-    "click_gui_element": click_gui_element,
-} 
\ No newline at end of file
+# --- Optional dependencies ---
+def _missing_module(name: str):
+    # find_spec locates the module without importing it.
+    return None if importlib.util.find_spec(name) is not None else f"{name} is not installed"
+
+def _gui_unavailable():
+    """Why GUI automation cannot run on this host, or None."""
+    if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        return "no display to automate (DISPLAY is not set)"
+    return _missing_module("pyautogui")
+
+# Tool name -> callable returning why the tool cannot run here, or None.
+TOOL_REQUIREMENTS = {
+    "click_unity_play_button": _gui_unavailable,
+}
+
+# Tools that cannot run here are not registered, so the model is never offered them.
+UNAVAILABLE_TOOLS = {}
+for _name, _check in TOOL_REQUIREMENTS.items():
+    _reason = _check()
+    if _reason:
+        UNAVAILABLE_TOOLS[_name] = _reason
+        REGISTRY.unregister(_name)
+        print(f"TOOLS: Not registering `{_name}`: {_reason}.")
+
+# Tool definitions for OpenAI, and tool name -> function.
+TOOL_DEFINITIONS = REGISTRY.definitions()
+AVAILABLE_TOOLS = REGISTRY.functions()
@@ -0,0 +1,309 @@
+# tracing.py
+#
+# Spans for one agent run: every LLM call, tool invocation and Unity request
+# is timed and annotated with payload sizes, token usage and retry counts.
+#   - AutonomousAgent.run starts a Trace and makes it current; spans opened
+#     anywhere below it (including tool threads, which inherit the context
+#     through the scheduler) attach to that trace. With no current trace,
+#     span() is a no-op, so health checks and scripts pay nothing
+#   - a span's parent is the span that was current when it started
+#   - finished traces can be exported as JSONL (one record per span) and as
+#     Chrome trace JSON, which chrome://tracing and ui.perfetto.dev open directly.
+#     With TRACE_DIR set, every run is written there when it ends
+#   - summary() aggregates time, tokens, bytes and retries per category and per
+#     span name; the web UI shows it at the end of each run
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import config
+
+# Numeric span attributes that are added up in summaries.
+SUMMED_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "total_tokens", "request_bytes",
+                     "response_bytes", "upload_bytes", "retries")
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation. Attributes can be added until (and when) it finishes."""
+    __slots__ = ("trace", "id", "parent_id", "name", "category", "start", "end", "thread", "attributes")
+
+    def __init__(self, trace, name: str, category: str, parent_id: str = None, attributes: dict = None):
+        self.trace = trace
+        self.id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread = threading.current_thread().name
+        self.attributes = dict(attributes or {})
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def finish(self, **attributes):
+        if self.end is None:
+            self.attributes.update(attributes)
+            self.end = time.perf_counter()
+            self.trace._record(self)
+
+    def record(self) -> dict:
+        return {
+            "type": "span",
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "start": round(self.start - self.trace.origin, 6),
+            "duration": round(self.duration, 6),
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class _NullSpan:
+    """Stands in for a span when nothing is being traced."""
+    id = None
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key: str, amount=1):
+        pass
+
+    def finish(self, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """
+    The spans of one agent run.
+
+    :param name: What is being traced, e.g. 'agent run'.
+    :param max_spans: Finished spans kept; later ones are counted as dropped (default config.TRACE_MAX_SPANS).
+    """
+    def __init__(self, name: str, max_spans: int = None, **attributes):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.finished_at = None
+        self.max_spans = max_spans or config.TRACE_MAX_SPANS
+        self.spans = []
+        self.events = []  # instant events: (offset, name, category, thread, attributes)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _record(self, span: Span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def start_span(self, name: str, category: str, parent_id: str = None, **attributes) -> Span:
+        """Starts a span that is not made current; call finish() on it when done."""
+        return Span(self, name, category, parent_id, attributes)
+
+    def event(self, name: str, category: str, **attributes):
+        with self._lock:
+            self.events.append((time.perf_counter() - self.origin, name, category,
+                                threading.current_thread().name, attributes))
+
+    def finish(self):
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.origin
+
+    # --- Summaries ---
+    def summary(self) -> dict:
+        """Time, counts and summed attributes per span category and per span name."""
+        with self._lock:
+            spans = list(self.spans)
+        by_category, by_name = {}, {}
+        for span in spans:
+            for key, table in ((span.category, by_category), (span.name, by_name)):
+                entry = table.setdefault(key, {"count": 0, "seconds": 0.0, "errors": 0})
+                entry["count"] += 1
+                entry["seconds"] += span.duration
+                entry["errors"] += bool(span.attributes.get("error"))
+                for attribute in SUMMED_ATTRIBUTES:
+                    value = span.attributes.get(attribute)
+                    if isinstance(value, (int, float)):
+                        entry[attribute] = entry.get(attribute, 0) + value
+        for table in (by_category, by_name):
+            for entry in table.values():
+                entry["seconds"] = round(entry["seconds"], 4)
+        slowest = sorted(spans, key=lambda span: span.duration, reverse=True)[:5]
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "seconds": round(self.duration, 3),
+            "spans": len(spans),
+            "dropped_spans": self.dropped,
+            "by_category": by_category,
+            "by_name": dict(sorted(by_name.items(), key=lambda item: item[1]["seconds"], reverse=True)),
+            "slowest": [{"name": span.name, "seconds": round(span.duration, 4)} for span in slowest],
+        }
+
+    # --- Export ---
+    def to_jsonl(self) -> str:
+        """A header line with the trace and its summary, then one line per span and event."""
+        with self._lock:
+            spans, events = list(self.spans), list(self.events)
+        lines = [json.dumps({"type": "trace", "id": self.id, "name": self.name, "started_at": self.started_at,
+                             "attributes": self.attributes, "summary": self.summary()}, default=str)]
+        lines += [json.dumps(span.record(), default=str) for span in sorted(spans, key=lambda span: span.start)]
+        lines += [json.dumps({"type": "event", "name": name, "category": category, "start": round(offset, 6),
+                              "thread": thread, "attributes": attributes}, default=str)
+                  for offset, name, category, thread, attributes in events]
+        return "\n".join(lines) + "\n"
+
+    def to_chrome(self) -> dict:
+        """The trace in Chrome's Trace Event Format (complete 'X' events, microsecond timestamps)."""
+        with self._lock:
+            spans, events = list(self.spans), list(self.events)
+        threads = {}
+
+        def tid(name):
+            return threads.setdefault(name, len(threads) + 1)
+
+        trace_events = []
+        for span in sorted(spans, key=lambda span: span.start):
+            trace_events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": 1, "tid": tid(span.thread),
+                "ts": round((span.start - self.origin) * 1e6, 1), "dur": round(span.duration * 1e6, 1),
+                "args": dict(span.attributes, span_id=span.id, parent_id=span.parent_id),
+            })
+        for offset, name, category, thread, attributes in events:
+            trace_events.append({"name": name, "cat": category, "ph": "i", "s": "t", "pid": 1, "tid": tid(thread),
+                                 "ts": round(offset * 1e6, 1), "args": attributes})
+        trace_events.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"{self.name} {self.id}"}})
+        for name, number in threads.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": number, "args": {"name": name}})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms",
+                "otherData": {"trace_id": self.id, "started_at": self.started_at, **self.attributes}}
+
+    def export(self, directory=None) -> dict:
+        """Writes <id>.jsonl and <id>.trace.json to `directory` (default config.TRACE_DIR). Returns their paths."""
+        directory = Path(directory or config.TRACE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}-{self.id}"
+        jsonl_path = directory / f"{stem}.jsonl"
+        chrome_path = directory / f"{stem}.trace.json"
+        jsonl_path.write_text(self.to_jsonl(), encoding="utf-8")
+        chrome_path.write_text(json.dumps(self.to_chrome(), default=str), encoding="utf-8")
+        return {"jsonl": str(jsonl_path), "chrome": str(chrome_path)}
+
+
+# --- Recording helpers ---
+@contextmanager
+def activate(trace: Trace):
+    """Makes `trace` the current trace for the enclosed code (and the tool threads it starts)."""
+    token = current_trace.set(trace)
+    span_token = current_span.set(None)
+    try:
+        yield trace
+    finally:
+        current_span.reset(span_token)
+        current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str, **attributes):
+    """
+    Times the enclosed block as a child of the current span. An exception is
+    recorded in the span's 'error' attribute and re-raised.
+    """
+    trace = current_trace.get()
+    if trace is None or not config.TRACE_ENABLED:
+        yield NULL_SPAN
+        return
+    parent = current_span.get()
+    item = Span(trace, name, category, parent.id if parent else None, attributes)
+    token = current_span.set(item)
+    try:
+        yield item
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            item.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current_span.reset(token)
+        item.finish()
+
+
+def start_span(name: str, category: str, **attributes):
+    """Starts a child of the current span without making it current; finish() it when done."""
+    trace = current_trace.get()
+    if trace is None or not config.TRACE_ENABLED:
+        return NULL_SPAN
+    parent = current_span.get()
+    return trace.start_span(name, category, parent.id if parent else None, **attributes)
+
+
+def get_current_span():
+    """The innermost open span, or NULL_SPAN when nothing is being traced."""
+    return current_span.get() or NULL_SPAN
+
+
+def event(name: str, category: str, **attributes):
+    """Records an instant event (e.g. a failover) on the current trace."""
+    trace = current_trace.get()
+    if trace is not None and config.TRACE_ENABLED:
+        trace.event(name, category, **attributes)
+
+
+def count_http_request(request):
+    """httpx request hook: counts attempts (and so the OpenAI client's retries) on the current span."""
+    item = current_span.get()
+    if item is not None:
+        item.add("http_attempts")
+        if item.attributes["http_attempts"] > 1:
+            item.add("retries")
+
+
+def payload_size(value) -> int:
+    """Approximate JSON size of a payload in bytes."""
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def finish_trace(trace: Trace) -> dict:
+    """Ends a trace and, when config.TRACE_DIR is set, exports it. Returns the export paths (or {})."""
+    trace.finish()
+    if not config.TRACE_DIR:
+        return {}
+    try:
+        paths = trace.export()
+    except OSError as e:
+        print(f"TRACING: Could not export trace {trace.id}: {e}")
+        return {}
+    print(f"TRACING: Wrote {paths['chrome']}")
+    return paths
@@ -0,0 +1,232 @@
+# unity_client.py
+#
+# Persistent HTTP client for the Unity API. Commands go over a pooled,
+# keep-alive requests.Session instead of forking a curl process (and opening
+# a new TCP connection) for every call.
+#
+# Transport modes (config.UNITY_HTTP_MODE):
+#   "pooled" - keep-alive connections reused across commands (default)
+#   "close"  - in-process, but one connection per request ("Connection: close")
+#   "curl"   - the original curl subprocess path, kept as a last resort
+#
+# Unity's Mono HttpListener sometimes drops a kept-alive connection after a
+# response has been closed, which is what originally pushed us to curl. When
+# that happens on a reused connection, the request is retried once on a fresh
+# connection, and after UNITY_KEEPALIVE_FAILURE_LIMIT such drops the client
+# switches itself to "close" mode for the rest of the process.
+
+import contextvars
+import json
+import subprocess
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+import recorder
+import tracing
+
+HTTP_MODES = ("pooled", "close", "curl")
+
+
+class UnityClient:
+    """
+    A thread-safe client for the Unity HttpServer.
+
+    :param base_url: The Unity API root, e.g. 'http://127.0.0.1:8080'.
+    :param timeout: Per-request timeout in seconds.
+    :param retry_attempts: Total attempts for requests that fail to connect.
+    :param mode: One of HTTP_MODES.
+    :param log: Print every call (defaults to config.LOG_UNITY_API_CALLS).
+    """
+    def __init__(self, base_url: str = None, timeout: float = None, retry_attempts: int = None, mode: str = None, log: bool = None):
+        self.base_url = (base_url or config.UNITY_API_URL).rstrip("/")
+        self.timeout = config.UNITY_API_TIMEOUT if timeout is None else timeout
+        self.retry_attempts = max(1, config.UNITY_RETRY_ATTEMPTS if retry_attempts is None else retry_attempts)
+        self.mode = mode or config.UNITY_HTTP_MODE
+        self.log = log
+        if self.mode not in HTTP_MODES:
+            raise ValueError(f"Unknown UNITY_HTTP_MODE '{self.mode}'. Expected one of {HTTP_MODES}.")
+
+        self._lock = threading.Lock()
+        self._keepalive_failures = 0
+        self._session = requests.Session()
+        # Sent through the recorder, which passes requests straight through unless recording or replaying.
+        adapter = recorder.RecordingAdapter("unity", HTTPAdapter(pool_connections=1, pool_maxsize=config.UNITY_POOL_MAXSIZE, max_retries=0))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Content-Type": "application/json"})
+
+    def close(self):
+        self._session.close()
+
+    def _logging(self) -> bool:
+        return config.LOG_UNITY_API_CALLS if self.log is None else self.log
+
+    def request(self, endpoint: str, payload: dict = None, method: str = "POST") -> dict:
+        """
+        Sends one command to Unity and parses the ApiResponse envelope.
+
+        Returns {"success": True, "status": int, "data": message} on success or
+        {"success": False, "status": int | None, "error": str} on failure. Both
+        carry "scene_version" when Unity reported one in the X-Scene-Version header.
+        A failure with status None means Unity never answered; it also has
+        "timed_out": True when the request was sent but the answer did not come
+        in time, so the command may still run.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        body = json.dumps(payload or {})
+        with tracing.span(f"unity {endpoint}", "unity", url=self.base_url, request_bytes=len(body)) as span:
+            result = self._request(url, endpoint, body, method, span)
+            if not result["success"]:
+                span.set(error=result["error"][:200])
+            return result
+
+    def _request(self, url: str, endpoint: str, body: str, method: str, span) -> dict:
+        last_error, timed_out = None, False
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                if self.mode == "curl" and method.upper() == "POST":
+                    status, text, headers = self._send_curl(url, body)
+                else:
+                    status, text, headers = self._send_http(url, body, method)
+                span.set(status=status, response_bytes=len(text), retries=attempt - 1)
+                return self._parse(endpoint, status, text, headers)
+            except (requests.exceptions.ReadTimeout, subprocess.TimeoutExpired) as e:
+                # The command may already be queued on Unity's main thread;
+                # replaying it could spawn duplicates, so do not retry.
+                last_error, timed_out = f"Timed out after {self.timeout}s waiting for Unity: {e}", True
+                break
+            except (requests.exceptions.ConnectionError, subprocess.SubprocessError, OSError) as e:
+                last_error = str(e)
+                if attempt < self.retry_attempts:
+                    time.sleep(config.UNITY_RETRY_BACKOFF * attempt)
+
+        span.set(retries=attempt - 1)
+        error_message = f"Failed to call endpoint '{endpoint}' after {attempt} attempt(s). Is Unity in Play mode? Error: {last_error}"
+        if self._logging():
+            print(f"UNITY API ERROR: {error_message}")
+        result = {"success": False, "status": None, "error": error_message}
+        if timed_out:
+            result["timed_out"] = True
+        return result
+
+    # --- Transports ---
+    def _send_http(self, url: str, body: str, method: str):
+        kwargs = {"timeout": self.timeout}
+        if method.upper() == "POST":
+            kwargs["data"] = body.encode("utf-8")
+        if self.mode == "close":
+            kwargs["headers"] = {"Connection": "close"}
+        try:
+            response = self._session.request(method.upper(), url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            if self.mode != "pooled" or isinstance(e, requests.exceptions.ConnectTimeout) or self._is_refused(e):
+                raise
+            # A kept-alive connection was dropped by HttpListener: retry once
+            # on a fresh connection before counting it as a real failure.
+            self._record_keepalive_failure()
+            tracing.get_current_span().add("keepalive_retries")
+            kwargs["headers"] = {"Connection": "close"}
+            response = self._session.request(method.upper(), url, **kwargs)
+        return response.status_code, response.text, response.headers
+
+    def _send_curl(self, url: str, body: str):
+        curl_cmd = [
+            "curl", "-X", "POST", url,
+            "-H", "Content-Type: application/json",
+            "-d", body,
+            "-s", "-w", "%{http_code}",
+            "--max-time", str(self.timeout),
+        ]
+        result = subprocess.run(curl_cmd, capture_output=True, text=True, timeout=self.timeout + 1)
+        output = result.stdout
+        if result.returncode == 28:  # curl: operation timed out
+            raise subprocess.TimeoutExpired(curl_cmd, self.timeout, output=output)
+        if result.returncode != 0 or len(output) < 3 or not output[-3:].isdigit():
+            raise OSError(f"curl exited with code {result.returncode}: {result.stderr.strip() or output}")
+        # curl's output is the body only; without headers the scene version is unknown.
+        return int(output[-3:]), output[:-3], {}
+
+    @staticmethod
+    def _is_refused(error: Exception) -> bool:
+        return "refused" in str(error).lower()
+
+    def _record_keepalive_failure(self):
+        with self._lock:
+            self._keepalive_failures += 1
+            if self.mode == "pooled" and self._keepalive_failures >= config.UNITY_KEEPALIVE_FAILURE_LIMIT:
+                self.mode = "close"
+                print(f"UNITY API: Keep-alive connections keep being dropped; switching to 'close' mode.")
+
+    # --- Response parsing ---
+    def _parse(self, endpoint: str, status: int, text: str, headers=None) -> dict:
+        try:
+            envelope = json.loads(text) if text else {}
+        except json.JSONDecodeError:
+            envelope = None
+
+        if isinstance(envelope, dict) and "success" in envelope:
+            success = bool(envelope.get("success")) and status == 200
+            message = envelope.get("message")
+        else:
+            success = status == 200
+            message = text
+
+        if self._logging():
+            if success:
+                print(f"UNITY API SUCCESS: Called endpoint '{endpoint}'. Response: {message}")
+            else:
+                print(f"UNITY API ERROR: Status {status}. Response: {message}")
+
+        if success:
+            result = {"success": True, "status": status, "data": message}
+        else:
+            result = {"success": False, "status": status, "error": f"HTTP {status}: {message}"}
+        for key in ("job_id", "object_id"):
+            if isinstance(envelope, dict) and envelope.get(key):
+                result[key] = envelope[key]
+        scene_version = (headers or {}).get("X-Scene-Version")
+        if scene_version is not None and scene_version.lstrip("-").isdigit():
+            result["scene_version"] = int(scene_version)
+        return result
+
+
+# --- Shared clients ---
+class UnityPin:
+    """
+    Binds an agent session to one Unity instance. The URL can change when the
+    session fails over to another instance (see unity_pool.py).
+
+    :param url: The Unity instance the session uses.
+    :param session_id: The agent session it belongs to.
+    """
+    def __init__(self, url: str, session_id: str = None):
+        self.url = url.rstrip("/")
+        self.session_id = session_id
+        self.journal = []  # scene-changing commands since the last clear, for failover replay
+        self.failovers = 0
+        self.failover_lock = threading.Lock()  # one failover at a time for the session's concurrent tool calls
+
+
+# The pin of the agent session running in this context; None means config.UNITY_API_URL.
+# Tool threads inherit it through the scheduler's context propagation.
+current_pin = contextvars.ContextVar("current_unity_pin", default=None)
+
+_clients = {}
+_client_lock = threading.Lock()
+
+
+def get_unity_client(base_url: str = None) -> UnityClient:
+    """Returns the process-wide UnityClient for a Unity instance (by default the current session's), creating it on first use."""
+    pin = current_pin.get()
+    url = (base_url or (pin.url if pin else None) or config.UNITY_API_URL).rstrip("/")
+    client = _clients.get(url)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _clients[url] = UnityClient(url)
+    return client
@@ -0,0 +1,330 @@
+# unity_pool.py
+#
+# Spreads agent sessions over several Unity instances (config.UNITY_API_URLS),
+# e.g. a few headless players on different ports.
+#   - each session is pinned to one instance for its whole run, so its scene
+#     stays in one place; a new session gets the least-loaded idle instance
+#   - a background thread polls each instance's 'health' endpoint; instances
+#     that stop answering are taken out of rotation until they recover
+#   - every command goes through send(). Scene-changing commands are journaled
+#     on the session's pin. If the pinned instance stops answering,
+#     the session moves to another idle instance, the journal is replayed there
+#     and the failed command is retried. Spawns are journaled with the object
+#     ids Unity gave them, so later updates and deletes by id still apply.
+#     Only a command that never reached Unity fails over: a read timeout is
+#     returned as it is, since the command may still run on the slow instance.
+#     A session's concurrent tool calls fail over one at a time; a call that
+#     waited finds the session already moved and is retried on its new instance
+#   - per-instance request counts, latency and utilization are kept for metrics()
+#
+# Replaying a journal assumes the instances share the same project assets
+# (imported GLB models in particular).
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import config
+import tracing
+from unity_client import UnityClient, UnityPin, current_pin, get_unity_client
+
+# Commands whose effect must be reproduced on a replacement instance.
+JOURNALED_ENDPOINTS = {"spawn", "spawn_batch", "update_object", "update_batch", "delete_object", "delete_batch",
+                       "clear_scene", "set_lighting", "attach_script"}
+# Requests Unity holds open on purpose; their wait is not counted as busy time.
+LONG_POLL_ENDPOINTS = {"job_status"}
+
+
+class UnityInstance:
+    """Health and load bookkeeping for one Unity endpoint."""
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True  # assumed until the first check says otherwise
+        self.health = {}  # last 'health' answer
+        self.last_checked = None
+        self.sessions = 0  # pinned sessions (0 or 1: sessions do not share a scene)
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.failovers = 0  # sessions moved away from this instance
+        self.busy_seconds = 0.0
+
+    def load(self) -> tuple:
+        """Sort key for routing: fewer sessions, fewer requests in flight, shorter command queue, less used."""
+        return (self.sessions, self.in_flight, self.health.get("queued_commands", 0), self.busy_seconds)
+
+    def metrics(self, elapsed: float) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "sessions": self.sessions,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "failovers": self.failovers,
+            "avg_latency_ms": round(self.busy_seconds / self.requests * 1e3, 2) if self.requests else None,
+            "utilization": round(self.busy_seconds / elapsed, 4) if elapsed > 0 else 0.0,
+            "queued_commands": self.health.get("queued_commands"),
+            "scene_version": self.health.get("scene_version"),
+            "last_checked": self.last_checked,
+        }
+
+
+class UnityPool:
+    """
+    The set of Unity instances agent sessions can be pinned to.
+
+    :param urls: Unity API roots; defaults to config.UNITY_API_URLS.
+    """
+    def __init__(self, urls: list = None):
+        self._lock = threading.Lock()
+        self._instances = OrderedDict()
+        for url in urls or config.UNITY_API_URLS:
+            self._instances[url.rstrip("/")] = UnityInstance(url.rstrip("/"))
+        self._health_clients = {}
+        self._listeners = []
+        self._health_thread = None
+        self._stop = threading.Event()
+        self._reclaiming = 0  # failing-over sessions waiting for an idle instance
+        self._created = time.monotonic()
+
+    def instance(self, url: str) -> UnityInstance:
+        """Returns the bookkeeping for `url`, adding instances that are used directly (e.g. config.UNITY_API_URL)."""
+        url = url.rstrip("/")
+        with self._lock:
+            if url not in self._instances:
+                self._instances[url] = UnityInstance(url)
+            return self._instances[url]
+
+    def on_change(self, callback):
+        """Registers a callback run when an instance becomes healthy again or a failover has finished."""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    # --- Health ---
+    def check_health(self):
+        """Polls every instance's 'health' endpoint once."""
+        recovered = False
+        for instance in list(self._instances.values()):
+            client = self._health_clients.get(instance.url)
+            if client is None:
+                client = self._health_clients[instance.url] = UnityClient(
+                    instance.url, timeout=config.UNITY_HEALTH_TIMEOUT, retry_attempts=1, log=False)
+            response = client.request("health", {}, "GET")
+            health = None
+            if response["success"]:
+                try:
+                    health = json.loads(response["data"])
+                except (TypeError, ValueError):
+                    health = None
+            with self._lock:
+                was_healthy = instance.healthy
+                instance.healthy = health is not None
+                instance.health = health or {}
+                instance.last_checked = time.time()
+            if instance.healthy != was_healthy:
+                state = "healthy again" if instance.healthy else f"unhealthy ({response.get('error') or response.get('data')})"
+                print(f"UNITY POOL: {instance.url} is {state}.")
+                recovered = recovered or instance.healthy
+        if recovered:
+            self._notify()
+
+    def start_health_checks(self):
+        """Starts the background health-check thread (once)."""
+        if self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(target=self._health_loop, name="unity-health", daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(config.UNITY_HEALTH_INTERVAL)
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Routing ---
+    def _choose(self, exclude=()) -> UnityInstance:
+        idle = [i for i in self._instances.values() if i.healthy and i.sessions == 0 and i.url not in exclude]
+        return min(idle, key=UnityInstance.load) if idle else None
+
+    def pin(self, session_id: str, url: str = None) -> UnityPin:
+        """
+        Pins a session to `url`, or to the least-loaded idle healthy instance.
+        An unhealthy `url` is routed like a session without one.
+        Returns None when that instance (or every instance) is in use, or when
+        failing-over sessions are waiting for the next idle instance.
+        """
+        if url is not None:
+            requested = self.instance(url)
+            if not requested.healthy:
+                print(f"UNITY POOL: {requested.url} is unhealthy; routing session {session_id} to another instance.")
+                url = None
+        with self._lock:
+            if url is None and self._reclaiming:
+                return None
+            instance = self._instances[url.rstrip("/")] if url is not None else self._choose()
+            if instance is None or instance.sessions:
+                return None
+            instance.sessions += 1
+        return UnityPin(instance.url, session_id)
+
+    def unpin(self, pin: UnityPin):
+        with self._lock:
+            instance = self._instances.get(pin.url)
+            if instance is not None and instance.sessions:
+                instance.sessions -= 1
+
+    # --- Commands ---
+    def _request(self, instance: UnityInstance, endpoint: str, payload: dict, method: str) -> dict:
+        with self._lock:
+            instance.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = get_unity_client(instance.url).request(endpoint, payload, method)
+        finally:
+            with self._lock:
+                instance.in_flight -= 1
+                instance.requests += 1
+                if endpoint not in LONG_POLL_ENDPOINTS:
+                    instance.busy_seconds += time.perf_counter() - start
+        if not result["success"]:
+            with self._lock:
+                instance.errors += 1
+        return result
+
+    def send(self, endpoint: str, payload: dict, method: str = "POST") -> dict:
+        """Sends a command to the current session's instance, failing over if it has gone away."""
+        pin = current_pin.get()
+        instance = self.instance(pin.url if pin else config.UNITY_API_URL)
+        result = self._request(instance, endpoint, payload, method)
+
+        if self._unreachable(result) and pin is not None and config.UNITY_FAILOVER:
+            result = self._failover(pin, instance, endpoint, payload, method, result)
+
+        if result["success"] and pin is not None and endpoint in JOURNALED_ENDPOINTS:
+            if endpoint == "clear_scene":
+                pin.journal.clear()
+            else:
+                journaled = self._pin_ids(endpoint, payload, result)
+                if journaled is not None:
+                    pin.journal.append((endpoint, journaled, method))
+        return result
+
+    @staticmethod
+    def _unreachable(result: dict) -> bool:
+        """True if the command never reached Unity (refused, reset or connect timeout)."""
+        return result["status"] is None and not result.get("timed_out")
+
+    @staticmethod
+    def _pin_ids(endpoint: str, payload: dict, result: dict):
+        """
+        Adds the object ids Unity assigned to a spawn payload, so a replay recreates the same ids.
+        A spawn batch keeps only the items Unity reports as spawned (None if there are none), so a
+        replay does not create objects the failed instance never had.
+        """
+        if endpoint == "spawn" and result.get("object_id"):
+            return dict(payload, id=result["object_id"])
+        if endpoint == "spawn_batch":
+            try:
+                item_results = json.loads(result["data"])["results"]
+            except (TypeError, ValueError, KeyError):
+                return payload
+            objects = [dict(item, id=item_result["object_id"]) if item_result.get("object_id") else item
+                       for item, item_result in zip(payload["objects"], item_results)
+                       if isinstance(item_result, dict) and item_result.get("success")]
+            return dict(payload, objects=objects) if objects else None
+        return payload
+
+    def _failover(self, pin: UnityPin, failed: UnityInstance, endpoint: str, payload: dict, method: str, result: dict) -> dict:
+        with pin.failover_lock:
+            while pin.url != failed.url:
+                # Another call of this session moved it while this one waited; retry there.
+                failed = self.instance(pin.url)
+                result = self._request(failed, endpoint, payload, method)
+                if not self._unreachable(result):
+                    return result
+            with self._lock:
+                failed.healthy = False
+                self._reclaiming += 1
+            try:
+                return self._move_session(pin, failed, {failed.url}, endpoint, payload, method, result)
+            finally:
+                with self._lock:
+                    self._reclaiming -= 1
+                # New sessions were held back while this one waited.
+                self._notify()
+
+    def _move_session(self, pin, failed, tried, endpoint, payload, method, result) -> dict:
+        # The session is counted on `failed` throughout; the pin ends up on that instance or on the target.
+        deadline = time.monotonic() + config.UNITY_FAILOVER_WAIT
+        while True:
+            with self._lock:
+                target = self._choose(exclude=tried)
+                if target is not None:
+                    # Count the session on the target first so no other session is routed there meanwhile.
+                    target.sessions += 1
+                    if failed.sessions:
+                        failed.sessions -= 1
+                    failed.failovers += 1
+                else:
+                    others_healthy = any(i.healthy and i.url not in tried for i in self._instances.values())
+            if target is None:
+                if not others_healthy or time.monotonic() > deadline:
+                    pin.url = failed.url
+                    result["error"] += " No other healthy Unity instance is available to fail over to."
+                    return result
+                # Every other healthy instance is running a session; wait for one to finish.
+                time.sleep(0.25)
+                continue
+            tried.add(target.url)
+            print(f"UNITY POOL: {failed.url} is not answering; moving session {pin.session_id} to {target.url} "
+                  f"and replaying {len(pin.journal)} command(s).")
+            tracing.event("unity failover", "unity", source=failed.url, target=target.url, journal=len(pin.journal))
+
+            # The pin moves only once the target has the session's scene, so the
+            # session's other calls keep failing over to it instead of racing the replay.
+            pin.failovers += 1
+            replayed = self._replay(target, pin.journal)
+            if replayed is not None:
+                retried = self._request(target, endpoint, payload, method)
+                retried["failover"] = {"from": failed.url, "to": target.url, "replayed": replayed}
+                if not self._unreachable(retried):
+                    pin.url = target.url
+                    return retried
+            with self._lock:
+                target.healthy = False
+            failed = target
+
+    def _replay(self, target: UnityInstance, journal: list):
+        """Rebuilds the session's scene on `target`. Returns the number of commands replayed, or None on failure."""
+        for endpoint, payload, method in [("clear_scene", {}, "POST")] + list(journal):
+            if not self._request(target, endpoint, payload, method)["success"]:
+                return None
+        return len(journal)
+
+    def metrics(self) -> dict:
+        elapsed = time.monotonic() - self._created
+        with self._lock:
+            instances = [instance.metrics(elapsed) for instance in self._instances.values()]
+        return {"instances": instances, "health_interval": config.UNITY_HEALTH_INTERVAL}
+
+
+# --- Shared pool ---
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_unity_pool() -> UnityPool:
+    """Returns the process-wide UnityPool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = UnityPool()
+    return _pool
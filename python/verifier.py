@@ -0,0 +1,432 @@
+# verifier.py
+#
+# Checks a finished scene against the user's request, replacing the keyword
+# matching on the last vision analysis in AutonomousAgent.run.
+#   - parse_request() extracts, once per run, the objects the prompt asks for
+#     (shape, imported model or role such as "robot", with color and count) and
+#     the spatial relations between them ("next to", "on", "left of", ...)
+#   - SceneVerifier.verify() first checks those against Unity's own object list
+#     (names, positions, scales and material colors, via the scene mirror).
+#     That is authoritative and costs no model call
+#   - only what the scene state cannot answer is put to the VLM, as one
+#     numbered yes/no question: whether something built from primitives looks
+#     like the requested thing, the colors of textured models, and relations
+#     involving objects it could not identify
+#   - failures come back as precise findings ("no blue cube; found a red cube",
+#     "fox is 9.2 units from tree") that the agent gets as its correction prompt
+#
+# Spatial words assume Unity's default view: the camera looks along +z, so
+# "left of" means smaller x and "in front of" means smaller z.
+
+import math
+import re
+
+import config
+from scene_state import get_scene_mirror
+
+COLORS = {
+    "red": (0.9, 0.1, 0.1), "green": (0.1, 0.7, 0.1), "blue": (0.1, 0.2, 0.9), "yellow": (1.0, 0.9, 0.1),
+    "orange": (1.0, 0.5, 0.0), "purple": (0.5, 0.1, 0.7), "pink": (1.0, 0.5, 0.7), "brown": (0.55, 0.3, 0.1),
+    "white": (1.0, 1.0, 1.0), "black": (0.0, 0.0, 0.0), "gray": (0.5, 0.5, 0.5), "cyan": (0.0, 0.9, 0.9),
+}
+COLOR_ALIASES = {"grey": "gray", "violet": "purple", "teal": "cyan", "golden": "yellow", "gold": "yellow"}
+# Words for Unity primitives, mapped to the PrimitiveType they spawn as.
+SHAPES = {"cube": "cube", "box": "cube", "block": "cube", "sphere": "sphere", "ball": "sphere", "orb": "sphere",
+          "cylinder": "cylinder", "pillar": "cylinder", "column": "cylinder", "pole": "cylinder", "capsule": "capsule"}
+# Words for whatever object plays a part; the agent picks their shape.
+ROLES = {"robot", "target", "obstacle", "goal", "agent", "marker", "wall"}
+COUNTS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+          "eight": 8, "nine": 9, "ten": 10, "pair": 2, "couple": 2}
+# Phrases between two object mentions, longest first, and the relation they state.
+RELATIONS = [
+    ("on top of", "above"), ("in front of", "in_front_of"), ("to the left of", "left_of"), ("to the right of", "right_of"),
+    ("left of", "left_of"), ("right of", "right_of"), ("next to", "near"), ("close to", "near"), ("far from", "far"),
+    ("away from", "far"), ("beside", "near"), ("near", "near"), ("alongside", "near"), ("atop", "above"),
+    ("above", "above"), ("over", "above"), ("on", "above"), ("underneath", "below"), ("under", "below"),
+    ("beneath", "below"), ("below", "below"), ("behind", "behind"),
+]
+# Short phrases that are also parts of verbs ("turn on the lights", "switch over"): they state a
+# relation only when nothing but linking words stands between the two mentions ("a cube sitting on a box").
+STRICT_PHRASES = {"on", "over"}
+LINK_WORDS = {"is", "are", "sits", "sit", "sitting", "stands", "stand", "standing", "rests", "rest", "resting",
+              "lies", "lying", "placed", "positioned", "put", "set", "that", "which", "right", "directly", "just"}
+RELATION_TEXT = {"near": "next to", "far": "far from", "above": "on top of", "below": "under", "left_of": "left of",
+                 "right_of": "right of", "in_front_of": "in front of", "behind": "behind"}
+# A prompt is only verified when it asks for something to be built.
+CREATE_WORDS = {"create", "build", "make", "spawn", "add", "place", "put", "set", "generate", "arrange", "scene", "design"}
+NEGATIONS = {"no", "without", "not", "remove", "delete"}
+MAX_RELATION_GAP = 6  # tokens allowed between two mentions for a relation phrase to link them
+# Parts of the scene itself rather than objects to spawn ("turn on the lights", "on the floor").
+SCENE_WORDS = {"light", "lighting", "floor", "ground", "sky", "sun", "camera", "scene", "room", "world"}
+
+
+def _model_words() -> set:
+    words = set(config.VERIFIER_MODEL_WORDS)
+    for alias in config.MOCK_SKETCHFAB_DATABASE:
+        words.update(alias.split())
+    for group in config.ASSET_CATALOG_SYNONYMS:
+        words.update(group)
+    return words - set(SHAPES) - ROLES - set(COLORS) - SCENE_WORDS
+
+
+def _synonyms(noun: str) -> set:
+    names = {noun}
+    for group in config.ASSET_CATALOG_SYNONYMS:
+        if noun in group:
+            names.update(group)
+    return names
+
+
+def _color_name(word: str):
+    word = COLOR_ALIASES.get(word, word)
+    return word if word in COLORS else None
+
+
+def color_matches(color: dict, name: str) -> bool:
+    """Whether an RGB color (0-1 floats) reads as the named color: it is the nearest one, or within tolerance of it."""
+    rgb = [float(color.get(channel, 1.0)) for channel in "rgb"]
+    distances = {key: sum((a - b) ** 2 for a, b in zip(rgb, value)) for key, value in COLORS.items()}
+    return distances[name] <= min(distances.values()) + config.VERIFIER_COLOR_TOLERANCE
+
+
+def nearest_color(color: dict) -> str:
+    rgb = [float(color.get(channel, 1.0)) for channel in "rgb"]
+    return min(COLORS, key=lambda key: sum((a - b) ** 2 for a, b in zip(rgb, COLORS[key])))
+
+
+# --- Request parsing ---
+
+class Requirement:
+    """One kind of object the prompt asks for."""
+    def __init__(self, noun: str, kind: str, color: str = None, count: int = 1):
+        self.noun = noun
+        self.kind = kind  # "shape", "model" or "role"
+        self.color = color
+        self.count = count
+
+    @property
+    def label(self) -> str:
+        noun = f"{self.color} {self.noun}" if self.color else self.noun
+        return noun if self.count == 1 else f"{self.count} {noun}s"
+
+    def to_dict(self) -> dict:
+        return {"noun": self.noun, "kind": self.kind, "color": self.color, "count": self.count}
+
+
+class Relation:
+    """A spatial relation between the first objects of two requirements."""
+    def __init__(self, subject: Requirement, relation: str, other: Requirement):
+        self.subject = subject
+        self.relation = relation
+        self.other = other
+
+    @property
+    def label(self) -> str:
+        return f"{self.subject.label} {RELATION_TEXT[self.relation]} {self.other.label}"
+
+
+class SceneRequest:
+    """The objects and relations extracted from a prompt."""
+    def __init__(self, prompt: str, requirements: list, relations: list, wants_scene: bool):
+        self.prompt = prompt
+        self.requirements = requirements
+        self.relations = relations
+        self.wants_scene = wants_scene
+
+    @property
+    def verifiable(self) -> bool:
+        return self.wants_scene and bool(self.requirements)
+
+    def describe(self) -> str:
+        parts = [requirement.label for requirement in self.requirements]
+        parts += [relation.label for relation in self.relations]
+        return ", ".join(parts) or "nothing checkable"
+
+
+def _singular(token: str, vocabulary: set):
+    for candidate, plural in ((token, False), (token[:-1], True), (token[:-2], True), (token[:-3] + "y", True)):
+        if candidate in vocabulary and (candidate == token or token.endswith("s")):
+            return candidate, plural
+    return None, False
+
+
+def parse_request(prompt: str) -> SceneRequest:
+    """Extracts requested objects (with color and count) and the relations between them."""
+    tokens = re.findall(r"[a-z]+|\d+", prompt.lower())
+    models = _model_words()
+    vocabulary = set(SHAPES) | ROLES | models
+
+    mentions = []  # (requirement, first token index, last token index)
+    requirements = {}
+    for index, token in enumerate(tokens):
+        word, plural = _singular(token, vocabulary)
+        if word is None:
+            continue
+        noun = SHAPES.get(word, word)
+        kind = "shape" if word in SHAPES else "role" if word in ROLES else "model"
+        color, count, definite, start = None, None, False, index
+        for back in range(index - 1, max(-1, index - 4), -1):
+            modifier = tokens[back]
+            if _color_name(modifier) and color is None:
+                color = _color_name(modifier)
+            elif modifier in COUNTS or modifier.isdigit():
+                count = int(modifier) if modifier.isdigit() else COUNTS[modifier]
+            elif modifier in ("the", "that", "this"):
+                definite = True
+            elif modifier in NEGATIONS:
+                count = 0
+            elif modifier == "of" and back > 0 and tokens[back - 1] in ("pair", "couple"):
+                continue  # "a pair of", counted on the next step back
+            elif modifier not in ("another", "big", "small", "large", "tiny", "tall", "short", "low", "poly"):
+                break
+            start = back
+        if count == 0:
+            continue
+        if count is None:
+            count = 2 if plural else 1
+
+        key = (noun, color)
+        if key not in requirements and definite and color is None:
+            # "the robot" refers back to an earlier (possibly colored) robot.
+            key = next((k for k in requirements if k[0] == noun), key)
+        requirement = requirements.get(key)
+        if requirement is None:
+            requirement = requirements[key] = Requirement(noun, kind, color, count)
+        elif not definite:
+            requirement.count = max(requirement.count, count)
+        mentions.append((requirement, start, index))
+
+    relations = []
+    for (first, _, first_end), (second, second_start, second_end) in zip(mentions, mentions[1:]):
+        if first is second:
+            continue
+        gap = tokens[first_end + 1:second_start]
+        relation = _find_relation(gap) if len(gap) <= MAX_RELATION_GAP else None
+        if relation is None and "and" in gap:
+            # "a fox and a tree next to each other"
+            after = " ".join(tokens[second_end + 1:second_end + 1 + MAX_RELATION_GAP])
+            if re.search(r"\b(each other|one another)\b", after):
+                relation = _find_relation(tokens[second_end + 1:second_end + 1 + MAX_RELATION_GAP])
+        if relation is not None:
+            relations.append(Relation(first, relation, second))
+
+    wants_scene = any(token in CREATE_WORDS for token in tokens)
+    return SceneRequest(prompt, list(requirements.values()), relations, wants_scene)
+
+
+def _find_relation(gap: list):
+    text = f" {' '.join(gap)} "
+    for phrase, relation in RELATIONS:
+        if f" {phrase} " not in text:
+            continue
+        if phrase in STRICT_PHRASES and any(token != phrase and token not in LINK_WORDS for token in gap):
+            continue
+        return relation
+    return None
+
+
+# --- Verification ---
+
+def _position(obj: dict) -> list:
+    return [float(obj["position"].get(axis, 0.0)) for axis in "xyz"]
+
+
+def _size(obj: dict) -> float:
+    scale = obj.get("scale") or {}
+    return max(abs(float(scale.get(axis, 1.0))) for axis in "xyz")
+
+
+def _kind_of(obj: dict) -> str:
+    name = obj["name"]
+    if name.startswith("Primitive_"):
+        return "primitive"
+    if name.startswith("Unknown_"):
+        return "placeholder"
+    if name == "Fox_Fallback":
+        return "fallback"
+    return "model"
+
+
+def _relation_holds(relation: str, a: dict, b: dict) -> tuple:
+    """(holds, detail) for a relation between two scene objects."""
+    pa, pb = _position(a), _position(b)
+    distance = math.dist(pa, pb)
+    reach = config.VERIFIER_NEAR_DISTANCE + (_size(a) + _size(b)) / 2
+    horizontal = math.dist((pa[0], pa[2]), (pb[0], pb[2]))
+    if relation == "near":
+        return distance <= reach, f"{distance:.1f} units apart (next to: within {reach:.1f})"
+    if relation == "far":
+        return distance > reach, f"{distance:.1f} units apart (far: beyond {reach:.1f})"
+    if relation in ("above", "below"):
+        higher = pa[1] > pb[1] if relation == "above" else pa[1] < pb[1]
+        return higher and horizontal <= reach, f"heights {pa[1]:.1f} vs {pb[1]:.1f}, {horizontal:.1f} units apart horizontally"
+    axis, sign = {"left_of": (0, -1), "right_of": (0, 1), "in_front_of": (2, -1), "behind": (2, 1)}[relation]
+    holds = (pa[axis] - pb[axis]) * sign > 0
+    return holds, f"{'xyz'[axis]} {pa[axis]:.1f} vs {pb[axis]:.1f}"
+
+
+class SceneVerifier:
+    """
+    Verifies scenes against a parsed request.
+
+    :param vision: Callable(question) -> capture_and_analyze_scene-style result, for
+                   what the scene state cannot answer. None disables the VLM fallback.
+    :param objects: Callable() -> (objects, error) giving Unity's objects; defaults to the scene mirror.
+    """
+    def __init__(self, vision=None, objects=None):
+        self.vision = vision
+        self.objects = objects or (lambda: get_scene_mirror().objects())
+
+    def verify(self, request: SceneRequest) -> dict:
+        """
+        Returns {"passed", "checks", "vision_question"}. Each check is {"check", "passed"
+        (True, False or None when nothing could tell), "source" ("scene" or "vision"), "detail"}.
+        """
+        objects, error = self.objects()
+        if error:
+            return {"passed": False, "vision_question": None,
+                    "checks": [{"check": "scene state", "passed": False, "source": "scene", "detail": error.get("error", str(error))}]}
+
+        checks, questions = [], []  # questions: (text, check dict it settles)
+        assigned = {}  # id(requirement) -> scene objects chosen for it
+        free = list(objects)
+
+        def ask(text, check):
+            questions.append((text, check))
+            checks.append(check)
+
+        # Most specific requirements pick their objects first.
+        order = {"shape": 0, "model": 1, "role": 2}
+        for requirement in sorted(request.requirements, key=lambda r: (order[r.kind], r.color is None)):
+            check = {"check": requirement.label, "passed": True, "source": "scene", "detail": ""}
+            found = [obj for obj in free if self._identity(requirement, obj)]
+            colored = [obj for obj in found if self._color_known(obj)]
+            if requirement.color:
+                matching = [obj for obj in colored if color_matches(obj["color"], requirement.color)]
+                # Textured models: the scene cannot tell their color, so the VLM is asked.
+                unknown = [obj for obj in found if not self._color_known(obj)]
+                chosen = (matching + unknown)[:requirement.count]
+            else:
+                chosen = found[:requirement.count]
+            for obj in chosen:
+                free.remove(obj)
+            assigned[id(requirement)] = chosen
+
+            if len(chosen) >= requirement.count:
+                names = ", ".join(obj["name"] for obj in chosen)
+                uncertain = [obj for obj in chosen if requirement.color and not self._color_known(obj)]
+                if uncertain:
+                    check.update(source="vision", passed=None, detail=f"found {names}; color needs a look")
+                    ask(f"Is the {requirement.noun} {requirement.color}?", check)
+                else:
+                    check["detail"] = f"found {names}"
+                    checks.append(check)
+                continue
+
+            missing = requirement.count - len(chosen)
+            if requirement.kind == "model" and not any(self._identity(requirement, obj) for obj in objects):
+                # Maybe built from primitives (a brown cylinder as a tree): only the picture can tell.
+                placeholders = [obj["name"] for obj in objects if _kind_of(obj) in ("placeholder", "fallback")
+                                and any(word in obj["name"].lower() for word in _synonyms(requirement.noun))]
+                check.update(source="vision", passed=None,
+                             detail=f"no '{requirement.noun}' model in the scene"
+                                    + (f" (only placeholder {', '.join(placeholders)})" if placeholders else ""))
+                count_text = f"at least {requirement.count} {requirement.noun}s" if requirement.count > 1 else f"a {requirement.noun}"
+                color_text = f" {requirement.color}" if requirement.color else ""
+                ask(f"Does the image clearly show {count_text}{color_text}?", check)
+                continue
+
+            check["passed"] = False
+            near_misses = [obj for obj in found if obj not in chosen]
+            if requirement.color and near_misses:
+                colors = ", ".join(f"{obj['name']} is {nearest_color(obj['color'])}" for obj in near_misses[:3])
+                check["detail"] = f"missing {missing}; {colors}"
+            else:
+                check["detail"] = f"missing {missing} of {requirement.count}" + self._hint(requirement, objects)
+            checks.append(check)
+
+        for relation in request.relations:
+            subjects, others = assigned.get(id(relation.subject)), assigned.get(id(relation.other))
+            check = {"check": relation.label, "passed": None, "source": "scene", "detail": ""}
+            if subjects and others:
+                holds, detail = _relation_holds(relation.relation, subjects[0], others[0])
+                check.update(passed=holds, detail=f"{subjects[0]['name']} / {others[0]['name']}: {detail}")
+                checks.append(check)
+            elif any(c["check"] in (relation.subject.label, relation.other.label) and c["passed"] is False for c in checks):
+                check["detail"] = "skipped: an object is missing"
+                checks.append(check)
+            else:
+                check.update(source="vision", detail="object not identifiable from scene state")
+                ask(f"Is the {relation.subject.noun} {RELATION_TEXT[relation.relation]} the {relation.other.noun}?", check)
+
+        question = None
+        if questions:
+            question = self._ask_vision(questions)
+        return {"passed": not any(check["passed"] is False for check in checks), "checks": checks, "vision_question": question}
+
+    # --- Helpers ---
+    @staticmethod
+    def _identity(requirement: Requirement, obj: dict) -> bool:
+        name, kind = obj["name"].lower(), _kind_of(obj)
+        if requirement.kind == "shape":
+            return kind == "primitive" and name == f"primitive_{requirement.noun}"
+        if requirement.kind == "model":
+            # Placeholders and fallbacks mean the model itself is not there.
+            return kind == "model" and any(word in name for word in _synonyms(requirement.noun))
+        return True
+
+    @staticmethod
+    def _color_known(obj: dict) -> bool:
+        return bool(obj.get("has_color", True)) and obj.get("color") is not None and _kind_of(obj) != "model"
+
+    @staticmethod
+    def _hint(requirement: Requirement, objects: list) -> str:
+        if requirement.kind == "shape":
+            others = [obj["name"] for obj in objects if obj["name"].lower().startswith("primitive_")]
+            return f"; primitives present: {', '.join(others)}" if others else "; the scene has no primitives"
+        return f"; {len(objects)} object(s) in the scene" if objects else "; the scene is empty"
+
+    def _ask_vision(self, questions: list) -> str:
+        text = ("Answer each numbered question about this image with only 'yes' or 'no', one answer per line.\n"
+                + "\n".join(f"{number}. {question}" for number, (question, _) in enumerate(questions, 1)))
+        if self.vision is None or not config.VERIFIER_VISION_FALLBACK:
+            for _, check in questions:
+                check["detail"] += "; not checked (vision fallback off)"
+            return None
+        result = self.vision(text)
+        analysis = result.get("vlm_analysis") if result.get("success") else None
+        if not analysis or analysis.startswith("VISION ERROR"):
+            for _, check in questions:
+                check["detail"] += f"; vision unavailable: {result.get('error') or analysis}"
+            return text
+        answers = parse_yes_no(analysis, len(questions))
+        for (question, check), answer in zip(questions, answers):
+            check["passed"] = answer
+            check["detail"] += f"; vision: {question} -> {'unclear' if answer is None else 'yes' if answer else 'no'}"
+        return text
+
+
+def parse_yes_no(text: str, count: int) -> list:
+    """Answers (True, False or None) to `count` numbered yes/no questions."""
+    answers = [None] * count
+    numbered = False
+    for match in re.finditer(r"(?m)^\W*(\d+)\W+(yes|no)\b", text, re.IGNORECASE):
+        number = int(match.group(1))
+        if 1 <= number <= count:
+            answers[number - 1] = match.group(2).lower() == "yes"
+            numbered = True
+    if not numbered:
+        words = re.findall(r"\b(yes|no)\b", text, re.IGNORECASE)
+        for index, word in enumerate(words[:count]):
+            answers[index] = word.lower() == "yes"
+    return answers
+
+
+def feedback(report: dict) -> str:
+    """The correction prompt for a failed verification: only the findings that failed."""
+    lines = [f"- {check['check']}: {check['detail']}" for check in report["checks"] if check["passed"] is False]
+    return ("❌ VERIFICATION FAILED. Unity's scene state (and a targeted look at the image where needed) shows:\n"
+            + "\n".join(lines)
+            + "\nFix only these items; everything else already matches the request. "
+              "Change objects in place with update_object/delete_object (or re-apply your scene spec) "
+              "rather than clearing and rebuilding the scene.")
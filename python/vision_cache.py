@@ -0,0 +1,212 @@
+# vision_cache.py
+#
+# Cache for VLM scene analyses. The forced-verification loop often asks the
+# VLM about a scene that has not changed since the last capture; answering
+# from this cache skips the upload and the GPT-4o round trip.
+#
+# Entries are keyed by a hash of the captured frame plus the normalized
+# analysis prompt. With VISION_CACHE_HASH = "perceptual" the frame hash is a
+# 256-bit difference hash (dHash) of the grayscale frame, which ignores encoder
+# noise but changes when an object moves or appears, followed by a coarse color
+# signature (an 8x8 thumbnail with 2 bits per channel). dHash alone misses recolors:
+# a red and a blue square on the same background can have identical gradients.
+# Only the dHash part may differ by up to VISION_CACHE_MAX_DISTANCE bits; the
+# color signature, and any suffix the caller adds (the tool appends the scene
+# mirror's version), must match exactly. "content" uses a SHA-256 of the encoded
+# bytes. Eviction is LRU with a TTL, and the cache can optionally be persisted
+# to a JSON file across server restarts.
+
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+_HASH_SIZE = 16  # dHash grid: 16x16 comparisons -> 256 bits
+_COLOR_SIZE = 8  # color signature: 8x8 RGB thumbnail
+_COLOR_LEVELS = 4  # per channel, so a recolor changes it but encoder noise rarely does
+
+
+def perceptual_hash(image_bytes: bytes) -> str:
+    """Returns the 256-bit difference hash of an image and its color signature, as "<dhash hex>.<color hex>"."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        rgb = image.convert("RGB")
+        pixels = list(rgb.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.LANCZOS).getdata())
+        thumbnail = rgb.resize((_COLOR_SIZE, _COLOR_SIZE), Image.BOX).getdata()
+    bits = 0
+    for row in range(_HASH_SIZE):
+        offset = row * (_HASH_SIZE + 1)
+        for col in range(_HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    color = 0
+    for pixel in thumbnail:
+        for channel in pixel:
+            color = color * _COLOR_LEVELS + channel * _COLOR_LEVELS // 256
+    return f"{bits:0{_HASH_SIZE * _HASH_SIZE // 4}x}.{color:0{_COLOR_SIZE * _COLOR_SIZE * 3 // 2}x}"
+
+
+def content_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def image_hash(image_bytes: bytes, mode: str = None) -> str:
+    """Hashes a frame with the configured strategy, falling back to a content hash."""
+    if (mode or config.VISION_CACHE_HASH) == "perceptual":
+        try:
+            return "p:" + perceptual_hash(image_bytes)
+        except Exception:
+            pass
+    return "c:" + content_hash(image_bytes)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-cases the prompt and collapses whitespace and trailing punctuation."""
+    return re.sub(r"\s+", " ", prompt.strip().lower()).rstrip(" ?.!")
+
+
+def hamming_distance(first: str, second: str) -> int:
+    """Differing dHash bits of two perceptual hashes; a large number if anything else differs."""
+    if first == second:
+        return 0
+    if not (first.startswith("p:") and second.startswith("p:")):
+        return 1 << 16
+    first_bits, _, first_rest = first[2:].partition(".")
+    second_bits, _, second_rest = second[2:].partition(".")
+    if first_rest != second_rest or len(first_bits) != len(second_bits):
+        return 1 << 16
+    return bin(int(first_bits, 16) ^ int(second_bits, 16)).count("1")
+
+
+class VisionCache:
+    """
+    Thread-safe LRU/TTL cache of VLM analyses.
+
+    :param max_entries: Maximum number of cached analyses.
+    :param ttl: Seconds an entry stays valid (0 disables expiry).
+    :param path: Optional JSON file used to persist the cache.
+    :param max_distance: Maximum Hamming distance between perceptual hashes for a hit.
+    """
+    def __init__(self, max_entries: int = None, ttl: float = None, path: str = None, max_distance: int = None):
+        self.max_entries = config.VISION_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = config.VISION_CACHE_TTL if ttl is None else ttl
+        self.path = config.VISION_CACHE_PATH if path is None else path
+        self.max_distance = config.VISION_CACHE_MAX_DISTANCE if max_distance is None else max_distance
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (frame_hash, prompt) -> {"analysis", "created"}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def get(self, frame_hash: str, prompt: str):
+        """Returns the cached analysis for this frame and prompt, or None."""
+        prompt = normalize_prompt(prompt)
+        with self._lock:
+            self._load()
+            key = self._find(frame_hash, prompt)
+            if key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]["analysis"]
+
+    def put(self, frame_hash: str, prompt: str, analysis: str):
+        with self._lock:
+            self._load()
+            key = (frame_hash, normalize_prompt(prompt))
+            self._entries[key] = {"analysis": analysis, "created": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+        }
+
+    # --- Internals (called with the lock held) ---
+    def _expired(self, entry: dict) -> bool:
+        return bool(self.ttl) and time.time() - entry["created"] > self.ttl
+
+    def _find(self, frame_hash: str, prompt: str):
+        for key in [k for k, entry in self._entries.items() if self._expired(entry)]:
+            del self._entries[key]
+            self.evictions += 1
+
+        if (frame_hash, prompt) in self._entries:
+            return (frame_hash, prompt)
+        if self.max_distance <= 0:
+            return None
+        best, best_distance = None, self.max_distance + 1
+        for key in self._entries:
+            if key[1] == prompt:
+                distance = hamming_distance(frame_hash, key[0])
+                if distance < best_distance:
+                    best, best_distance = key, distance
+        return best
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+            for item in stored.get("entries", []):
+                entry = {"analysis": item["analysis"], "created": item["created"]}
+                if not self._expired(entry):
+                    self._entries[(item["frame_hash"], item["prompt"])] = entry
+        except (OSError, ValueError, KeyError) as e:
+            print(f"VISION CACHE: Ignoring unreadable cache file {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        entries = [
+            {"frame_hash": frame_hash, "prompt": prompt, **entry}
+            for (frame_hash, prompt), entry in self._entries.items()
+        ]
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"VISION CACHE: Could not persist cache to {self.path}: {e}")
+
+
+# --- Shared cache ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_vision_cache() -> VisionCache:
+    """Returns the process-wide VisionCache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = VisionCache()
+    return _cache
@@ -10,12 +10,170 @@ namespace ARSS.API
     [Serializable]
     public class SpawnPayload
     {
+        // Stable id for later updates and deletes; Unity assigns one when empty
+        public string id;
         public string object_name;
         public Position position;
         public Scale scale;
         public ColorData color;
     }
 
+    [Serializable]
+    public class SpawnBatchPayload
+    {
+        public SpawnPayload[] objects;
+    }
+
+    // Per-item outcome of 'spawn_batch', 'update_batch' and 'delete_batch'
+    [Serializable]
+    public class SpawnBatchItemResult
+    {
+        public int index;
+        public bool success;
+        public string message;
+        public string job_id;
+        public string object_id;
+    }
+
+    [Serializable]
+    public class SpawnBatchResult
+    {
+        public int succeeded;
+        public int failed;
+        public SpawnBatchItemResult[] results;
+    }
+
+    // Changes one spawned object in place. JsonUtility cannot leave a field
+    // unset, so the has_* flags say which of position, scale and color to apply.
+    [Serializable]
+    public class UpdatePayload
+    {
+        public string object_id;
+        public bool has_position;
+        public Position position;
+        public bool has_scale;
+        public Scale scale;
+        public bool has_color;
+        public ColorData color;
+    }
+
+    [Serializable]
+    public class UpdateBatchPayload
+    {
+        public UpdatePayload[] objects;
+    }
+
+    [Serializable]
+    public class DeletePayload
+    {
+        public string object_id;
+    }
+
+    [Serializable]
+    public class DeleteBatchPayload
+    {
+        public string[] object_ids;
+    }
+
+    [Serializable]
+    public class VisionPayload
+    {
+        // "inline" returns the encoded image in the response; "file" writes it
+        // to disk before responding.
+        public string mode = "file";
+        public string format = "png";
+        public int quality = 85;
+        public int width;
+        public int height;
+    }
+
+    [Serializable]
+    public class VisionCaptureResult
+    {
+        public string format;
+        public int width;
+        public int height;
+        public string image_base64;
+    }
+
+    // Answer of the 'scene_version' endpoint. 'busy' counts coroutines and awake
+    // rigidbodies that are still changing the scene without bumping the version.
+    [Serializable]
+    public class SceneVersionInfo
+    {
+        public int version;
+        public int busy;
+    }
+
+    // Answer of the 'health' endpoint, polled by the Python instance pool
+    [Serializable]
+    public class HealthInfo
+    {
+        public string status;
+        public int scene_version;
+        public int busy;
+        public int queued_commands;
+    }
+
+    [Serializable]
+    public class SceneObjectInfo
+    {
+        public string id;
+        public string name;
+        public Position position;
+        public Scale scale;
+        // Material color of the object's own renderer; has_color is false for
+        // imported models, whose look comes from their textures
+        public ColorData color;
+        public bool has_color;
+    }
+
+    // Answer of the 'scene_state' endpoint: every spawned object, in spawn order.
+    [Serializable]
+    public class SceneSnapshot
+    {
+        public int version;
+        public int busy;
+        // Last preset applied through 'set_lighting'; empty until one is
+        public string lighting;
+        public SceneObjectInfo[] objects;
+    }
+
+    [Serializable]
+    public class JobStatusPayload
+    {
+        public string job_id;
+        // Seconds to hold the request open until the job finishes; 0 answers at once
+        public float wait;
+    }
+
+    // A long-running operation (GLB load, simulation) started by a command.
+    // 'state' is "running", "succeeded" or "failed"; 'result' holds the
+    // operation's JSON outcome once it has finished.
+    [Serializable]
+    public class JobInfo
+    {
+        public string job_id;
+        public string kind;
+        public string state;
+        public float progress;
+        public string message;
+        public string result;
+        public float elapsed;
+        [NonSerialized] public float started;
+
+        public bool Done => state != "running";
+    }
+
+    [Serializable]
+    public class SpawnJobResult
+    {
+        public string object_name;
+        public string object_id;
+        // True when the model could not be loaded and a stand-in object was spawned
+        public bool fallback;
+    }
+
     [Serializable]
     public class LightingPayload
     {
@@ -58,5 +216,9 @@ namespace ARSS.API
     {
         public bool success;
         public string message;
+        // Set when the command started a job; poll it with 'job_status'
+        public string job_id;
+        // Set when the command spawned an object
+        public string object_id;
     }
 } 
\ No newline at end of file
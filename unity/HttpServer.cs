@@ -11,11 +11,27 @@ namespace ARSS.API
 {
     public class HttpServer : MonoBehaviour
     {
+        // Overridden by "-arssPort <port>" on the command line, so several
+        // headless players can run side by side
+        public int port = 8080;
+
         private HttpListener listener;
         private Thread listenerThread;
         private SceneController sceneController;
         private readonly Queue<Action> commandQueue = new Queue<Action>();
 
+        // 'job_status' requests held open until their job finishes or the wait runs out.
+        // Checked every frame, so long polls never block the main thread.
+        private const float MaxJobWait = 30f;
+        private readonly List<PendingJobWait> pendingJobWaits = new List<PendingJobWait>();
+
+        private class PendingJobWait
+        {
+            public HttpListenerContext context;
+            public string jobId;
+            public float deadline;
+        }
+
         void Start()
         {
             sceneController = GetComponent<SceneController>();
@@ -25,15 +41,29 @@ namespace ARSS.API
                 return;
             }
 
+            port = ReadPortArgument(port);
             listener = new HttpListener();
-            listener.Prefixes.Add("http://127.0.0.1:8080/");
+            listener.Prefixes.Add($"http://127.0.0.1:{port}/");
             listener.Start();
             
             listenerThread = new Thread(StartListener);
             listenerThread.IsBackground = true;
             listenerThread.Start();
             
-            Debug.Log("[HttpServer] Upgraded Server started on http://127.0.0.1:8080/");
+            Debug.Log($"[HttpServer] Upgraded Server started on http://127.0.0.1:{port}/");
+        }
+
+        private static int ReadPortArgument(int defaultPort)
+        {
+            string[] args = Environment.GetCommandLineArgs();
+            for (int i = 0; i < args.Length - 1; i++)
+            {
+                if (args[i] == "-arssPort" && int.TryParse(args[i + 1], out int value))
+                {
+                    return value;
+                }
+            }
+            return defaultPort;
         }
 
         void Update()
@@ -52,6 +82,17 @@ namespace ARSS.API
                     }
                 }
             }
+
+            for (int i = pendingJobWaits.Count - 1; i >= 0; i--)
+            {
+                var wait = pendingJobWaits[i];
+                JobInfo job = sceneController.GetJob(wait.jobId);
+                if (job == null || job.Done || Time.realtimeSinceStartup >= wait.deadline)
+                {
+                    pendingJobWaits.RemoveAt(i);
+                    SendResponse(wait.context, sceneController.GetJobStatus(wait.jobId));
+                }
+            }
         }
 
         private void StartListener()
@@ -61,6 +102,19 @@ namespace ARSS.API
                 try
                 {
                     var context = listener.GetContext();
+                    // Version and health checks only read counters, so they are answered
+                    // here instead of waiting for the next Update() on the main thread
+                    string path = context.Request.Url.AbsolutePath.Trim('/');
+                    if (path == "scene_version")
+                    {
+                        SendResponse(context, sceneController.GetSceneVersion());
+                        continue;
+                    }
+                    if (path == "health")
+                    {
+                        SendResponse(context, GetHealth());
+                        continue;
+                    }
                     // Enqueue the request to be processed on the main thread
                     lock (commandQueue)
                     {
@@ -71,6 +125,22 @@ namespace ARSS.API
             }
         }
 
+        private ApiResponse GetHealth()
+        {
+            int queued;
+            lock (commandQueue)
+            {
+                queued = commandQueue.Count;
+            }
+            var health = new HealthInfo {
+                status = "ok",
+                scene_version = sceneController.SceneVersion,
+                busy = sceneController.Busy,
+                queued_commands = queued
+            };
+            return new ApiResponse { success = true, message = JsonUtility.ToJson(health) };
+        }
+
         private void ProcessRequest(HttpListenerContext context)
         {
             var request = context.Request;
@@ -95,6 +165,28 @@ namespace ARSS.API
                     var spawnPayload = JsonUtility.FromJson<SpawnPayload>(requestBody);
                     responsePayload = sceneController.SpawnObject(spawnPayload);
                     break;
+                // Spawns every object of the batch within this single Update() drain
+                case "spawn_batch":
+                    var batchPayload = JsonUtility.FromJson<SpawnBatchPayload>(requestBody);
+                    responsePayload = sceneController.SpawnObjects(batchPayload);
+                    break;
+                // Move, rescale, recolor or remove spawned objects by id, singly or in batches
+                case "update_object":
+                    var updatePayload = JsonUtility.FromJson<UpdatePayload>(requestBody);
+                    responsePayload = sceneController.UpdateObject(updatePayload);
+                    break;
+                case "update_batch":
+                    var updateBatchPayload = JsonUtility.FromJson<UpdateBatchPayload>(requestBody);
+                    responsePayload = sceneController.UpdateObjects(updateBatchPayload);
+                    break;
+                case "delete_object":
+                    var deletePayload = JsonUtility.FromJson<DeletePayload>(requestBody);
+                    responsePayload = sceneController.DeleteObject(deletePayload);
+                    break;
+                case "delete_batch":
+                    var deleteBatchPayload = JsonUtility.FromJson<DeleteBatchPayload>(requestBody);
+                    responsePayload = sceneController.DeleteObjects(deleteBatchPayload);
+                    break;
                 case "clear_scene":
                     responsePayload = sceneController.ClearScene();
                     break;
@@ -104,13 +196,19 @@ namespace ARSS.API
                     break;
                 // *** NEW: Vision Endpoint ***
                 case "capture_vision":
-                    responsePayload = sceneController.CaptureVision();
+                    var visionPayload = string.IsNullOrEmpty(requestBody) ? new VisionPayload() : JsonUtility.FromJson<VisionPayload>(requestBody);
+                    responsePayload = sceneController.CaptureVision(visionPayload);
                     break;
                 // *** NEW: Simulation Endpoint ***
                 case "run_simulation":
                     var simPayload = JsonUtility.FromJson<SimulationPayload>(requestBody);
                     responsePayload = sceneController.RunSimulation(simPayload);
                     break;
+                // Many episodes at a fixed timestep, reported through a job
+                case "run_simulation_batch":
+                    var batchSimPayload = JsonUtility.FromJson<SimulationBatchPayload>(requestBody);
+                    responsePayload = sceneController.RunSimulationBatch(batchSimPayload);
+                    break;
                 // *** NEW: Query Endpoints ***
                 case "get_object_position":
                     var queryPayload = JsonUtility.FromJson<QueryPayload>(requestBody);
@@ -119,6 +217,25 @@ namespace ARSS.API
                 case "list_all_objects":
                      responsePayload = sceneController.ListAllObjects();
                      break;
+                // Full snapshot used by the Python scene mirror to resynchronise
+                case "scene_state":
+                    responsePayload = sceneController.GetSceneState();
+                    break;
+                // Progress and outcome of a GLB load or simulation, optionally waiting for it
+                case "job_status":
+                    var jobPayload = JsonUtility.FromJson<JobStatusPayload>(requestBody);
+                    JobInfo job = sceneController.GetJob(jobPayload.job_id);
+                    if (job != null && !job.Done && jobPayload.wait > 0f)
+                    {
+                        pendingJobWaits.Add(new PendingJobWait {
+                            context = context,
+                            jobId = job.job_id,
+                            deadline = Time.realtimeSinceStartup + Mathf.Min(jobPayload.wait, MaxJobWait)
+                        });
+                        return;
+                    }
+                    responsePayload = sceneController.GetJobStatus(jobPayload.job_id);
+                    break;
                 default:
                     responsePayload = new ApiResponse { success = false, message = "Invalid endpoint." };
                     break;
@@ -134,6 +251,8 @@ namespace ARSS.API
                 var response = context.Response;
                 response.StatusCode = payload.success ? (int)HttpStatusCode.OK : (int)HttpStatusCode.BadRequest;
                 response.ContentType = "application/json";
+                // Lets clients tell whether their view of the scene is still current
+                response.AddHeader("X-Scene-Version", sceneController.SceneVersion.ToString());
                 string jsonResponse = JsonUtility.ToJson(payload);
                 byte[] buffer = System.Text.Encoding.UTF8.GetBytes(jsonResponse);
                 response.ContentLength64 = buffer.Length;
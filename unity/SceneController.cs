@@ -5,6 +5,7 @@ using System;
 using System.Collections;
 using System.Collections.Generic;
 using System.IO;
+using System.Threading;
 using GLTFast; // Assuming you have GLTFast for model loading
 
 namespace ARSS.API
@@ -18,22 +19,164 @@ namespace ARSS.API
         public Light directionalLight;
 
         private List<GameObject> spawnedObjects = new List<GameObject>();
-        // Used to store results from a simulation run
-        private SimulationResult currentSimResult;
+        private string currentLighting = "";
+
+        // GLB loads and simulations report their progress and outcome through jobs,
+        // polled with 'job_status'. Only the newest MaxJobs are kept.
+        private const int MaxJobs = 200;
+        private readonly Dictionary<string, JobInfo> jobs = new Dictionary<string, JobInfo>();
+        private readonly Queue<string> jobOrder = new Queue<string>();
+        private int jobCounter;
+
+        // Episode steps a simulation batch runs per frame before yielding
+        private const int BatchStepsPerFrame = 200000;
+
+        // Bumped on every change to the spawned objects, so a client mirroring the
+        // scene can detect drift with one cheap 'scene_version' query.
+        private int sceneVersion;
+        // GLB loads and simulations still running as coroutines
+        private int busyOperations;
+        // Simulated rigidbodies that are not asleep yet, refreshed every frame
+        private int awakeBodies;
+        private readonly List<Rigidbody> trackedBodies = new List<Rigidbody>();
+        // FindObject hits for the current set of objects, keyed by lower-cased query
+        private readonly Dictionary<string, GameObject> findCache = new Dictionary<string, GameObject>();
+
+        // Stable ids given to objects at spawn time. An id is reserved (mapped to
+        // null) while its model loads, and is never reused for another object.
+        private readonly Dictionary<string, GameObject> objectsById = new Dictionary<string, GameObject>();
+        private readonly Dictionary<GameObject, string> objectIds = new Dictionary<GameObject, string>();
+        private readonly Dictionary<string, int> idCounters = new Dictionary<string, int>();
+        // Bumped by ClearScene. A model load that started before the current generation
+        // finishes into a scene that no longer wants it: its object is destroyed and its id released.
+        private int clearGeneration;
+        // Auto-scale applied to imported models, so updates can rescale them like at spawn time
+        private readonly Dictionary<string, float> scaleFactors = new Dictionary<string, float>();
+
+        // Read from the HTTP listener thread, so only plain counters are exposed
+        public int SceneVersion => Volatile.Read(ref sceneVersion);
+        public int Busy => Volatile.Read(ref busyOperations) + Volatile.Read(ref awakeBodies);
+
+        void Update()
+        {
+            if (trackedBodies.Count == 0 && awakeBodies == 0) return;
+
+            int awake = 0;
+            trackedBodies.RemoveAll(body => body == null);
+            foreach (var body in trackedBodies)
+            {
+                if (!body.IsSleeping()) awake++;
+            }
+            // Bodies coming to rest have moved since the last version bump
+            if (awake < awakeBodies) MarkSceneChanged();
+            Volatile.Write(ref awakeBodies, awake);
+        }
+
+        private void MarkSceneChanged()
+        {
+            Interlocked.Increment(ref sceneVersion);
+        }
+
+        // Runs a coroutine that does not change the scene; a job it did not complete (it threw) is marked failed
+        private IEnumerator TrackJob(IEnumerator operation, JobInfo job)
+        {
+            try
+            {
+                yield return StartCoroutine(operation);
+            }
+            finally
+            {
+                if (!job.Done) CompleteJob(job, false, "The operation stopped unexpectedly; see the Unity console.", null);
+            }
+        }
+
+        // Counts a scene-changing coroutine as busy until it finishes, then bumps the version.
+        // A job the coroutine did not complete (it threw) is marked failed.
+        private IEnumerator TrackBusy(IEnumerator operation, JobInfo job)
+        {
+            Interlocked.Increment(ref busyOperations);
+            try
+            {
+                yield return StartCoroutine(operation);
+            }
+            finally
+            {
+                Interlocked.Decrement(ref busyOperations);
+                MarkSceneChanged();
+                if (!job.Done) CompleteJob(job, false, "The operation stopped unexpectedly; see the Unity console.", null);
+            }
+        }
+
+        // --- Jobs ---
+        private JobInfo CreateJob(string kind, string message)
+        {
+            var job = new JobInfo {
+                job_id = $"{kind}-{++jobCounter}",
+                kind = kind,
+                state = "running",
+                message = message,
+                result = "",
+                started = Time.realtimeSinceStartup
+            };
+            jobs[job.job_id] = job;
+            jobOrder.Enqueue(job.job_id);
+            while (jobOrder.Count > MaxJobs)
+            {
+                jobs.Remove(jobOrder.Dequeue());
+            }
+            return job;
+        }
+
+        private void CompleteJob(JobInfo job, bool success, string message, string result)
+        {
+            job.state = success ? "succeeded" : "failed";
+            job.progress = 1f;
+            job.message = message;
+            job.result = result ?? "";
+            job.elapsed = Time.realtimeSinceStartup - job.started;
+            Debug.Log($"[SceneController] Job {job.job_id} {job.state}: {message}");
+        }
+
+        public JobInfo GetJob(string jobId)
+        {
+            return jobId != null && jobs.TryGetValue(jobId, out var job) ? job : null;
+        }
+
+        public ApiResponse GetJobStatus(string jobId)
+        {
+            JobInfo job = GetJob(jobId);
+            if (job == null)
+            {
+                return new ApiResponse { success = false, message = $"Unknown job '{jobId}'." };
+            }
+            if (!job.Done) job.elapsed = Time.realtimeSinceStartup - job.started;
+            return new ApiResponse { success = true, message = JsonUtility.ToJson(job), job_id = job.job_id };
+        }
 
         // Synchronous method for HTTP server to call
         public ApiResponse SpawnObject(SpawnPayload payload)
         {
+            string id = null;
             try
             {
+                id = ReserveId(payload);
+                if (id == null)
+                {
+                    return new ApiResponse { success = false, message = $"Object id '{payload.id}' is already in use." };
+                }
+                payload.id = id;
+
                 // Handle GLB files with coroutine
                 if (payload.object_name.Contains(".glb") || payload.object_name.Contains(".gltf"))
                 {
                     Debug.Log($"[SceneController] Starting GLB loading coroutine for: {payload.object_name}");
-                    StartCoroutine(LoadGLBCoroutine(payload));
+                    JobInfo job = CreateJob("spawn", $"Loading {payload.object_name}");
+                    StartCoroutine(TrackBusy(LoadGLBCoroutine(payload, job, clearGeneration), job));
                     return new ApiResponse { 
                         success = true, 
-                        message = $"GLB loading started for {payload.object_name}" 
+                        message = $"GLB loading started for {payload.object_name}",
+                        job_id = job.job_id,
+                        object_id = id
                     };
                 }
 
@@ -50,10 +193,11 @@ namespace ARSS.API
                         ApplyColor(newObject, new Color(payload.color.r, payload.color.g, payload.color.b));
                     }
                     
-                    spawnedObjects.Add(newObject);
+                    Register(newObject, id);
+                    MarkSceneChanged();
                     string successMsg = $"Successfully spawned '{newObject.name}'.";
                     Debug.Log($"[SceneController] {successMsg}");
-                    return new ApiResponse { success = true, message = successMsg };
+                    return new ApiResponse { success = true, message = successMsg, object_id = id };
                 }
                 else
                 {
@@ -61,22 +205,174 @@ namespace ARSS.API
                     GameObject placeholder = GameObject.CreatePrimitive(PrimitiveType.Cylinder);
                     placeholder.name = $"Unknown_{payload.object_name}";
                     placeholder.transform.position = new Vector3(payload.position.x, payload.position.y, payload.position.z);
-                    spawnedObjects.Add(placeholder);
+                    Register(placeholder, id);
+                    MarkSceneChanged();
                     
                     return new ApiResponse { 
                         success = true, 
-                        message = $"Created placeholder for unknown object: {payload.object_name}" 
+                        message = $"Created placeholder for unknown object: {payload.object_name}",
+                        object_id = id
                     };
                 }
             }
             catch (System.Exception e)
             {
                 Debug.LogError($"[SceneController] Exception in SpawnObject: {e.Message}");
+                if (id != null && objectsById.TryGetValue(id, out var reserved) && reserved == null)
+                {
+                    objectsById.Remove(id);
+                }
                 return new ApiResponse { success = false, message = $"Spawn exception: {e.Message}" };
             }
         }
 
-        private IEnumerator LoadGLBCoroutine(SpawnPayload payload)
+        // Spawns a whole batch in one call. Items are independent: a failing item is
+        // reported in its result entry and does not stop the rest of the batch.
+        public ApiResponse SpawnObjects(SpawnBatchPayload payload)
+        {
+            if (payload == null || payload.objects == null || payload.objects.Length == 0)
+            {
+                return new ApiResponse { success = false, message = "Spawn batch contains no objects." };
+            }
+            return RunBatch("Spawn", payload.objects.Length, i =>
+                payload.objects[i] == null || string.IsNullOrEmpty(payload.objects[i].object_name)
+                    ? new ApiResponse { success = false, message = "Missing object_name." }
+                    : SpawnObject(payload.objects[i]));
+        }
+
+        private ApiResponse RunBatch(string kind, int count, Func<int, ApiResponse> runItem)
+        {
+            var batchResult = new SpawnBatchResult { results = new SpawnBatchItemResult[count] };
+            for (int i = 0; i < count; i++)
+            {
+                ApiResponse itemResponse = runItem(i);
+                batchResult.results[i] = new SpawnBatchItemResult {
+                    index = i, success = itemResponse.success, message = itemResponse.message,
+                    job_id = itemResponse.job_id, object_id = itemResponse.object_id
+                };
+                if (itemResponse.success) batchResult.succeeded++;
+                else batchResult.failed++;
+            }
+
+            Debug.Log($"[SceneController] {kind} batch finished: {batchResult.succeeded} succeeded, {batchResult.failed} failed.");
+            // The batch itself was processed; per-item failures are reported in the results.
+            return new ApiResponse { success = true, message = JsonUtility.ToJson(batchResult) };
+        }
+
+        // --- Object ids ---
+        // Returns the payload's id, or a new "<model>_<n>" one, reserved for the object; null if it is taken
+        private string ReserveId(SpawnPayload payload)
+        {
+            string id = payload.id;
+            if (string.IsNullOrEmpty(id))
+            {
+                string stem = Path.GetFileNameWithoutExtension(payload.object_name).ToLower().Replace(' ', '_');
+                idCounters.TryGetValue(stem, out int counter);
+                do
+                {
+                    id = $"{stem}_{++counter}";
+                } while (objectsById.ContainsKey(id));
+                idCounters[stem] = counter;
+            }
+            else if (objectsById.ContainsKey(id))
+            {
+                return null;
+            }
+            objectsById[id] = null;
+            return id;
+        }
+
+        private void Register(GameObject obj, string id)
+        {
+            spawnedObjects.Add(obj);
+            objectsById[id] = obj;
+            objectIds[obj] = id;
+        }
+
+        private bool TryGetSpawned(string id, out GameObject obj, out ApiResponse error)
+        {
+            error = null;
+            if (string.IsNullOrEmpty(id) || !objectsById.TryGetValue(id, out obj))
+            {
+                obj = null;
+                error = new ApiResponse { success = false, message = $"No object with id '{id}'." };
+            }
+            else if (obj == null)
+            {
+                error = new ApiResponse { success = false, message = $"Object '{id}' is still loading." };
+            }
+            return error == null;
+        }
+
+        // --- Updates and deletes ---
+        public ApiResponse UpdateObject(UpdatePayload payload)
+        {
+            if (payload == null || !TryGetSpawned(payload.object_id, out GameObject obj, out ApiResponse error))
+            {
+                return error ?? new ApiResponse { success = false, message = "Missing update payload." };
+            }
+            // Check everything before changing anything, so a rejected update leaves the object as it was
+            if (payload.has_color && obj.GetComponent<Renderer>() == null)
+            {
+                return new ApiResponse { success = false, message = $"'{obj.name}' ({payload.object_id}) has no material color of its own." };
+            }
+
+            if (payload.has_position)
+            {
+                obj.transform.position = new Vector3(payload.position.x, payload.position.y, payload.position.z);
+            }
+            if (payload.has_scale)
+            {
+                float factor = scaleFactors.TryGetValue(payload.object_id, out float modelFactor) ? modelFactor : 1f;
+                obj.transform.localScale = new Vector3(payload.scale.x, payload.scale.y, payload.scale.z) * factor;
+            }
+            if (payload.has_color)
+            {
+                ApplyColor(obj, new Color(payload.color.r, payload.color.g, payload.color.b));
+            }
+            MarkSceneChanged();
+            return new ApiResponse { success = true, message = $"Updated '{obj.name}' ({payload.object_id}).", object_id = payload.object_id };
+        }
+
+        public ApiResponse UpdateObjects(UpdateBatchPayload payload)
+        {
+            if (payload == null || payload.objects == null || payload.objects.Length == 0)
+            {
+                return new ApiResponse { success = false, message = "Update batch contains no objects." };
+            }
+            return RunBatch("Update", payload.objects.Length, i => UpdateObject(payload.objects[i]));
+        }
+
+        public ApiResponse DeleteObject(DeletePayload payload)
+        {
+            if (payload == null || !TryGetSpawned(payload.object_id, out GameObject obj, out ApiResponse error))
+            {
+                return error ?? new ApiResponse { success = false, message = "Missing delete payload." };
+            }
+            string name = obj.name;
+            spawnedObjects.Remove(obj);
+            objectsById.Remove(payload.object_id);
+            objectIds.Remove(obj);
+            scaleFactors.Remove(payload.object_id);
+            Rigidbody body = obj.GetComponent<Rigidbody>();
+            if (body != null) trackedBodies.Remove(body);
+            // The deleted object may have been the first match of cached queries
+            findCache.Clear();
+            DestroyImmediate(obj);
+            MarkSceneChanged();
+            return new ApiResponse { success = true, message = $"Deleted '{name}' ({payload.object_id}).", object_id = payload.object_id };
+        }
+
+        public ApiResponse DeleteObjects(DeleteBatchPayload payload)
+        {
+            if (payload == null || payload.object_ids == null || payload.object_ids.Length == 0)
+            {
+                return new ApiResponse { success = false, message = "Delete batch contains no objects." };
+            }
+            return RunBatch("Delete", payload.object_ids.Length, i => DeleteObject(new DeletePayload { object_id = payload.object_ids[i] }));
+        }
+
+        private IEnumerator LoadGLBCoroutine(SpawnPayload payload, JobInfo job, int generation)
         {
             Debug.Log($"[SceneController] Starting GLB coroutine for: {payload.object_name}");
             
@@ -86,7 +382,7 @@ namespace ARSS.API
             if (!File.Exists(modelPath))
             {
                 Debug.LogError($"[SceneController] GLB file not found: {modelPath}");
-                CreateFoxFallbackAndAdd(payload);
+                CreateFoxFallbackAndAdd(payload, job, generation, "file not found");
                 yield break;
             }
 
@@ -95,6 +391,7 @@ namespace ARSS.API
             
             // Load the GLB file
             var loadTask = gltf.Load(modelPath);
+            job.progress = 0.1f;
             
             // Wait for completion without blocking main thread (outside try-catch)
             yield return new WaitUntil(() => loadTask.IsCompleted);
@@ -106,18 +403,19 @@ namespace ARSS.API
             catch (System.Exception e)
             {
                 Debug.LogError($"[SceneController] Exception getting load result: {e.Message}");
-                CreateFoxFallbackAndAdd(payload);
+                CreateFoxFallbackAndAdd(payload, job, generation, e.Message);
                 yield break;
             }
             
             if (!loadSuccess)
             {
                 Debug.LogError($"[SceneController] Failed to load GLB file: {modelPath}");
-                CreateFoxFallbackAndAdd(payload);
+                CreateFoxFallbackAndAdd(payload, job, generation, "glTFast could not load the file");
                 yield break;
             }
             
             Debug.Log($"[SceneController] GLB loaded successfully, now instantiating...");
+            job.progress = 0.5f;
             
             // Create parent object for the model
             GameObject parentObject = new GameObject($"Model_{payload.object_name.Replace(".glb", "")}");
@@ -150,24 +448,29 @@ namespace ARSS.API
             {
                 Debug.LogError($"[SceneController] Exception during instantiation: {e.Message}");
                 DestroyImmediate(parentObject);
-                CreateFoxFallbackAndAdd(payload);
+                CreateFoxFallbackAndAdd(payload, job, generation, e.Message);
                 yield break;
             }
             
             if (instantiateSuccess)
             {
+                if (DiscardIfCleared(parentObject, payload, job, generation)) yield break;
+
                 // Intelligent auto-scaling based on model analysis
                 CalculateAndApplyIntelligentScale(parentObject, payload);
                 
-                spawnedObjects.Add(parentObject);
+                Register(parentObject, payload.id);
+                MarkSceneChanged();
                 Debug.Log($"[SceneController] Successfully loaded and instantiated GLB: {parentObject.name}");
                 Debug.Log($"[SceneController] Model has {parentObject.transform.childCount} child objects");
+                CompleteJob(job, true, $"Successfully spawned '{parentObject.name}'.",
+                    JsonUtility.ToJson(new SpawnJobResult { object_name = parentObject.name, object_id = payload.id }));
             }
             else
             {
                 Debug.LogError($"[SceneController] Failed to instantiate GLB model");
                 DestroyImmediate(parentObject);
-                CreateFoxFallbackAndAdd(payload);
+                CreateFoxFallbackAndAdd(payload, job, generation, "instantiation failed");
             }
         }
 
@@ -208,11 +511,33 @@ namespace ARSS.API
             return foxBody;
         }
 
-        private void CreateFoxFallbackAndAdd(SpawnPayload payload)
+        // The job fails even though an object was spawned: the requested model is not in the scene
+        private void CreateFoxFallbackAndAdd(SpawnPayload payload, JobInfo job, int generation, string reason)
         {
             Debug.LogWarning($"[SceneController] GLB loading failed, creating fallback object");
             GameObject fallback = CreateFoxFallback(payload);
-            spawnedObjects.Add(fallback);
+            if (DiscardIfCleared(fallback, payload, job, generation)) return;
+            Register(fallback, payload.id);
+            MarkSceneChanged();
+            CompleteJob(job, false, $"Could not load {payload.object_name} ({reason}); spawned '{fallback.name}' in its place.",
+                JsonUtility.ToJson(new SpawnJobResult { object_name = fallback.name, object_id = payload.id, fallback = true }));
+        }
+
+        // Destroys a finished model (or its fallback) and releases its id if the scene was cleared while it
+        // loaded; returns whether it did. The job fails, so callers waiting on it learn the model is gone.
+        private bool DiscardIfCleared(GameObject obj, SpawnPayload payload, JobInfo job, int generation)
+        {
+            if (generation == clearGeneration) return false;
+            DestroyImmediate(obj);
+            if (objectsById.TryGetValue(payload.id, out var reserved) && reserved == null)
+            {
+                objectsById.Remove(payload.id);
+            }
+            scaleFactors.Remove(payload.id);
+            Debug.Log($"[SceneController] Discarded {payload.object_name} ({payload.id}): the scene was cleared while it loaded.");
+            CompleteJob(job, false, $"The scene was cleared while {payload.object_name} was loading; it was not added.",
+                JsonUtility.ToJson(new SpawnJobResult { object_name = payload.object_name, object_id = payload.id }));
+            return true;
         }
 
         private void ApplyColor(GameObject obj, Color color)
@@ -227,12 +552,37 @@ namespace ARSS.API
         }
 
         // *** 1. NEW: VISION CAPABILITY ***
-        public ApiResponse CaptureVision()
+        // Renders the main camera synchronously, so the image is complete when the
+        // response is sent (ScreenCapture.CaptureScreenshot only writes at end of frame).
+        public ApiResponse CaptureVision(VisionPayload payload)
         {
             try
             {
-                string visionPath = Path.Combine(Application.dataPath, "..", "scene_capture.png");
-                ScreenCapture.CaptureScreenshot(visionPath);
+                Camera camera = Camera.main;
+                if (camera == null)
+                {
+                    return new ApiResponse { success = false, message = "Vision capture failed: no main camera in the scene." };
+                }
+
+                string format = payload.format == "jpg" || payload.format == "jpeg" ? "jpg" : "png";
+                int width = payload.width > 0 ? payload.width : Screen.width;
+                int height = payload.height > 0 ? payload.height : Screen.height;
+                byte[] imageBytes = RenderCameraToBytes(camera, width, height, format, payload.quality);
+
+                if (payload.mode == "inline")
+                {
+                    var result = new VisionCaptureResult
+                    {
+                        format = format,
+                        width = width,
+                        height = height,
+                        image_base64 = Convert.ToBase64String(imageBytes)
+                    };
+                    return new ApiResponse { success = true, message = JsonUtility.ToJson(result) };
+                }
+
+                string visionPath = Path.GetFullPath(Path.Combine(Application.dataPath, "..", $"scene_capture.{format}"));
+                File.WriteAllBytes(visionPath, imageBytes);
                 return new ApiResponse { success = true, message = $"Scene captured to {visionPath}" };
             }
             catch(Exception e)
@@ -241,6 +591,30 @@ namespace ARSS.API
             }
         }
 
+        private byte[] RenderCameraToBytes(Camera camera, int width, int height, string format, int quality)
+        {
+            RenderTexture renderTexture = RenderTexture.GetTemporary(width, height, 24);
+            RenderTexture previousTarget = camera.targetTexture;
+            RenderTexture previousActive = RenderTexture.active;
+            Texture2D texture = new Texture2D(width, height, TextureFormat.RGB24, false);
+            try
+            {
+                camera.targetTexture = renderTexture;
+                camera.Render();
+                RenderTexture.active = renderTexture;
+                texture.ReadPixels(new Rect(0, 0, width, height), 0, 0);
+                texture.Apply();
+                return format == "jpg" ? texture.EncodeToJPG(quality) : texture.EncodeToPNG();
+            }
+            finally
+            {
+                camera.targetTexture = previousTarget;
+                RenderTexture.active = previousActive;
+                RenderTexture.ReleaseTemporary(renderTexture);
+                Destroy(texture);
+            }
+        }
+
         // *** 2. NEW: GENERATIVE SIMULATION ***
         public ApiResponse RunSimulation(SimulationPayload payload)
         {
@@ -253,20 +627,23 @@ namespace ARSS.API
             }
 
             // Ensure robot has a rigidbody to be affected by physics
-            if (robot.GetComponent<Rigidbody>() == null)
+            Rigidbody body = robot.GetComponent<Rigidbody>();
+            if (body == null)
             {
-                 robot.AddComponent<Rigidbody>();
+                 body = robot.AddComponent<Rigidbody>();
             }
+            if (!trackedBodies.Contains(body)) trackedBodies.Add(body);
 
             // Start a coroutine to run the simulation
-            StartCoroutine(SimulationCoroutine(robot, target, payload.duration));
+            JobInfo job = CreateJob("simulation", $"Simulating {robot.name} moving to {target.name}");
+            StartCoroutine(TrackBusy(SimulationCoroutine(robot, target, payload.duration, job), job));
 
-            return new ApiResponse { success = true, message = "Simulation started." };
+            return new ApiResponse { success = true, message = "Simulation started.", job_id = job.job_id };
         }
 
-        private IEnumerator SimulationCoroutine(GameObject robot, GameObject target, float duration)
+        private IEnumerator SimulationCoroutine(GameObject robot, GameObject target, float duration, JobInfo job)
         {
-            currentSimResult = new SimulationResult { success = false, reason = "Simulation timed out." };
+            var simResult = new SimulationResult { success = false, reason = "Simulation timed out." };
             
             // A simple "brain" for the robot: move towards the target
             float speed = 5f;
@@ -274,21 +651,146 @@ namespace ARSS.API
 
             while(timeElapsed < duration)
             {
+                // A clear_scene during the run destroys both objects
+                if (robot == null || target == null)
+                {
+                    simResult.reason = "Robot or target was removed during the simulation.";
+                    break;
+                }
+
                 robot.transform.position = Vector3.MoveTowards(robot.transform.position, target.transform.position, speed * Time.deltaTime);
 
                 // Check for success condition
                 if (Vector3.Distance(robot.transform.position, target.transform.position) < 1.0f)
                 {
-                    currentSimResult.success = true;
-                    currentSimResult.reason = "Robot reached the target.";
-                    yield break; // End the coroutine
+                    simResult.success = true;
+                    simResult.reason = "Robot reached the target.";
+                    break;
                 }
 
                 timeElapsed += Time.deltaTime;
+                job.progress = Mathf.Clamp01(timeElapsed / duration);
                 yield return null; // Wait for the next frame
             }
+
+            simResult.elapsed = timeElapsed;
+            if (robot != null && target != null)
+            {
+                Vector3 end = robot.transform.position;
+                simResult.final_position = new Position { x = end.x, y = end.y, z = end.z };
+                simResult.final_distance = Vector3.Distance(end, target.transform.position);
+            }
+            CompleteJob(job, simResult.success, simResult.reason, JsonUtility.ToJson(simResult));
         }
         
+        // Runs many robot/target episodes with the same move-toward policy as
+        // SimulationCoroutine, at a fixed timestep and without moving scene objects,
+        // so a sweep runs as fast as the steps can be computed. Results are reported
+        // through a job. python/simulation.py is the reference implementation.
+        public ApiResponse RunSimulationBatch(SimulationBatchPayload payload)
+        {
+            if (payload == null || payload.episodes == null || payload.episodes.Length == 0)
+            {
+                return new ApiResponse { success = false, message = "Simulation batch contains no episodes." };
+            }
+            if (payload.timestep <= 0f)
+            {
+                return new ApiResponse { success = false, message = "Simulation batch timestep must be positive." };
+            }
+
+            int count = payload.episodes.Length;
+            var starts = new Vector3[count];
+            var targets = new Vector3[count];
+            for (int i = 0; i < count; i++)
+            {
+                SimulationEpisode episode = payload.episodes[i];
+                if (episode == null)
+                {
+                    return new ApiResponse { success = false, message = $"Episode {i} is empty." };
+                }
+                // Named objects supply their current positions; otherwise the given ones are used
+                if (!ResolveEpisodePoint(episode.robot_name, episode.start, out starts[i]) ||
+                    !ResolveEpisodePoint(episode.target_name, episode.target, out targets[i]))
+                {
+                    return new ApiResponse { success = false, message = $"Episode {i}: could not find robot or target." };
+                }
+            }
+
+            JobInfo job = CreateJob("simulation_batch", $"Simulating {count} episodes");
+            StartCoroutine(TrackJob(SimulationBatchCoroutine(payload.episodes, starts, targets, payload.timestep, job), job));
+            return new ApiResponse { success = true, message = $"Simulation batch of {count} episodes started.", job_id = job.job_id };
+        }
+
+        private bool ResolveEpisodePoint(string objectName, Position position, out Vector3 point)
+        {
+            point = position != null ? new Vector3(position.x, position.y, position.z) : Vector3.zero;
+            if (string.IsNullOrEmpty(objectName)) return true;
+            GameObject obj = FindObject(objectName);
+            if (obj == null) return false;
+            point = obj.transform.position;
+            return true;
+        }
+
+        private IEnumerator SimulationBatchCoroutine(SimulationEpisode[] episodes, Vector3[] positions, Vector3[] targets, float timestep, JobInfo job)
+        {
+            int count = episodes.Length;
+            var results = new SimulationEpisodeResult[count];
+            var stepsLeft = new int[count];
+            int active = 0;
+            int maxSteps = 0;
+            for (int i = 0; i < count; i++)
+            {
+                results[i] = new SimulationEpisodeResult { index = i, time_to_target = -1f };
+                // Same count as SimulationCoroutine's "while (timeElapsed < duration)"
+                stepsLeft[i] = Mathf.Max(0, Mathf.CeilToInt(episodes[i].duration / timestep - 1e-6f));
+                maxSteps = Mathf.Max(maxSteps, stepsLeft[i]);
+                if (stepsLeft[i] > 0) active++;
+            }
+
+            int step = 0;
+            int budget = 0;
+            while (active > 0)
+            {
+                step++;
+                for (int i = 0; i < count; i++)
+                {
+                    if (stepsLeft[i] == 0 || results[i].success) continue;
+                    SimulationEpisode episode = episodes[i];
+                    // Move first, then check, like SimulationCoroutine
+                    Vector3 next = Vector3.MoveTowards(positions[i], targets[i], episode.speed * timestep);
+                    results[i].path_length += Vector3.Distance(positions[i], next);
+                    positions[i] = next;
+                    stepsLeft[i]--;
+                    if (Vector3.Distance(next, targets[i]) < episode.reach_distance)
+                    {
+                        results[i].success = true;
+                        results[i].time_to_target = step * timestep;
+                        active--;
+                    }
+                    else if (stepsLeft[i] == 0)
+                    {
+                        active--;
+                    }
+                    budget++;
+                }
+                if (budget >= BatchStepsPerFrame)
+                {
+                    budget = 0;
+                    job.progress = (float)step / maxSteps;
+                    yield return null;
+                }
+            }
+
+            var batchResult = new SimulationBatchResult { timestep = timestep, episodes = results };
+            for (int i = 0; i < count; i++)
+            {
+                results[i].final_distance = Vector3.Distance(positions[i], targets[i]);
+                if (results[i].success) batchResult.succeeded++;
+                else batchResult.failed++;
+            }
+            CompleteJob(job, true, $"{batchResult.succeeded} of {count} episodes reached the target.", JsonUtility.ToJson(batchResult));
+        }
+
         // *** 3. NEW: TWO-WAY COMMUNICATION QUERIES ***
         public ApiResponse GetObjectPosition(QueryPayload payload)
         {
@@ -309,15 +811,58 @@ namespace ARSS.API
             }
             return new ApiResponse { success = true, message = JsonUtility.ToJson(objectNames) };
         }
+
+        // Safe to call from the listener thread: only reads the counters
+        public ApiResponse GetSceneVersion()
+        {
+            var info = new SceneVersionInfo { version = SceneVersion, busy = Busy };
+            return new ApiResponse { success = true, message = JsonUtility.ToJson(info) };
+        }
+
+        public ApiResponse GetSceneState()
+        {
+            var objects = new List<SceneObjectInfo>();
+            foreach (var obj in spawnedObjects)
+            {
+                if (obj == null) continue;
+                Vector3 position = obj.transform.position;
+                Vector3 scale = obj.transform.localScale;
+                var renderer = obj.GetComponent<Renderer>();
+                Color color = renderer != null && renderer.sharedMaterial != null ? renderer.sharedMaterial.color : Color.white;
+                objects.Add(new SceneObjectInfo {
+                    id = objectIds.TryGetValue(obj, out string id) ? id : "",
+                    name = obj.name,
+                    position = new Position { x = position.x, y = position.y, z = position.z },
+                    scale = new Scale { x = scale.x, y = scale.y, z = scale.z },
+                    color = new ColorData { r = color.r, g = color.g, b = color.b },
+                    has_color = renderer != null
+                });
+            }
+            var snapshot = new SceneSnapshot { version = SceneVersion, busy = Busy, lighting = currentLighting, objects = objects.ToArray() };
+            return new ApiResponse { success = true, message = JsonUtility.ToJson(snapshot) };
+        }
         
-        // Helper to find a spawned object by name
+        // Helper to find a spawned object by id, or else by name
         private GameObject FindObject(string name)
         {
+            if (objectsById.TryGetValue(name, out var byId) && byId != null)
+            {
+                return byId;
+            }
+
+            string query = name.ToLower();
+            // New objects are appended and deletes clear the cache, so an earlier hit stays the first match
+            if (findCache.TryGetValue(query, out var cached) && cached != null)
+            {
+                return cached;
+            }
+
             foreach (var obj in spawnedObjects)
             {
                 // Using Contains allows for more flexible naming (e.g., "fox" matches "Generated_fox")
-                if (obj.name.ToLower().Contains(name.ToLower()))
+                if (obj != null && obj.name.ToLower().Contains(query))
                 {
+                    findCache[query] = obj;
                     return obj;
                 }
             }
@@ -352,20 +897,13 @@ namespace ARSS.API
                     return new ApiResponse { success = false, message = $"Unknown lighting preset: {payload.preset}" };
             }
 
+            currentLighting = payload.preset.ToLower();
             return new ApiResponse { success = true, message = $"Lighting set to {payload.preset}." };
         }
 
         public ApiResponse AttachScript(AttachScriptPayload payload)
         {
-            GameObject target = null;
-            foreach (var obj in spawnedObjects)
-            {
-                if (obj.name.Contains(payload.object_name))
-                {
-                    target = obj;
-                    break;
-                }
-            }
+            GameObject target = FindObject(payload.object_name);
 
             if (target == null)
             {
@@ -387,6 +925,21 @@ namespace ARSS.API
                 }
             }
             spawnedObjects.Clear();
+            trackedBodies.Clear();
+            findCache.Clear();
+            objectIds.Clear();
+            scaleFactors.Clear();
+            // Models still loading are discarded when they finish (see DiscardIfCleared). Their ids
+            // stay reserved until then, so a new spawn cannot take an id the old load will release.
+            clearGeneration++;
+            var loadingIds = new List<string>();
+            foreach (var entry in objectsById)
+            {
+                if (entry.Value == null) loadingIds.Add(entry.Key);
+            }
+            objectsById.Clear();
+            foreach (var id in loadingIds) objectsById[id] = null;
+            MarkSceneChanged();
 
             return new ApiResponse { success = true, message = $"Cleared scene - destroyed {count} objects." };
         }
@@ -416,6 +969,7 @@ namespace ARSS.API
                 );
                 
                 model.transform.localScale = finalScale;
+                scaleFactors[payload.id] = autoScaleFactor;
                 
                 Debug.Log($"[SceneController] Auto-scale applied:");
                 Debug.Log($"[SceneController] - Model max dimension: {maxDimension:F2}");
@@ -428,6 +982,7 @@ namespace ARSS.API
                 Debug.LogError($"[SceneController] Error in intelligent scaling: {e.Message}");
                 // Fallback to simple scaling
                 model.transform.localScale = new Vector3(payload.scale.x * 0.1f, payload.scale.y * 0.1f, payload.scale.z * 0.1f);
+                scaleFactors[payload.id] = 0.1f;
             }
         }
 
@@ -516,6 +1071,48 @@ namespace ARSS.API
     {
         public bool success;
         public string reason;
+        public float elapsed;
+        public float final_distance = -1f;
+        public Position final_position;
+    }
+
+    [Serializable]
+    public class SimulationEpisode
+    {
+        // A named object's current position is used when given; otherwise start/target
+        public string robot_name;
+        public string target_name;
+        public Position start;
+        public Position target;
+        public float speed = 5f;
+        public float duration = 10f;
+        public float reach_distance = 1f;
+    }
+
+    [Serializable]
+    public class SimulationBatchPayload
+    {
+        public SimulationEpisode[] episodes;
+        public float timestep = 0.02f;
+    }
+
+    [Serializable]
+    public class SimulationEpisodeResult
+    {
+        public int index;
+        public bool success;
+        public float time_to_target; // -1 when the target was not reached
+        public float path_length;
+        public float final_distance;
+    }
+
+    [Serializable]
+    public class SimulationBatchResult
+    {
+        public int succeeded;
+        public int failed;
+        public float timestep;
+        public SimulationEpisodeResult[] episodes;
     }
 
     [Serializable]